@@ -0,0 +1,52 @@
+"""003_add_estadisticas_diarias
+
+Revision ID: 003_add_estadisticas_diarias
+Revises: 002_add_reportes_table
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_add_estadisticas_diarias'
+down_revision = '002_add_reportes_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Crear rollup diario de inspecciones y poblarlo con los datos existentes"""
+    
+    op.create_table(
+        'estadisticas_diarias',
+        sa.Column('fecha', sa.Date(), nullable=False),
+        sa.Column('id_planta', sa.BigInteger(), nullable=False),
+        sa.Column('id_navieras', sa.BigInteger(), nullable=False),
+        sa.Column('id_inspector', sa.BigInteger(), nullable=False),
+        sa.Column(
+            'estado',
+            sa.Enum('pending', 'approved', 'rejected', name='inspeccion_estado_enum'),
+            nullable=False
+        ),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('fecha', 'id_planta', 'id_navieras', 'id_inspector', 'estado'),
+        mysql_charset='utf8mb4',
+        mysql_collate='utf8mb4_unicode_ci'
+    )
+    
+    # Backfill desde inspecciones
+    op.execute(
+        """
+        INSERT INTO estadisticas_diarias (fecha, id_planta, id_navieras, id_inspector, estado, total)
+        SELECT DATE(inspeccionado_en), id_planta, id_navieras, id_inspector, estado, COUNT(*)
+        FROM inspecciones
+        GROUP BY DATE(inspeccionado_en), id_planta, id_navieras, id_inspector, estado
+        """
+    )
+
+
+def downgrade() -> None:
+    """Eliminar rollup diario"""
+    
+    op.drop_table('estadisticas_diarias')
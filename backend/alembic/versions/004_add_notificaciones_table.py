@@ -0,0 +1,57 @@
+"""004_add_notificaciones_table
+
+Revision ID: 004_add_notificaciones_table
+Revises: 003_add_estadisticas_diarias
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = '004_add_notificaciones_table'
+down_revision = '003_add_estadisticas_diarias'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Crear tabla notificaciones (reemplaza notifications.json)"""
+    
+    op.create_table(
+        'notificaciones',
+        sa.Column('id', sa.String(36), nullable=False),
+        # UNSIGNED como usuarios.id_usuario (requisito de la FK en MySQL)
+        sa.Column('id_usuario', sa.BigInteger().with_variant(mysql.BIGINT(unsigned=True), 'mysql'), nullable=True),
+        sa.Column('rol', sa.String(20), nullable=True),
+        sa.Column('evento', sa.String(60), nullable=True),
+        sa.Column('titulo', sa.String(200), nullable=False),
+        sa.Column('mensaje', sa.Text(), nullable=False),
+        sa.Column('link', sa.String(255), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('leida', sa.Boolean(), nullable=False, server_default=sa.text('0')),
+        sa.Column('creado_en', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(
+            ['id_usuario'],
+            ['usuarios.id_usuario'],
+            name='fk_notificaciones_usuario',
+            onupdate='CASCADE',
+            ondelete='CASCADE'
+        ),
+        mysql_charset='utf8mb4',
+        mysql_collate='utf8mb4_unicode_ci'
+    )
+    
+    # Índices por destinatario y fecha para leer la página más reciente
+    op.create_index('ix_notificaciones_usuario_fecha', 'notificaciones', ['id_usuario', 'creado_en'], unique=False)
+    op.create_index('ix_notificaciones_rol_fecha', 'notificaciones', ['rol', 'creado_en'], unique=False)
+
+
+def downgrade() -> None:
+    """Eliminar tabla notificaciones"""
+    
+    op.drop_index('ix_notificaciones_rol_fecha', table_name='notificaciones')
+    op.drop_index('ix_notificaciones_usuario_fecha', table_name='notificaciones')
+    op.drop_table('notificaciones')
@@ -0,0 +1,65 @@
+"""005_add_trabajos_pdf_table
+
+Revision ID: 005_add_trabajos_pdf_table
+Revises: 004_add_notificaciones_table
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = '005_add_trabajos_pdf_table'
+down_revision = '004_add_notificaciones_table'
+branch_labels = None
+depends_on = None
+
+# Las claves referenciadas son BIGINT UNSIGNED en MySQL
+ID = sa.BigInteger().with_variant(mysql.BIGINT(unsigned=True), 'mysql')
+
+
+def upgrade() -> None:
+    """Crear tabla trabajos_pdf para la generación de PDFs en segundo plano"""
+    
+    op.create_table(
+        'trabajos_pdf',
+        sa.Column('id', sa.String(36), nullable=False),
+        sa.Column('id_inspeccion', ID, nullable=False),
+        sa.Column('id_usuario', ID, nullable=True),
+        sa.Column(
+            'estado',
+            sa.Enum('queued', 'running', 'done', 'failed', name='trabajo_pdf_estado_enum'),
+            nullable=False,
+            server_default='queued'
+        ),
+        sa.Column('id_reporte', ID, nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('creado_en', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('iniciado_en', sa.DateTime(), nullable=True),
+        sa.Column('terminado_en', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(
+            ['id_inspeccion'], ['inspecciones.id_inspeccion'],
+            name='fk_trabajos_pdf_inspeccion', onupdate='CASCADE', ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(
+            ['id_usuario'], ['usuarios.id_usuario'],
+            name='fk_trabajos_pdf_usuario', onupdate='CASCADE', ondelete='SET NULL'
+        ),
+        sa.ForeignKeyConstraint(
+            ['id_reporte'], ['reportes.id'],
+            name='fk_trabajos_pdf_reporte', onupdate='CASCADE', ondelete='SET NULL'
+        ),
+        mysql_charset='utf8mb4',
+        mysql_collate='utf8mb4_unicode_ci'
+    )
+    
+    op.create_index('ix_trabajos_pdf_estado_fecha', 'trabajos_pdf', ['estado', 'creado_en'], unique=False)
+
+
+def downgrade() -> None:
+    """Eliminar tabla trabajos_pdf"""
+    
+    op.drop_index('ix_trabajos_pdf_estado_fecha', table_name='trabajos_pdf')
+    op.drop_table('trabajos_pdf')
@@ -0,0 +1,43 @@
+"""006_add_blobs_table
+
+Revision ID: 006_add_blobs_table
+Revises: 005_add_trabajos_pdf_table
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_add_blobs_table'
+down_revision = '005_add_trabajos_pdf_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Crear tabla blobs (almacén de evidencias por contenido)
+    
+    Las fotos existentes se trasladan con scripts/migrar_blobs.py, que mueve
+    archivos además de filas.
+    """
+    
+    op.create_table(
+        'blobs',
+        sa.Column('hash_hex', sa.String(64), nullable=False),
+        sa.Column('ruta', sa.String(255), nullable=False),
+        sa.Column('tamano', sa.BigInteger(), nullable=False),
+        sa.Column('referencias', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('creado_en', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('hash_hex'),
+        mysql_charset='utf8mb4',
+        mysql_collate='utf8mb4_unicode_ci'
+    )
+
+
+def downgrade() -> None:
+    """Eliminar tabla blobs"""
+    
+    op.drop_table('blobs')
@@ -1,4 +1,4 @@
 from .settings import settings
-from .database import Base, engine, get_db
+from .database import Base, engine, get_db, get_read_db, get_async_db
 
-__all__ = ["settings", "Base", "engine", "get_db"]
+__all__ = ["settings", "Base", "engine", "get_db", "get_read_db", "get_async_db"]
@@ -8,6 +8,13 @@ Componentes principales:
 - SessionLocal: Fábrica de sesiones de BD
 - Base: Clase base para modelos ORM
 - get_db(): Dependency injection para FastAPI
+- get_async_engine() / AsyncSessionLocal / get_async_db(): lo mismo para
+  endpoints async def (aiomysql), que así no bloquean el event loop
+- read_engine / ReadSessionLocal / get_read_db(): lecturas pesadas
+  (reportes, dashboard) contra la réplica si DB_REPLICA_URL está definida
+
+Todos los engines quedan instrumentados (core/metrics.py): estado del pool,
+espera por conexión y duración de consultas se publican en /api/metrics.
 
 Uso en routers:
     @router.get("/items")
@@ -15,12 +22,22 @@ Uso en routers:
         items = db.query(Item).all()
         return items
 
+    @router.get("/items-async")
+    async def get_items_async(db: AsyncSession = Depends(get_async_db)):
+        items = (await db.execute(select(Item))).scalars().all()
+        return items
+
 Autor: Sistema de Inspección de Contenedores
 Versión: 2.1.0
 """
+from functools import lru_cache
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from .settings import settings
+from .replica import RoutingSession
+from .metrics import QueuePoolMedido, AsyncQueuePoolMedido, instrumentar_engine
 
 
 # ==========================================
@@ -38,9 +55,14 @@ engine = create_engine(
     max_overflow=settings.DB_MAX_OVERFLOW,  # Conexiones extra bajo carga (20 por defecto)
     pool_recycle=3600,  # Recicla conexiones cada 1 hora (evita timeouts)
     
+    # ===== MÉTRICAS =====
+    poolclass=QueuePoolMedido,  # Mide la espera por una conexión libre
+    pool_logging_name="primario",  # Etiqueta del pool en /api/metrics
+    
     # ===== MODO DEBUG =====
     echo=settings.DEBUG  # Si DEBUG=True, imprime todas las queries SQL
 )
+instrumentar_engine(engine, "primario")
 
 # ==========================================
 # FÁBRICA DE SESIONES
@@ -52,6 +74,66 @@ SessionLocal = sessionmaker(
     bind=engine  # Vincula a nuestro motor de BD
 )
 
+# ==========================================
+# RÉPLICA DE LECTURA
+# ==========================================
+# Pool propio: las ráfagas de reportes no consumen conexiones del primario
+read_engine = create_engine(
+    settings.DB_REPLICA_URL,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=3600,
+    poolclass=QueuePoolMedido,
+    pool_logging_name="replica",
+    echo=settings.DEBUG
+) if settings.DB_REPLICA_URL else engine
+if read_engine is not engine:
+    instrumentar_engine(read_engine, "replica")
+
+# Sin réplica configurada, get_read_db entrega una sesión normal
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    primario=engine,
+    replica=read_engine
+) if settings.DB_REPLICA_URL else SessionLocal
+
+# ==========================================
+# MOTOR Y SESIONES ASYNC
+# ==========================================
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    """
+    Motor async, con un pool propio acotado por DB_ASYNC_POOL_SIZE y
+    DB_ASYNC_MAX_OVERFLOW (se suma al de engine en max_connections)
+    
+    Se crea al primer uso: así el driver async (aiomysql/asyncmy) solo se
+    importa en los procesos que lo usan (no en scripts ni en el pool de PDFs).
+    """
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        pool_pre_ping=True,
+        pool_size=settings.DB_ASYNC_POOL_SIZE,
+        max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+        pool_recycle=3600,
+        poolclass=AsyncQueuePoolMedido,
+        pool_logging_name="async",
+        echo=settings.DEBUG
+    )
+    instrumentar_engine(async_engine.sync_engine, "async")
+    return async_engine
+
+
+# expire_on_commit=False: tras el commit los objetos siguen legibles sin
+# volver a consultar (en async no hay carga diferida implícita)
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # ==========================================
 # BASE PARA MODELOS ORM
 # ==========================================
@@ -92,3 +174,37 @@ def get_db():
         yield db  # Entregar sesión al endpoint
     finally:
         db.close()  # Cerrar sesión (libera conexión al pool)
+
+
+def get_read_db():
+    """
+    Dependency injection de una sesión para endpoints de solo lectura
+    
+    Con DB_REPLICA_URL, las consultas van a la réplica salvo que el usuario
+    haya escrito en los últimos DB_REPLICA_STICKY_SECONDS (ver
+    core/replica.py). Si el endpoint llega a escribir, esa escritura y las
+    lecturas siguientes de la sesión van al primario.
+    
+    Yields:
+        Session: Sesión de SQLAlchemy (RoutingSession si hay réplica)
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """
+    Dependency injection de una sesión async (AsyncSession)
+    
+    Para endpoints async def: las queries se esperan con await y no
+    bloquean el event loop. Las relaciones deben cargarse explícitamente
+    (selectinload/joinedload): el acceso diferido no está disponible.
+    
+    Yields:
+        AsyncSession: Sesión async de SQLAlchemy
+    """
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
@@ -7,7 +7,13 @@ para toda la aplicación.
 Características:
 - Logs en consola (desarrollo) y archivo (producción)
 - Rotación automática cada 10MB (mantiene 5 backups)
-- Formato estructurado con timestamp, módulo, función y línea
+- Formato estructurado con timestamp, módulo, función y línea, o una
+  línea JSON por registro (LOG_JSON=true)
+- Escritura en segundo plano: los loggers solo encolan el registro
+  (QueueHandler) y un hilo (QueueListener) escribe en consola y archivo,
+  así la E/S de disco y la rotación no ocurren en el event loop
+- Cola acotada (LOG_QUEUE_MAXSIZE): si se llena se descartan registros
+  en vez de bloquear la petición
 - Loggers especializados: security, audit, database
 
 Uso:
@@ -20,13 +26,154 @@ Uso:
 Autor: Sistema de Inspección de Contenedores
 Versión: 2.1.0
 """
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
+from typing import Optional
 from .settings import settings
 
+# Atributos estándar de LogRecord: el resto son campos extra (ej: http_status)
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Una línea JSON por registro
+    
+    Incluye los campos extra del record (los del middleware HTTP:
+    http_method, http_path, http_status, duracion_ms...).
+    
+    Example:
+        {"ts": "2025-10-14T23:45:12.123", "level": "INFO", "logger": "http",
+         "message": "<- 200 GET /api/plantas (3.10ms)", "http_status": 200, ...}
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "func": record.funcName,
+            "line": record.lineno,
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_RECORD and not clave.startswith("_"):
+                datos[clave] = valor
+        if record.exc_info:
+            datos["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            datos["exc"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class ColaLogHandler(QueueHandler):
+    """
+    QueueHandler con cola acotada que nunca bloquea al que registra
+    
+    Con la cola llena:
+    - Los registros DEBUG/INFO/WARNING nuevos se descartan
+    - Los ERROR/CRITICAL desplazan al registro más antiguo de la cola
+    Los descartes se cuentan y, cuando vuelve a haber espacio, se encola
+    un WARNING con la cantidad perdida.
+    """
+
+    def __init__(self, cola: "queue.Queue"):
+        super().__init__(cola)
+        self.descartados = 0  # Total desde el inicio
+        self._sin_avisar = 0  # Descartes aún no informados en el log
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Solo se resuelve el mensaje (los args pueden cambiar después);
+        # el formato completo y el traceback los arma el hilo escritor
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._sin_avisar:
+            try:
+                self.queue.put_nowait(self._aviso_descartes())
+                self._sin_avisar = 0
+            except queue.Full:
+                pass
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.ERROR:
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+                self._descartar()
+                return
+            except (queue.Empty, queue.Full):
+                pass
+        self._descartar()
+
+    def _descartar(self) -> None:
+        self.descartados += 1
+        self._sin_avisar += 1
+
+    def _aviso_descartes(self) -> logging.LogRecord:
+        return logging.LogRecord(
+            "logging", logging.WARNING, __file__, 0,
+            f"Se descartaron {self._sin_avisar} registros de log (cola llena)", None, None
+        )
+
+
+# Hilo escritor activo (uno por proceso)
+_listener: Optional[QueueListener] = None
+
+
+def _conectar_handlers_directos() -> Optional[QueueListener]:
+    """Quita ColaLogHandler del logger raíz y conecta los handlers del listener"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return None
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, ColaLogHandler):
+            root_logger.removeHandler(handler)
+    for handler in listener.handlers:
+        root_logger.addHandler(handler)
+    return listener
+
+
+def detener_logging() -> None:
+    """
+    Escribe lo pendiente en la cola y detiene el hilo escritor
+    
+    Los handlers vuelven al logger raíz: lo que se registre después (al
+    cerrar la app) se escribe de forma síncrona en vez de perderse.
+    """
+    listener = _conectar_handlers_directos()
+    if listener is not None:
+        listener.stop()
+
+
+def usar_handlers_directos() -> None:
+    """
+    Logging síncrono en un proceso hijo creado con fork (pool de PDFs)
+    
+    El hijo hereda el ColaLogHandler pero no el hilo del QueueListener: sus
+    registros quedarían en una cola que nadie lee. Se conectan los handlers
+    directo al logger raíz, sin tocar la cola (su lock pudo quedar tomado
+    por el hilo del padre en el momento del fork).
+    """
+    _conectar_handlers_directos()
+
 
 def setup_logging():
     """
@@ -36,6 +183,10 @@ def setup_logging():
     1. ConsoleHandler: Imprime logs en terminal (útil en desarrollo)
     2. RotatingFileHandler: Guarda logs en archivo con rotación automática
     
+    Ambos los atiende un QueueListener en un hilo propio; el logger raíz
+    solo tiene un ColaLogHandler que encola. Con LOG_QUEUE_MAXSIZE=0 los
+    handlers se conectan directo al logger raíz (escritura síncrona).
+    
     Rotación de archivos:
     - Cuando app.log alcanza 10MB, se renombra a app.log.1
     - Los archivos antiguos se numeran: app.log.1, app.log.2, ...
@@ -69,10 +220,13 @@ def setup_logging():
     # ==========================================
     # 3. DEFINIR FORMATO DE LOGS
     # ==========================================
-    log_format = logging.Formatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if settings.LOG_JSON:
+        log_format = JsonFormatter()
+    else:
+        log_format = logging.Formatter(
+            fmt='%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     
     # ==========================================
     # 4. CONFIGURAR LOGGER RAÍZ
@@ -81,6 +235,7 @@ def setup_logging():
     root_logger.setLevel(log_level)
     
     # Limpiar handlers existentes (evita duplicados)
+    detener_logging()
     root_logger.handlers.clear()
     
     # ==========================================
@@ -90,7 +245,6 @@ def setup_logging():
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(log_format)
-    root_logger.addHandler(console_handler)
     
     # ==========================================
     # 6. HANDLER PARA ARCHIVO CON ROTACIÓN
@@ -104,10 +258,23 @@ def setup_logging():
     )
     file_handler.setLevel(log_level)
     file_handler.setFormatter(log_format)
-    root_logger.addHandler(file_handler)
     
     # ==========================================
-    # 7. REDUCIR VERBOSIDAD DE LIBRERÍAS EXTERNAS
+    # 7. COLA Y HILO ESCRITOR
+    # ==========================================
+    # Las peticiones solo encolan; consola y archivo se escriben en otro hilo
+    global _listener
+    if settings.LOG_QUEUE_MAXSIZE > 0:
+        cola = queue.Queue(maxsize=settings.LOG_QUEUE_MAXSIZE)
+        root_logger.addHandler(ColaLogHandler(cola))
+        _listener = QueueListener(cola, console_handler, file_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        root_logger.addHandler(console_handler)
+        root_logger.addHandler(file_handler)
+    
+    # ==========================================
+    # 8. REDUCIR VERBOSIDAD DE LIBRERÍAS EXTERNAS
     # ==========================================
     # Evita spam de logs de uvicorn y sqlalchemy
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -118,6 +285,13 @@ def setup_logging():
     return root_logger
 
 
+# Al salir del proceso, escribir lo que quede en la cola
+atexit.register(detener_logging)
+# En los hijos creados con fork no existe el hilo escritor
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=usar_handlers_directos)
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Obtiene un logger con nombre específico para un módulo
@@ -0,0 +1,342 @@
+"""
+Métricas de la Aplicación
+=========================
+Instrumentación del pool de conexiones, de las consultas SQL y de las
+peticiones HTTP, exportada en formato de texto de Prometheus en /api/metrics.
+
+- Pool: checkouts, espera para obtener conexión, timeouts y, al exportar,
+  conexiones en uso / libres / overflow de cada engine
+- Consultas: cantidad y duración por petición y por ruta, muestras de las
+  consultas lentas (SLOW_QUERY_MS) con su sentencia
+- HTTP: histograma de latencia por método, plantilla de ruta y código
+
+Los contadores se llevan en memoria, por proceso (cada worker exporta los
+suyos; Prometheus los suma). No depende de prometheus_client.
+
+Uso:
+    engine = create_engine(url, poolclass=QueuePoolMedido, pool_logging_name="primario")
+    instrumentar_engine(engine, "primario")
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .settings import settings
+
+db_logger = logging.getLogger("database")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites de los histogramas (segundos / cantidad de consultas)
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BD = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Peticiones que no coinciden con ninguna ruta (404): una sola etiqueta
+SIN_RUTA = "sin_ruta"
+
+
+def _escapar(valor: Any) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: Sequence[str], valores: Sequence[Any], extra: str = "") -> str:
+    partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if valor != int(valor) else str(int(valor))
+
+
+class Contador:
+    """Contador monótono con etiquetas"""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valor: float = 1, **etiquetas) -> None:
+        clave = tuple(etiquetas[n] for n in self.etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def valor(self, **etiquetas) -> float:
+        return self._valores.get(tuple(etiquetas[n] for n in self.etiquetas), 0)
+
+    def exportar(self) -> Iterator[str]:
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} counter"
+        with self._lock:
+            valores = list(self._valores.items())
+        for clave, valor in valores:
+            yield f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(valor)}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._valores.clear()
+
+
+class Histograma:
+    """Histograma acumulativo con etiquetas (buckets fijos)"""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_HTTP):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        # clave -> [conteo por bucket..., suma, total]
+        self._series: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, **etiquetas) -> None:
+        clave = tuple(etiquetas[n] for n in self.etiquetas)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [0] * (len(self.buckets) + 2)
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[i] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def total(self, **etiquetas) -> int:
+        serie = self._series.get(tuple(etiquetas[n] for n in self.etiquetas))
+        return int(serie[-1]) if serie else 0
+
+    def exportar(self) -> Iterator[str]:
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} histogram"
+        with self._lock:
+            series = [(clave, list(serie)) for clave, serie in self._series.items()]
+        for clave, serie in series:
+            for limite, conteo in zip(self.buckets, serie):
+                etiquetas = _etiquetas(self.etiquetas, clave, f'le="{_numero(limite)}"')
+                yield f"{self.nombre}_bucket{etiquetas} {int(conteo)}"
+            etiquetas = _etiquetas(self.etiquetas, clave, 'le="+Inf"')
+            yield f"{self.nombre}_bucket{etiquetas} {int(serie[-1])}"
+            yield f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(serie[-2])}"
+            yield f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {int(serie[-1])}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class EstadisticasPeticion:
+    """Consultas SQL de la petición HTTP en curso"""
+
+    __slots__ = ("scope", "consultas", "tiempo_bd")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.consultas = 0
+        self.tiempo_bd = 0.0
+
+    @property
+    def ruta(self) -> str:
+        return plantilla_ruta(self.scope) if self.scope is not None else SIN_RUTA
+
+
+def plantilla_ruta(scope: dict) -> str:
+    """Plantilla de la ruta (ej: /api/inspecciones/{id_inspeccion}), no la URL concreta"""
+    ruta = scope.get("route")
+    return getattr(ruta, "path", None) or SIN_RUTA
+
+
+_peticion_actual: ContextVar[Optional[EstadisticasPeticion]] = ContextVar("peticion_metricas", default=None)
+
+
+class RegistroMetricas:
+    """Todas las métricas del proceso"""
+
+    def __init__(self):
+        self.peticiones = Histograma(
+            "http_request_duration_seconds", "Duración de las peticiones HTTP",
+            ("method", "route", "status"), BUCKETS_HTTP
+        )
+        self.consultas_por_peticion = Histograma(
+            "http_request_db_queries", "Consultas SQL por petición",
+            ("route",), BUCKETS_CONSULTAS
+        )
+        self.tiempo_bd_por_peticion = Histograma(
+            "http_request_db_duration_seconds", "Tiempo total en consultas SQL por petición",
+            ("route",), BUCKETS_HTTP
+        )
+        self.consultas = Histograma(
+            "db_query_duration_seconds", "Duración de cada consulta SQL",
+            ("db",), BUCKETS_BD
+        )
+        self.consultas_lentas = Contador(
+            "db_slow_queries_total", "Consultas más lentas que SLOW_QUERY_MS", ("db",)
+        )
+        self.checkouts = Contador(
+            "db_pool_checkouts_total", "Conexiones entregadas por el pool", ("pool",)
+        )
+        self.espera_pool = Histograma(
+            "db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool",
+            ("pool",), BUCKETS_BD
+        )
+        self.timeouts_pool = Contador(
+            "db_pool_timeouts_total", "Peticiones de conexión que agotaron pool_timeout", ("pool",)
+        )
+        self.muestras_lentas: Deque[Tuple[str, str, str, float]] = deque(maxlen=settings.SLOW_QUERY_SAMPLES)
+        self._engines: Dict[str, Engine] = {}
+
+    def registrar_engine(self, nombre: str, engine: Engine) -> None:
+        self._engines[nombre] = engine
+
+    def registrar_consulta(self, db: str, sentencia: str, duracion: float) -> None:
+        self.consultas.observar(duracion, db=db)
+        peticion = _peticion_actual.get()
+        if peticion is not None:
+            peticion.consultas += 1
+            peticion.tiempo_bd += duracion
+        if duracion * 1000 >= settings.SLOW_QUERY_MS:
+            ruta = peticion.ruta if peticion is not None else SIN_RUTA
+            self.consultas_lentas.inc(db=db)
+            self.muestras_lentas.append((db, ruta, _resumir_sentencia(sentencia), duracion))
+            db_logger.warning("Consulta lenta (%.0f ms) en %s [%s]: %s", duracion * 1000, ruta, db, sentencia)
+
+    def registrar_peticion(self, metodo: str, ruta: str, codigo: int, duracion: float,
+                           estadisticas: EstadisticasPeticion) -> None:
+        self.peticiones.observar(duracion, method=metodo, route=ruta, status=str(codigo))
+        self.consultas_por_peticion.observar(estadisticas.consultas, route=ruta)
+        self.tiempo_bd_por_peticion.observar(estadisticas.tiempo_bd, route=ruta)
+
+    def _estado_pools(self) -> Iterator[str]:
+        medidas = (
+            ("db_pool_size", "Tamaño configurado del pool", "size"),
+            ("db_pool_checked_out", "Conexiones en uso", "checkedout"),
+            ("db_pool_checked_in", "Conexiones libres en el pool", "checkedin"),
+            ("db_pool_overflow", "Conexiones por encima de pool_size (negativo: sin abrir)", "overflow"),
+        )
+        for nombre, ayuda, metodo in medidas:
+            yield f"# HELP {nombre} {ayuda}"
+            yield f"# TYPE {nombre} gauge"
+            for pool_nombre, engine in list(self._engines.items()):
+                # Solo QueuePool expone el estado (no NullPool/StaticPool)
+                valor = getattr(engine.pool, metodo, None)
+                if callable(valor):
+                    yield f'{nombre}{{pool="{_escapar(pool_nombre)}"}} {valor()}'
+
+    def _muestras_lentas(self) -> Iterator[str]:
+        nombre = "db_slow_query_sample_seconds"
+        yield f"# HELP {nombre} Últimas consultas lentas con su sentencia (SLOW_QUERY_SAMPLES)"
+        yield f"# TYPE {nombre} gauge"
+        for db, ruta, sentencia, duracion in list(self.muestras_lentas):
+            etiquetas = _etiquetas(("db", "route", "statement"), (db, ruta, sentencia))
+            yield f"{nombre}{etiquetas} {_numero(duracion)}"
+
+    def exportar(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus"""
+        lineas: List[str] = []
+        for metrica in (
+            self.peticiones, self.consultas_por_peticion, self.tiempo_bd_por_peticion,
+            self.consultas, self.consultas_lentas, self.checkouts, self.espera_pool, self.timeouts_pool,
+        ):
+            lineas.extend(metrica.exportar())
+        lineas.extend(self._estado_pools())
+        lineas.extend(self._muestras_lentas())
+        return "\n".join(lineas) + "\n"
+
+    def clear(self) -> None:
+        for metrica in (
+            self.peticiones, self.consultas_por_peticion, self.tiempo_bd_por_peticion,
+            self.consultas, self.consultas_lentas, self.checkouts, self.espera_pool, self.timeouts_pool,
+        ):
+            metrica.clear()
+        self.muestras_lentas.clear()
+
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def _resumir_sentencia(sentencia: str, largo: int = 300) -> str:
+    """Sentencia en una línea y acotada (los parámetros no se incluyen)"""
+    sentencia = _ESPACIOS.sub(" ", sentencia).strip()
+    return sentencia if len(sentencia) <= largo else sentencia[:largo] + "..."
+
+
+# ==========================================
+# INSTANCIA GLOBAL DE MÉTRICAS
+# ==========================================
+metricas = RegistroMetricas()
+
+
+def iniciar_peticion(scope: dict):
+    """Abre el conteo de consultas de una petición; retorna (estadisticas, token)"""
+    estadisticas = EstadisticasPeticion(scope)
+    return estadisticas, _peticion_actual.set(estadisticas)
+
+
+def terminar_peticion(token) -> None:
+    _peticion_actual.reset(token)
+
+
+# ==========================================
+# POOL CON ESPERA MEDIDA
+# ==========================================
+class _EsperaMedida:
+    """Mide cuánto espera cada checkout por una conexión libre"""
+
+    def _do_get(self):
+        nombre = self._orig_logging_name or "default"
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metricas.timeouts_pool.inc(pool=nombre)
+            raise
+        finally:
+            metricas.espera_pool.observar(time.perf_counter() - inicio, pool=nombre)
+
+
+class QueuePoolMedido(_EsperaMedida, QueuePool):
+    """QueuePool que registra la espera de cada checkout (db_pool_checkout_wait_seconds)"""
+
+
+class AsyncQueuePoolMedido(_EsperaMedida, AsyncAdaptedQueuePool):
+    """Variante para engines async"""
+
+
+def instrumentar_engine(engine: Engine, nombre: str) -> None:
+    """
+    Registra los eventos de SQLAlchemy del engine (para AsyncEngine pasar
+    engine.sync_engine): checkouts del pool y duración de cada consulta
+    """
+    metricas.registrar_engine(nombre, engine)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        metricas.checkouts.inc(pool=nombre)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get("inicio_consulta")
+        if inicios:
+            metricas.registrar_consulta(nombre, statement, time.perf_counter() - inicios.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        inicios = contexto.connection.info.get("inicio_consulta") if contexto.connection is not None else None
+        if inicios:
+            inicios.pop()
@@ -0,0 +1,123 @@
+"""
+Enrutamiento de lecturas a la réplica
+=====================================
+Los endpoints de reportes usan get_read_db: una RoutingSession que envía
+las consultas a la réplica y las escrituras al primario.
+
+Lectura de las propias escrituras: cada commit con cambios registra al
+usuario de la petición (lo fija get_current_user); durante
+DB_REPLICA_STICKY_SECONDS sus lecturas van al primario, así no ve datos
+anteriores a su propio cambio aunque la réplica tenga retraso.
+
+El registro es por proceso, como principal_cache: con varios workers otra
+petición del mismo usuario puede caer en un worker que no vio la escritura.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .settings import settings
+
+# Usuario autenticado de la petición en curso
+_usuario_actual: ContextVar[Optional[int]] = ContextVar("usuario_actual", default=None)
+
+
+def marcar_usuario_actual(id_usuario: Optional[int]) -> None:
+    """Asocia la petición en curso al usuario (se llama desde get_current_user)"""
+    _usuario_actual.set(id_usuario)
+
+
+class EscriturasRecientes:
+    """Momento de la última escritura confirmada de cada usuario"""
+
+    def __init__(self, ventana_seconds: Optional[float] = None):
+        self.ventana_seconds = (
+            settings.DB_REPLICA_STICKY_SECONDS if ventana_seconds is None else ventana_seconds
+        )
+        self._datos: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, id_usuario: Optional[int]) -> None:
+        if id_usuario is None or self.ventana_seconds <= 0:
+            return
+        ahora = time.monotonic()
+        with self._lock:
+            self._datos[id_usuario] = ahora
+            # Limpieza ocasional de entradas vencidas
+            if len(self._datos) > 1000:
+                limite = ahora - self.ventana_seconds
+                self._datos = {k: v for k, v in self._datos.items() if v >= limite}
+
+    def reciente(self, id_usuario: Optional[int]) -> bool:
+        """True si el usuario escribió dentro de la ventana"""
+        if id_usuario is None:
+            return False
+        with self._lock:
+            momento = self._datos.get(id_usuario)
+        return momento is not None and time.monotonic() - momento < self.ventana_seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+
+escrituras_recientes = EscriturasRecientes()
+
+
+# ==========================================
+# REGISTRO DE ESCRITURAS (todas las sesiones)
+# ==========================================
+# Aplica también a AsyncSession, que usa una Session síncrona por dentro
+@event.listens_for(Session, "after_flush")
+def _marcar_flush(session, flush_context):
+    session.info["escribio"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _marcar_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["escribio"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _registrar_commit(session):
+    if session.info.pop("escribio", False):
+        session.info["confirmo_escritura"] = True
+        escrituras_recientes.registrar(_usuario_actual.get())
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_rollback(session):
+    session.info.pop("escribio", None)
+
+
+class RoutingSession(Session):
+    """
+    Session que lee de la réplica y escribe en el primario
+
+    Van al primario: los flush, las sentencias INSERT/UPDATE/DELETE, las
+    lecturas de una sesión que ya escribió y las de un usuario con una
+    escritura reciente. La decisión se toma en cada consulta, cuando
+    get_current_user ya identificó al usuario.
+    """
+
+    def __init__(self, primario: Engine, replica: Engine, **kwargs):
+        super().__init__(**kwargs)
+        self.primario = primario
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self._flushing
+            or getattr(clause, "is_dml", False)
+            or self.info.get("escribio")
+            or self.info.get("confirmo_escritura")
+            or escrituras_recientes.reciente(_usuario_actual.get())
+        ):
+            return self.primario
+        return self.replica
@@ -0,0 +1,345 @@
+"""
+Almacenamiento de Archivos
+==========================
+Interfaz común para guardar evidencias, firmas y PDFs, con dos drivers:
+
+- LocalStorage: disco local bajo CAPTURAS_DIR (comportamiento original)
+- S3Storage: bucket compatible con S3 (AWS, MinIO...). Requiere boto3.
+
+Las claves son rutas relativas a capturas/ (ej: blobs/ab/cd/<sha256>.jpg);
+en BD se guardan como /capturas/<clave>.
+
+Uso:
+    from app.core.storage import storage
+
+    storage.guardar_archivo("firmas/1.png", ruta_temporal, "image/png")
+    with storage.ruta_local("firmas/1.png") as ruta:
+        ...
+"""
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .settings import settings
+
+# Prefijo con el que las claves se guardan en BD y se publican
+PREFIJO_CAPTURAS = "/capturas/"
+
+
+def clave_de_ruta(ruta: str) -> str:
+    """Clave de almacenamiento de una ruta /capturas/... guardada en BD"""
+    ruta = ruta.replace("\\", "/")
+    return ruta[len(PREFIJO_CAPTURAS):] if ruta.startswith(PREFIJO_CAPTURAS) else ruta.lstrip("/")
+
+
+def ruta_de_clave(clave: str) -> str:
+    """Ruta /capturas/... que se guarda en BD para una clave"""
+    return f"{PREFIJO_CAPTURAS}{clave}"
+
+
+def validar_clave(clave: str) -> str:
+    """
+    Verifica que una clave sea relativa a capturas/
+
+    Raises:
+        ValueError: Si la clave es absoluta, usa '\\' o contiene segmentos '..'
+    """
+    if clave.startswith("/") or "\\" in clave or ".." in clave.split("/"):
+        raise ValueError(f"Clave de almacenamiento inválida: {clave!r}")
+    return clave
+
+
+class StorageBackend(ABC):
+    """
+    Operaciones que necesita la aplicación sobre los archivos
+
+    Los métodos son bloqueantes: desde código async llamarlos con
+    run_in_threadpool.
+    """
+
+    @abstractmethod
+    def directorio_temporal(self) -> str:
+        """Carpeta local para temporales que luego se guardan con guardar_archivo"""
+
+    @abstractmethod
+    def guardar_archivo(self, clave: str, origen: str, content_type: Optional[str] = None) -> None:
+        """Guarda un archivo local bajo clave. El archivo origen se consume (mueve o borra)"""
+
+    @abstractmethod
+    def guardar_bytes(self, clave: str, datos: bytes, content_type: Optional[str] = None) -> None:
+        """Guarda un contenido pequeño (metadatos, firmas) bajo clave"""
+
+    @abstractmethod
+    def leer_bytes(self, clave: str) -> bytes:
+        """
+        Lee el contenido completo de una clave
+
+        Raises:
+            FileNotFoundError: Si la clave no existe
+        """
+
+    @abstractmethod
+    def existe(self, clave: str) -> bool:
+        """Si la clave existe"""
+
+    @abstractmethod
+    def tamano(self, clave: str) -> Optional[int]:
+        """Tamaño en bytes, o None si la clave no existe"""
+
+    @abstractmethod
+    def eliminar(self, clave: str) -> None:
+        """Elimina la clave si existe"""
+
+    def eliminar_directorio_vacio(self, prefijo: str) -> None:
+        """Elimina la carpeta de un prefijo si quedó vacía (sin efecto en S3)"""
+
+    @abstractmethod
+    @contextmanager
+    def ruta_local(self, clave: str) -> Iterator[str]:
+        """
+        Ruta en disco con el contenido de la clave, válida dentro del bloque
+
+        Raises:
+            FileNotFoundError: Si la clave no existe
+        """
+
+    def url_descarga(
+        self,
+        clave: str,
+        nombre: Optional[str] = None,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        URL firmada para descargar directamente del almacenamiento
+
+        Returns:
+            str: URL temporal, o None si el archivo está en disco y lo sirve
+                la API (ver ruta)
+        """
+        return None
+
+    def ruta(self, clave: str) -> str:
+        """Ruta en disco de una clave (solo almacenamiento local)"""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """Archivos en disco bajo CAPTURAS_DIR (un solo nodo)"""
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir
+
+    @property
+    def directorio(self) -> str:
+        return self.base_dir or settings.CAPTURAS_DIR
+
+    def ruta(self, clave: str) -> str:
+        """
+        Ruta en disco de una clave
+
+        Raises:
+            ValueError: Si la clave no es válida o resuelve fuera de CAPTURAS_DIR
+        """
+        validar_clave(clave)
+        ruta = os.path.join(self.directorio, clave)
+        base = os.path.realpath(self.directorio)
+        if os.path.commonpath([base, os.path.realpath(ruta)]) != base:
+            raise ValueError(f"Clave fuera de capturas: {clave!r}")
+        return ruta
+
+    def directorio_temporal(self) -> str:
+        # Dentro de CAPTURAS_DIR: os.replace es atómico en el mismo FS
+        directorio = os.path.join(self.directorio, ".tmp")
+        os.makedirs(directorio, exist_ok=True)
+        return directorio
+
+    def guardar_archivo(self, clave: str, origen: str, content_type: Optional[str] = None) -> None:
+        destino = self.ruta(clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(origen, destino)
+
+    def guardar_bytes(self, clave: str, datos: bytes, content_type: Optional[str] = None) -> None:
+        destino = self.ruta(clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=os.path.dirname(destino), prefix=".", suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, destino)
+
+    def leer_bytes(self, clave: str) -> bytes:
+        with open(self.ruta(clave), "rb") as f:
+            return f.read()
+
+    def existe(self, clave: str) -> bool:
+        return os.path.isfile(self.ruta(clave))
+
+    def tamano(self, clave: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.ruta(clave))
+        except OSError:
+            return None
+
+    def eliminar(self, clave: str) -> None:
+        try:
+            os.remove(self.ruta(clave))
+        except FileNotFoundError:
+            pass
+
+    def eliminar_directorio_vacio(self, prefijo: str) -> None:
+        try:
+            os.rmdir(self.ruta(prefijo))
+        except OSError:
+            # No existe o quedan otros archivos: se deja
+            pass
+
+    @contextmanager
+    def ruta_local(self, clave: str) -> Iterator[str]:
+        ruta = self.ruta(clave)
+        if not os.path.isfile(ruta):
+            raise FileNotFoundError(ruta)
+        yield ruta
+
+
+class S3Storage(StorageBackend):
+    """
+    Archivos en un bucket compatible con S3 (AWS, MinIO, Ceph...)
+
+    - guardar_archivo usa la transferencia de boto3, que divide en partes
+      (multipart upload) los archivos mayores a S3_MULTIPART_THRESHOLD.
+    - url_descarga entrega URLs firmadas: los archivos los sirve el bucket,
+      no los workers de la API.
+    - El cliente se crea de forma diferida y por proceso (los clientes de
+      boto3 no deben compartirse entre procesos del pool de PDFs).
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        client=None
+    ):
+        try:
+            import boto3  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 requiere instalar boto3") from e
+        self.bucket = bucket or settings.S3_BUCKET
+        self.endpoint_url = endpoint_url if endpoint_url is not None else settings.S3_ENDPOINT_URL
+        self._client = client
+        self._pid = os.getpid() if client is not None else None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                import boto3
+                self._client = boto3.client(
+                    "s3",
+                    endpoint_url=self.endpoint_url or None,
+                    aws_access_key_id=settings.S3_ACCESS_KEY or None,
+                    aws_secret_access_key=settings.S3_SECRET_KEY or None,
+                    region_name=settings.S3_REGION,
+                )
+                self._pid = os.getpid()
+            return self._client
+
+    def _transfer_config(self):
+        from boto3.s3.transfer import TransferConfig
+        return TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_THRESHOLD,
+        )
+
+    def directorio_temporal(self) -> str:
+        directorio = os.path.join(tempfile.gettempdir(), "capturas")
+        os.makedirs(directorio, exist_ok=True)
+        return directorio
+
+    def guardar_archivo(self, clave: str, origen: str, content_type: Optional[str] = None) -> None:
+        extra = {"ContentType": content_type} if content_type else None
+        try:
+            self.client.upload_file(origen, self.bucket, clave, ExtraArgs=extra, Config=self._transfer_config())
+        finally:
+            os.remove(origen)
+
+    def guardar_bytes(self, clave: str, datos: bytes, content_type: Optional[str] = None) -> None:
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=clave, Body=datos, **extra)
+
+    def leer_bytes(self, clave: str) -> bytes:
+        try:
+            respuesta = self.client.get_object(Bucket=self.bucket, Key=clave)
+        except self.client.exceptions.NoSuchKey as e:
+            raise FileNotFoundError(clave) from e
+        return respuesta["Body"].read()
+
+    def _head(self, clave: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=clave)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def existe(self, clave: str) -> bool:
+        return self._head(clave) is not None
+
+    def tamano(self, clave: str) -> Optional[int]:
+        head = self._head(clave)
+        return head["ContentLength"] if head is not None else None
+
+    def eliminar(self, clave: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=clave)
+
+    @contextmanager
+    def ruta_local(self, clave: str) -> Iterator[str]:
+        fd, temporal = tempfile.mkstemp(dir=self.directorio_temporal(), suffix=os.path.splitext(clave)[1])
+        try:
+            with os.fdopen(fd, "wb") as destino:
+                try:
+                    respuesta = self.client.get_object(Bucket=self.bucket, Key=clave)
+                except self.client.exceptions.NoSuchKey as e:
+                    raise FileNotFoundError(clave) from e
+                shutil.copyfileobj(respuesta["Body"], destino)
+            yield temporal
+        finally:
+            os.remove(temporal)
+
+    def url_descarga(
+        self,
+        clave: str,
+        nombre: Optional[str] = None,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None
+    ) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": clave}
+        if nombre:
+            params["ResponseContentDisposition"] = f'attachment; filename="{nombre}"'
+        if content_type:
+            params["ResponseContentType"] = content_type
+        if cache_control:
+            params["ResponseCacheControl"] = cache_control
+        return self.client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=settings.S3_PRESIGN_SECONDS
+        )
+
+
+def get_storage() -> StorageBackend:
+    """Crea el driver configurado en STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage()
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage()
+    raise ValueError(f"STORAGE_BACKEND no soportado: {settings.STORAGE_BACKEND}")
+
+
+# ==========================================
+# INSTANCIA GLOBAL DE ALMACENAMIENTO
+# ==========================================
+storage = get_storage()
@@ -1,7 +1,6 @@
 """Aplicación principal FastAPI"""
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from datetime import datetime
 import os
 import logging
@@ -10,9 +9,13 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 from .core.settings import settings
-from .core.logging import setup_logging
-from .middleware import LoggingMiddleware
+from .core.database import get_async_engine
+from .core.logging import setup_logging, detener_logging
+from .middleware import LoggingMiddleware, MetricsMiddleware
 from .utils import ensure_dir
+from .services.email_queue import email_queue
+from .services.ultimo_acceso import ultimo_acceso_tracker
+from .services.pdf_jobs import pdf_job_service
 from .routers import (
     plantas_router,
     navieras_router,
@@ -23,7 +26,9 @@ from .routers import (
     auth_router,
     notifications_router,
     estadisticas_router,
-    reportes_export_router
+    reportes_export_router,
+    capturas_router,
+    metricas_router
 )
 from .schemas import HealthResponse
 
@@ -33,12 +38,14 @@ logger = logging.getLogger(__name__)
 
 logger.info(f"Iniciando {settings.APP_NAME} v{settings.APP_VERSION}")
 logger.info(f"Entorno: {settings.ENVIRONMENT}")
+logger.info(f"Conexiones máximas al primario por worker: {settings.conexiones_por_worker}")
 logger.info(f"Debug mode: {settings.DEBUG}")
 
-# Crear directorios necesarios
-ensure_dir(settings.CAPTURAS_DIR)
-ensure_dir(os.path.join(settings.CAPTURAS_DIR, "inspecciones"))
-ensure_dir(os.path.join(settings.CAPTURAS_DIR, "firmas"))
+# Crear directorios necesarios (solo con almacenamiento local)
+if settings.STORAGE_BACKEND == "local":
+    ensure_dir(settings.CAPTURAS_DIR)
+    ensure_dir(os.path.join(settings.CAPTURAS_DIR, "inspecciones"))
+    ensure_dir(os.path.join(settings.CAPTURAS_DIR, "firmas"))
 
 # Inicializar aplicación
 app = FastAPI(
@@ -63,6 +70,12 @@ app.add_middleware(
 # Middleware de logging
 app.add_middleware(LoggingMiddleware)
 
+# Métricas HTTP y de BD por petición (expuestas en /api/metrics)
+if settings.metricas_habilitadas:
+    app.add_middleware(MetricsMiddleware)
+elif settings.METRICS_ENABLED:
+    logger.warning("METRICS_ENABLED sin METRICS_TOKEN fuera de development: /api/metrics no se expone")
+
 logger.info(f"CORS configurado: {', '.join(settings.cors_origins)}")
 
 # Health check
@@ -87,22 +100,58 @@ app.include_router(estadisticas_router, prefix="/api")
 app.include_router(reportes_export_router, prefix="/api/reportes/export")
 from .routers.auditar import router as auditar_router
 app.include_router(auditar_router, prefix="/api")
+if settings.metricas_habilitadas:
+    app.include_router(metricas_router, prefix="/api")
 
 logger.info("Todos los routers registrados")
 
-# Montar archivos estáticos AL FINAL (después de los routers API)
-capturas_path = os.path.abspath(settings.CAPTURAS_DIR)
-logger.info(f"Directorio de capturas: {capturas_path}")
 
-if os.path.exists(capturas_path):
-    app.mount(
-        "/capturas",
-        StaticFiles(directory=capturas_path),
-        name="capturas"
-    )
-    logger.info("Archivos estaticos montados correctamente")
+@app.on_event("startup")
+def reanudar_trabajos_pdf():
+    """Reenviar al pool los PDFs que quedaron pendientes antes del reinicio"""
+    try:
+        pdf_job_service.reanudar_pendientes()
+    except Exception:
+        logger.exception("No se pudieron reanudar los trabajos de PDF pendientes")
+
+
+@app.on_event("shutdown")
+def detener_trabajos_pdf():
+    """Detener el pool de PDFs; lo no iniciado queda en cola para el próximo arranque"""
+    pdf_job_service.shutdown()
+
+
+@app.on_event("shutdown")
+def detener_cola_email():
+    """Entregar los emails pendientes antes de terminar el proceso"""
+    email_queue.stop()
+
+
+@app.on_event("shutdown")
+def guardar_ultimos_accesos():
+    """Escribir los últimos accesos acumulados antes de terminar el proceso"""
+    ultimo_acceso_tracker.stop()
+
+
+@app.on_event("shutdown")
+async def cerrar_motor_async():
+    """Cerrar las conexiones del pool async (solo si llegó a crearse)"""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+
+
+@app.on_event("shutdown")
+def vaciar_cola_logs():
+    """Escribir los logs encolados antes de terminar el proceso"""
+    detener_logging()
+
+# Archivos de capturas AL FINAL (después de los routers API): ETag, 304,
+# rangos y caché inmutable para los blobs; en S3 redirige a URLs firmadas
+app.include_router(capturas_router)
+if settings.STORAGE_BACKEND == "local":
+    logger.info(f"Directorio de capturas: {os.path.abspath(settings.CAPTURAS_DIR)}")
 else:
-    logger.warning(f"Directorio de capturas no existe: {capturas_path}")
+    logger.info(f"Capturas en bucket {settings.S3_BUCKET} ({settings.STORAGE_BACKEND})")
 
 
 # Root endpoint
@@ -1,4 +1,5 @@
 """Middleware de la aplicación"""
 from .logging_middleware import LoggingMiddleware, security_event_logger
+from .metrics_middleware import MetricsMiddleware
 
-__all__ = ["LoggingMiddleware", "security_event_logger"]
+__all__ = ["LoggingMiddleware", "MetricsMiddleware", "security_event_logger"]
@@ -2,60 +2,109 @@
 Middleware de logging para FastAPI
 Registra todas las peticiones HTTP
 """
-import time
 import logging
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+import random
+import time
+from typing import Iterable, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.settings import settings
 
 logger = logging.getLogger("http")
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware para registrar todas las peticiones HTTP"""
-    
-    async def dispatch(self, request: Request, call_next):
-        # Información de la petición
-        start_time = time.time()
-        client_ip = request.client.host if request.client else "unknown"
-        method = request.method
-        path = request.url.path
-        
-        # Obtener usuario si está autenticado
-        user_info = "anonymous"
-        if hasattr(request.state, "user"):
-            user = request.state.user
-            user_info = f"{user.correo} ({user.rol})"
-        
-        # Log de petición entrante
-        logger.info(f"-> {method} {path} from {client_ip} [{user_info}]")
-        
-        # Procesar petición
+class LoggingMiddleware:
+    """
+    Middleware ASGI para registrar las peticiones HTTP
+
+    - Una línea por petición, al terminar de enviar la respuesta (incluye
+      el streaming de exportaciones, que pasa sin buffer intermedio)
+    - Rutas excluidas (LOG_HTTP_EXCLUDE: health check, capturas) no se
+      registran ni se miden
+    - Muestreo de las peticiones exitosas (LOG_HTTP_SAMPLE_RATE); errores
+      y peticiones lentas (LOG_HTTP_SLOW_MS) se registran siempre
+    - Formato diferido (%-args) y campos estructurados en el record:
+      http_method, http_path, http_status, http_client, duracion_ms, ttfb_ms
+    - Header X-Process-Time con el tiempo hasta el inicio de la respuesta
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        excluir: Optional[Iterable[str]] = None,
+        muestreo: Optional[float] = None,
+        lento_ms: Optional[float] = None
+    ):
+        self.app = app
+        self.excluir = tuple(settings.log_http_excluidos if excluir is None else excluir)
+        self.muestreo = settings.LOG_HTTP_SAMPLE_RATE if muestreo is None else muestreo
+        self.lento_ms = settings.LOG_HTTP_SLOW_MS if lento_ms is None else lento_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.excluir):
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        codigo = 500
+        ttfb_ms = None
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("-> %s %s from %s", scope["method"], scope["path"], _cliente(scope))
+
+        async def send_medido(message: Message) -> None:
+            nonlocal codigo, ttfb_ms
+            if message["type"] == "http.response.start":
+                codigo = message["status"]
+                ttfb_ms = (time.perf_counter() - inicio) * 1000
+                MutableHeaders(scope=message).append("X-Process-Time", f"{ttfb_ms:.2f}ms")
+            await send(message)
+
         try:
-            response: Response = await call_next(request)
-            
-            # Calcular tiempo de respuesta
-            process_time = (time.time() - start_time) * 1000  # en ms
-            
-            # Log de respuesta
-            status_code = response.status_code
-            if status_code >= 500:
-                logger.error(f"<- {status_code} {method} {path} ({process_time:.2f}ms)")
-            elif status_code >= 400:
-                logger.warning(f"<- {status_code} {method} {path} ({process_time:.2f}ms)")
-            else:
-                logger.info(f"<- {status_code} {method} {path} ({process_time:.2f}ms)")
-            
-            # Agregar header con tiempo de procesamiento
-            response.headers["X-Process-Time"] = f"{process_time:.2f}ms"
-            
-            return response
-            
-        except Exception as e:
-            process_time = (time.time() - start_time) * 1000
-            logger.exception(f"X ERROR {method} {path} ({process_time:.2f}ms): {str(e)}")
+            await self.app(scope, receive, send_medido)
+        except Exception:
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            logger.exception(
+                "X ERROR %s %s (%.2fms)", scope["method"], scope["path"], duracion_ms,
+                extra=_campos(scope, 500, duracion_ms, ttfb_ms)
+            )
             raise
 
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        if codigo >= 500:
+            nivel = logging.ERROR
+        elif codigo >= 400 or duracion_ms >= self.lento_ms:
+            nivel = logging.WARNING
+        elif self.muestreo < 1.0 and random.random() >= self.muestreo:
+            return
+        else:
+            nivel = logging.INFO
+
+        if logger.isEnabledFor(nivel):
+            logger.log(
+                nivel, "<- %s %s %s (%.2fms)", codigo, scope["method"], scope["path"], duracion_ms,
+                extra=_campos(scope, codigo, duracion_ms, ttfb_ms)
+            )
+
+
+def _cliente(scope: Scope) -> str:
+    cliente = scope.get("client")
+    return cliente[0] if cliente else "unknown"
+
+
+def _campos(scope: Scope, codigo: int, duracion_ms: float, ttfb_ms: Optional[float]) -> dict:
+    """Campos estructurados del record (los usa el formato JSON de los logs)"""
+    return {
+        "http_method": scope["method"],
+        "http_path": scope["path"],
+        "http_status": codigo,
+        "http_client": _cliente(scope),
+        "duracion_ms": round(duracion_ms, 2),
+        "ttfb_ms": round(ttfb_ms, 2) if ttfb_ms is not None else None,
+    }
+
 
 class SecurityEventLogger:
     """Logger especializado para eventos de seguridad"""
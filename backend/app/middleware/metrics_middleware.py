@@ -0,0 +1,46 @@
+"""
+Middleware de métricas HTTP
+Latencia por plantilla de ruta y consultas SQL de cada petición
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.metrics import metricas, iniciar_peticion, terminar_peticion, plantilla_ruta
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que alimenta los histogramas de /api/metrics
+
+    La duración incluye el envío completo del cuerpo (exportaciones en
+    streaming). La ruta se toma de la plantilla resuelta por el router,
+    así /api/inspecciones/1 y /api/inspecciones/2 suman en la misma serie.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estadisticas, token = iniciar_peticion(scope)
+        codigo = 500
+        inicio = time.perf_counter()
+
+        async def send_con_codigo(message: Message) -> None:
+            nonlocal codigo
+            if message["type"] == "http.response.start":
+                codigo = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_codigo)
+        finally:
+            metricas.registrar_peticion(
+                scope["method"], plantilla_ruta(scope), codigo,
+                time.perf_counter() - inicio, estadisticas
+            )
+            terminar_peticion(token)
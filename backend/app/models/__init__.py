@@ -1,8 +1,8 @@
 """Modelos SQLAlchemy para el sistema de inspecciones"""
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy import (
-    BigInteger, String, Text, DECIMAL, DateTime, Enum, 
-    ForeignKey, Index, Integer, Boolean
+    BigInteger, String, Text, DECIMAL, DateTime, Date, Enum, 
+    ForeignKey, Index, Integer, Boolean, JSON
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional, List
@@ -204,3 +204,108 @@ class Reporte(Base):
 
 # Índice para mejorar búsquedas por inspección
 Index('ix_reportes_inspeccion', Reporte.id_inspeccion)
+
+
+class EstadisticaDiaria(Base):
+    """
+    Tabla estadisticas_diarias - conteo diario pre-agregado de inspecciones
+    
+    Se mantiene de forma incremental desde InspeccionRepository (alta, cambio
+    y eliminación) y se puede reconstruir con scripts/rebuild_estadisticas.py.
+    """
+    __tablename__ = "estadisticas_diarias"
+    
+    fecha: Mapped[date] = mapped_column(Date, primary_key=True)
+    id_planta: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id_navieras: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id_inspector: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    estado: Mapped[str] = mapped_column(
+        Enum('pending', 'approved', 'rejected', name='inspeccion_estado_enum'),
+        primary_key=True
+    )
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class Notificacion(Base):
+    """
+    Tabla notificaciones - bandeja de notificaciones de la aplicación
+    
+    Cada fila va dirigida a un usuario (id_usuario) o a todos los usuarios
+    de un rol (rol). Los índices por destinatario y fecha permiten leer la
+    página más reciente sin recorrer la tabla.
+    """
+    __tablename__ = "notificaciones"
+    
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    id_usuario: Mapped[Optional[int]] = mapped_column(
+        BigInteger,
+        ForeignKey("usuarios.id_usuario", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=True
+    )
+    rol: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    evento: Mapped[Optional[str]] = mapped_column(String(60), nullable=True)
+    titulo: Mapped[str] = mapped_column(String(200), nullable=False)
+    mensaje: Mapped[str] = mapped_column(Text, nullable=False)
+    link: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    payload: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    leida: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    creado_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+
+
+Index('ix_notificaciones_usuario_fecha', Notificacion.id_usuario, Notificacion.creado_en)
+Index('ix_notificaciones_rol_fecha', Notificacion.rol, Notificacion.creado_en)
+
+
+class TrabajoPDF(Base):
+    """
+    Tabla trabajos_pdf - generación de PDFs en segundo plano
+    
+    Guarda el estado de cada trabajo para poder consultarlo desde cualquier
+    worker y reanudar los pendientes si el proceso se reinicia.
+    """
+    __tablename__ = "trabajos_pdf"
+    
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    id_inspeccion: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("inspecciones.id_inspeccion", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=False
+    )
+    id_usuario: Mapped[Optional[int]] = mapped_column(
+        BigInteger,
+        ForeignKey("usuarios.id_usuario", onupdate="CASCADE", ondelete="SET NULL"),
+        nullable=True
+    )
+    estado: Mapped[str] = mapped_column(
+        Enum('queued', 'running', 'done', 'failed', name='trabajo_pdf_estado_enum'),
+        nullable=False,
+        default='queued'
+    )
+    id_reporte: Mapped[Optional[int]] = mapped_column(
+        BigInteger,
+        ForeignKey("reportes.id", onupdate="CASCADE", ondelete="SET NULL"),
+        nullable=True
+    )
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    creado_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    iniciado_en: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    terminado_en: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+Index('ix_trabajos_pdf_estado_fecha', TrabajoPDF.estado, TrabajoPDF.creado_en)
+
+
+class BlobEvidencia(Base):
+    """
+    Tabla blobs - archivos de evidencia direccionados por contenido
+    
+    Cada archivo se guarda una sola vez en capturas/blobs/ab/cd/<sha256>;
+    referencias cuenta las filas de fotos_inspeccion que apuntan a él.
+    """
+    __tablename__ = "blobs"
+    
+    hash_hex: Mapped[str] = mapped_column(String(64), primary_key=True)
+    ruta: Mapped[str] = mapped_column(String(255), nullable=False)
+    tamano: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    referencias: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    creado_en: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
@@ -1,9 +1,18 @@
 from .plantas import planta_repository
 from .navieras import naviera_repository
 from .usuarios import usuario_repository
-from .inspecciones import inspeccion_repository, foto_repository
+from .inspecciones import (
+    inspeccion_repository,
+    foto_repository,
+    inspeccion_repository_async,
+    foto_repository_async,
+)
 from .preferencias import preferencia_repository
-from .reportes import reporte_repository
+from .reportes import reporte_repository, reporte_repository_async
+from .estadisticas import estadisticas_repository
+from .notificaciones import notificacion_repository
+from .trabajos_pdf import trabajo_pdf_repository
+from .blobs import blob_repository
 
 __all__ = [
     "planta_repository",
@@ -11,6 +20,13 @@ __all__ = [
     "usuario_repository",
     "inspeccion_repository",
     "foto_repository",
+    "inspeccion_repository_async",
+    "foto_repository_async",
     "preferencia_repository",
     "reporte_repository",
+    "reporte_repository_async",
+    "estadisticas_repository",
+    "notificacion_repository",
+    "trabajo_pdf_repository",
+    "blob_repository",
 ]
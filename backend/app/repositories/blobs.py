@@ -0,0 +1,89 @@
+"""Repositorio para el almacén de evidencias por contenido"""
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Optional
+from ..models import BlobEvidencia
+
+
+class BlobRepository:
+    """Conteo de referencias de la tabla blobs"""
+
+    def get_by_hash(self, db: Session, hash_hex: str) -> Optional[BlobEvidencia]:
+        """Obtener blob por hash (clave primaria)"""
+        return db.get(BlobEvidencia, hash_hex)
+
+    def bloquear(self, db: Session, hash_hex: str) -> Optional[BlobEvidencia]:
+        """
+        Lee el blob con SELECT ... FOR UPDATE
+
+        Si no existe, MySQL bloquea el hueco: un upsert concurrente del mismo
+        hash espera hasta el commit del llamador.
+        """
+        return (
+            db.query(BlobEvidencia)
+            .filter(BlobEvidencia.hash_hex == hash_hex)
+            .with_for_update()
+            .populate_existing()
+            .first()
+        )
+
+    def incrementar(self, db: Session, hash_hex: str, ruta: str, tamano: int) -> BlobEvidencia:
+        """
+        Suma una referencia al blob, creándolo si no existe (upsert)
+
+        No hace commit: va en la misma transacción que la fila de la foto.
+
+        Returns:
+            BlobEvidencia: La fila tras el upsert. Con referencias == 1 la
+                creó este llamador (ruta es la recibida y el archivo puede no
+                estar almacenado).
+        """
+        tabla = BlobEvidencia.__table__
+        valores = {"hash_hex": hash_hex, "ruta": ruta, "tamano": tamano, "referencias": 1}
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            stmt = mysql_insert(tabla).values(**valores)
+            stmt = stmt.on_duplicate_key_update(referencias=tabla.c.referencias + 1)
+        elif dialect == "sqlite":
+            stmt = sqlite_insert(tabla).values(**valores)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[tabla.c.hash_hex],
+                set_={"referencias": tabla.c.referencias + 1}
+            )
+        else:
+            actualizado = db.execute(
+                tabla.update()
+                .where(tabla.c.hash_hex == hash_hex)
+                .values(referencias=tabla.c.referencias + 1)
+            )
+            if actualizado.rowcount:
+                return db.get(BlobEvidencia, hash_hex, populate_existing=True)
+            stmt = tabla.insert().values(**valores)
+        db.execute(stmt)
+        return db.get(BlobEvidencia, hash_hex, populate_existing=True)
+
+    def decrementar(self, db: Session, hash_hex: str) -> Optional[str]:
+        """
+        Resta una referencia y elimina la fila al llegar a cero (sin commit)
+
+        Returns:
+            str: Ruta del blob si quedó sin referencias (el llamador borra el
+                archivo tras el commit), None si sigue en uso o no existe
+        """
+        tabla = BlobEvidencia.__table__
+        db.execute(
+            tabla.update()
+            .where(tabla.c.hash_hex == hash_hex)
+            .values(referencias=tabla.c.referencias - 1)
+        )
+        ruta = db.execute(
+            tabla.select().with_only_columns(tabla.c.ruta)
+            .where(tabla.c.hash_hex == hash_hex, tabla.c.referencias <= 0)
+        ).scalar()
+        if ruta is not None:
+            db.execute(tabla.delete().where(tabla.c.hash_hex == hash_hex, tabla.c.referencias <= 0))
+        return ruta
+
+
+blob_repository = BlobRepository()
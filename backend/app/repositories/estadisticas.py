@@ -0,0 +1,160 @@
+"""Repositorio para estadísticas del dashboard (rollup diario)"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import List, Optional, Tuple
+from datetime import date
+from ..models import Inspeccion, Usuario, Planta, Naviera, EstadisticaDiaria
+
+
+class EstadisticasRepository:
+    """Mantenimiento y consultas de la tabla estadisticas_diarias"""
+
+    def clave_de(self, inspeccion: Inspeccion) -> dict:
+        """Clave de la fila diaria a la que contribuye una inspección"""
+        return {
+            "fecha": inspeccion.inspeccionado_en.date(),
+            "id_planta": inspeccion.id_planta,
+            "id_navieras": inspeccion.id_navieras,
+            "id_inspector": inspeccion.id_inspector,
+            "estado": inspeccion.estado,
+        }
+
+    def ajustar(self, db: Session, clave: dict, delta: int) -> None:
+        """
+        Suma delta al conteo de la fila diaria (upsert en una sentencia)
+
+        No hace commit: se ejecuta dentro de la transacción de la operación
+        sobre la inspección para que el rollup no quede desfasado.
+        """
+        tabla = EstadisticaDiaria.__table__
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            stmt = mysql_insert(tabla).values(**clave, total=delta)
+            stmt = stmt.on_duplicate_key_update(total=tabla.c.total + delta)
+        elif dialect == "sqlite":
+            stmt = sqlite_insert(tabla).values(**clave, total=delta)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[c.name for c in tabla.primary_key.columns],
+                set_={"total": tabla.c.total + delta}
+            )
+        else:
+            actualizado = db.execute(
+                tabla.update()
+                .where(*[tabla.c[k] == v for k, v in clave.items()])
+                .values(total=tabla.c.total + delta)
+            )
+            if actualizado.rowcount:
+                return
+            stmt = tabla.insert().values(**clave, total=delta)
+        db.execute(stmt)
+
+    def reconstruir(self, db: Session) -> int:
+        """
+        Reconstruye la tabla completa desde inspecciones (backfill)
+
+        Returns:
+            int: Cantidad de filas diarias generadas
+        """
+        fecha = func.date(Inspeccion.inspeccionado_en)
+        agregado = (
+            select(
+                fecha,
+                Inspeccion.id_planta,
+                Inspeccion.id_navieras,
+                Inspeccion.id_inspector,
+                Inspeccion.estado,
+                func.count(Inspeccion.id_inspeccion)
+            )
+            .group_by(fecha, Inspeccion.id_planta, Inspeccion.id_navieras, Inspeccion.id_inspector, Inspeccion.estado)
+        )
+        db.query(EstadisticaDiaria).delete()
+        db.execute(
+            EstadisticaDiaria.__table__.insert().from_select(
+                ["fecha", "id_planta", "id_navieras", "id_inspector", "estado", "total"],
+                agregado
+            )
+        )
+        db.commit()
+        return db.query(func.count()).select_from(EstadisticaDiaria).scalar()
+
+    def get_agregado(
+        self,
+        db: Session,
+        fecha_desde: date,
+        fecha_hasta: date,
+        id_inspector: Optional[int] = None
+    ) -> List:
+        """
+        Obtener conteos agrupados por (fecha, planta, inspector) desde el rollup diario
+
+        Cada fila trae el total y el desglose por estado (agregación condicional),
+        suficiente para derivar en memoria los totales, la distribución por estado
+        y los desgloses por fecha, planta e inspector. Lee unas pocas filas por
+        día en lugar de recorrer las inspecciones del período.
+
+        Returns:
+            Filas con fecha, planta, inspector, total, pendientes, aprobadas, rechazadas
+        """
+        query = (
+            db.query(
+                EstadisticaDiaria.fecha.label('fecha'),
+                Planta.nombre.label('planta'),
+                Usuario.nombre.label('inspector'),
+                func.sum(EstadisticaDiaria.total).label('total'),
+                func.sum(case((EstadisticaDiaria.estado == 'pending', EstadisticaDiaria.total), else_=0)).label('pendientes'),
+                func.sum(case((EstadisticaDiaria.estado == 'approved', EstadisticaDiaria.total), else_=0)).label('aprobadas'),
+                func.sum(case((EstadisticaDiaria.estado == 'rejected', EstadisticaDiaria.total), else_=0)).label('rechazadas')
+            )
+            .join(Planta, Planta.id_planta == EstadisticaDiaria.id_planta)
+            .join(Usuario, Usuario.id_usuario == EstadisticaDiaria.id_inspector)
+            .filter(
+                EstadisticaDiaria.fecha >= fecha_desde,
+                EstadisticaDiaria.fecha <= fecha_hasta,
+                EstadisticaDiaria.total != 0
+            )
+        )
+
+        if id_inspector:
+            query = query.filter(EstadisticaDiaria.id_inspector == id_inspector)
+
+        return query.group_by(EstadisticaDiaria.fecha, Planta.nombre, Usuario.nombre).all()
+
+    def get_conteo_por_estado(
+        self,
+        db: Session,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+        id_planta: Optional[int] = None,
+        id_navieras: Optional[int] = None,
+        id_inspector: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        """Obtener (estado, total) desde el rollup diario con fechas inclusivas por día"""
+        query = db.query(EstadisticaDiaria.estado, func.sum(EstadisticaDiaria.total))
+
+        if fecha_desde:
+            query = query.filter(EstadisticaDiaria.fecha >= fecha_desde)
+        if fecha_hasta:
+            query = query.filter(EstadisticaDiaria.fecha <= fecha_hasta)
+        if id_planta:
+            query = query.filter(EstadisticaDiaria.id_planta == id_planta)
+        if id_navieras:
+            query = query.filter(EstadisticaDiaria.id_navieras == id_navieras)
+        if id_inspector:
+            query = query.filter(EstadisticaDiaria.id_inspector == id_inspector)
+
+        return [(estado, int(total or 0)) for estado, total in query.group_by(EstadisticaDiaria.estado).all()]
+
+    def get_totales_catalogos(self, db: Session) -> Tuple[int, int, int]:
+        """Obtener (usuarios, plantas, navieras) con subconsultas escalares en un solo SELECT"""
+        return tuple(
+            db.query(
+                select(func.count(Usuario.id_usuario)).scalar_subquery(),
+                select(func.count(Planta.id_planta)).scalar_subquery(),
+                select(func.count(Naviera.id_navieras)).scalar_subquery()
+            ).one()
+        )
+
+
+estadisticas_repository = EstadisticasRepository()
@@ -1,33 +1,32 @@
 """Repositorio para inspecciones"""
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_
-from typing import List, Optional, Tuple
+from collections import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, or_, and_, select
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime
-from ..models import Inspeccion, FotoInspeccion
+from ..models import Inspeccion, FotoInspeccion, Planta, Naviera, Usuario
+from ..utils.pagination import encode_cursor, decode_cursor
+from .estadisticas import estadisticas_repository
 
 
 class InspeccionRepository:
     """Repositorio para operaciones CRUD de inspecciones"""
     
-    def get_all(
+    ORDER_FIELDS = ("inspeccionado_en", "numero_contenedor", "estado")
+    
+    def _aplicar_filtros(
         self,
-        db: Session,
-        skip: int = 0,
-        limit: int = 100,
+        query,
         q: Optional[str] = None,
         id_planta: Optional[int] = None,
         id_navieras: Optional[int] = None,
         estado: Optional[str] = None,
         fecha_desde: Optional[datetime] = None,
         fecha_hasta: Optional[datetime] = None,
-        order_by: str = "inspeccionado_en",
-        order_dir: str = "desc",
         id_inspector: Optional[int] = None
-    ) -> Tuple[List[Inspeccion], int]:
-        """Obtener inspecciones con filtros y paginación"""
-        query = db.query(Inspeccion)
-        
-        # Filtros
+    ):
+        """Aplica los filtros comunes del listado a una query de inspecciones"""
         if q:
             query = query.filter(
                 or_(
@@ -55,6 +54,35 @@ class InspeccionRepository:
         if id_inspector:
             query = query.filter(Inspeccion.id_inspector == id_inspector)
         
+        return query
+    
+    def get_all(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        q: Optional[str] = None,
+        id_planta: Optional[int] = None,
+        id_navieras: Optional[int] = None,
+        estado: Optional[str] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        order_by: str = "inspeccionado_en",
+        order_dir: str = "desc",
+        id_inspector: Optional[int] = None
+    ) -> Tuple[List[Inspeccion], int]:
+        """Obtener inspecciones con filtros y paginación"""
+        query = self._aplicar_filtros(
+            db.query(Inspeccion),
+            q=q,
+            id_planta=id_planta,
+            id_navieras=id_navieras,
+            estado=estado,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            id_inspector=id_inspector
+        )
+        
         # Contar total
         total = query.count()
         
@@ -70,6 +98,177 @@ class InspeccionRepository:
         
         return items, total
     
+    def get_all_keyset(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        q: Optional[str] = None,
+        id_planta: Optional[int] = None,
+        id_navieras: Optional[int] = None,
+        estado: Optional[str] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        order_by: str = "inspeccionado_en",
+        order_dir: str = "desc",
+        id_inspector: Optional[int] = None,
+        modo_total: str = "exact"
+    ) -> Tuple[List[Inspeccion], Optional[str], Optional[int]]:
+        """
+        Obtener inspecciones paginadas por cursor (keyset)
+        
+        En lugar de OFFSET, cada página continúa desde la última fila de la
+        anterior usando (campo de orden, id_inspeccion), por lo que el costo
+        no crece con la profundidad de la página.
+        
+        Args:
+            cursor: Cursor opaco devuelto como next_cursor en la página anterior
+            modo_total: 'exact' (COUNT), 'estimate' (estimación del planificador) o 'none'
+        
+        Returns:
+            (items, next_cursor, total) - next_cursor es None en la última página
+        
+        Raises:
+            ValueError: Si el cursor es inválido
+        """
+        if order_by not in self.ORDER_FIELDS:
+            order_by = "inspeccionado_en"
+        
+        query = self._aplicar_filtros(
+            db.query(Inspeccion),
+            q=q,
+            id_planta=id_planta,
+            id_navieras=id_navieras,
+            estado=estado,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            id_inspector=id_inspector
+        )
+        
+        total = None
+        if modo_total == "exact":
+            total = query.count()
+        elif modo_total == "estimate":
+            total = self._estimar_total(db, query)
+        
+        order_column = getattr(Inspeccion, order_by)
+        
+        # Continuar desde la posición del cursor (desempate por ID)
+        if cursor:
+            valor, ultimo_id = decode_cursor(cursor, order_by)
+            if order_dir == "desc":
+                query = query.filter(
+                    or_(
+                        order_column < valor,
+                        and_(order_column == valor, Inspeccion.id_inspeccion < ultimo_id)
+                    )
+                )
+            else:
+                query = query.filter(
+                    or_(
+                        order_column > valor,
+                        and_(order_column == valor, Inspeccion.id_inspeccion > ultimo_id)
+                    )
+                )
+        
+        if order_dir == "desc":
+            query = query.order_by(order_column.desc(), Inspeccion.id_inspeccion.desc())
+        else:
+            query = query.order_by(order_column.asc(), Inspeccion.id_inspeccion.asc())
+        
+        # Pedir una fila extra para saber si hay página siguiente
+        items = query.limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            ultimo = items[-1]
+            next_cursor = encode_cursor(order_by, getattr(ultimo, order_by), ultimo.id_inspeccion)
+        
+        return items, next_cursor, total
+    
+    def iter_para_exportacion(
+        self,
+        db: Session,
+        q: Optional[str] = None,
+        id_planta: Optional[int] = None,
+        id_navieras: Optional[int] = None,
+        estado: Optional[str] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        order_by: str = "inspeccionado_en",
+        order_dir: str = "desc",
+        id_inspector: Optional[int] = None,
+        batch_size: int = 1000
+    ) -> Iterator:
+        """
+        Itera inspecciones proyectadas para exportación en una sola query
+        
+        Une los nombres de planta, naviera e inspector (sin fotos) y lee las
+        filas desde un cursor del servidor en lotes de batch_size, sin
+        materializar objetos ORM ni recargar el detalle de cada inspección.
+        
+        Yields:
+            Row con id_inspeccion, codigo, numero_contenedor, estado,
+            inspeccionado_en, observaciones, planta, naviera e inspector
+        """
+        query = (
+            db.query(
+                Inspeccion.id_inspeccion,
+                Inspeccion.codigo,
+                Inspeccion.numero_contenedor,
+                Inspeccion.estado,
+                Inspeccion.inspeccionado_en,
+                Inspeccion.observaciones,
+                Planta.nombre.label("planta"),
+                Naviera.nombre.label("naviera"),
+                Usuario.nombre.label("inspector")
+            )
+            .outerjoin(Planta, Planta.id_planta == Inspeccion.id_planta)
+            .outerjoin(Naviera, Naviera.id_navieras == Inspeccion.id_navieras)
+            .outerjoin(Usuario, Usuario.id_usuario == Inspeccion.id_inspector)
+        )
+        query = self._aplicar_filtros(
+            query,
+            q=q,
+            id_planta=id_planta,
+            id_navieras=id_navieras,
+            estado=estado,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            id_inspector=id_inspector
+        )
+        
+        if order_by not in self.ORDER_FIELDS:
+            order_by = "inspeccionado_en"
+        order_column = getattr(Inspeccion, order_by)
+        if order_dir == "desc":
+            query = query.order_by(order_column.desc(), Inspeccion.id_inspeccion.desc())
+        else:
+            query = query.order_by(order_column.asc(), Inspeccion.id_inspeccion.asc())
+        
+        # yield_per activa stream_results (cursor del servidor en MySQL)
+        yield from query.yield_per(batch_size)
+    
+    def _estimar_total(self, db: Session, query) -> int:
+        """
+        Estima el total de filas de una query sin ejecutar COUNT
+        
+        En MySQL usa las filas estimadas por EXPLAIN; en otros motores
+        (p.ej. SQLite en tests) recurre al COUNT exacto.
+        """
+        dialect = db.get_bind().dialect
+        if dialect.name == "mysql":
+            try:
+                compiled = query.statement.compile(dialect=dialect)
+                params = tuple(compiled.params[key] for key in (compiled.positiontup or []))
+                rows = db.connection().exec_driver_sql(f"EXPLAIN {compiled}", params).mappings().all()
+                if rows and rows[0].get("rows") is not None:
+                    return int(rows[0]["rows"])
+            except Exception:
+                pass
+        return query.count()
+    
     def get_by_id(self, db: Session, id_inspeccion: int) -> Optional[Inspeccion]:
         """Obtener inspección por ID con relaciones cargadas"""
         return (
@@ -92,15 +291,29 @@ class InspeccionRepository:
         """Crear nueva inspección"""
         inspeccion = Inspeccion(**inspeccion_data)
         db.add(inspeccion)
+        db.flush()
+        estadisticas_repository.ajustar(db, estadisticas_repository.clave_de(inspeccion), 1)
         db.commit()
         db.refresh(inspeccion)
         return inspeccion
     
     def update(self, db: Session, inspeccion: Inspeccion, update_data: dict) -> Inspeccion:
-        """Actualizar inspección existente"""
+        """
+        Actualizar inspección existente
+        
+        La fila se relee bloqueada (SELECT ... FOR UPDATE) antes de calcular
+        su clave en el rollup: dos cambios de estado simultáneos no restan
+        del mismo conteo anterior.
+        """
+        db.refresh(inspeccion, with_for_update=True)
+        clave_anterior = estadisticas_repository.clave_de(inspeccion)
         for key, value in update_data.items():
             if value is not None:
                 setattr(inspeccion, key, value)
+        clave_nueva = estadisticas_repository.clave_de(inspeccion)
+        if clave_nueva != clave_anterior:
+            estadisticas_repository.ajustar(db, clave_anterior, -1)
+            estadisticas_repository.ajustar(db, clave_nueva, 1)
         db.commit()
         db.refresh(inspeccion)
         return inspeccion
@@ -113,18 +326,79 @@ class InspeccionRepository:
         return inspeccion
     
     def delete(self, db: Session, inspeccion: Inspeccion) -> None:
-        """Eliminar inspección"""
+        """Eliminar inspección (la clave del rollup sale de la fila bloqueada, como en update)"""
+        db.refresh(inspeccion, with_for_update=True)
+        estadisticas_repository.ajustar(db, estadisticas_repository.clave_de(inspeccion), -1)
         db.delete(inspeccion)
         db.commit()
     
-    def get_conteo_por_estado(self, db: Session) -> List[Tuple[str, int]]:
-        """Obtener conteo de inspecciones por estado"""
+    def get_many_con_fotos(self, db: Session, ids: List[int]) -> List[Inspeccion]:
+        """Obtener varias inspecciones con sus fotos (una query para las fotos)"""
         return (
-            db.query(Inspeccion.estado, func.count(Inspeccion.id_inspeccion))
-            .group_by(Inspeccion.estado)
+            db.query(Inspeccion)
+            .options(selectinload(Inspeccion.fotos))
+            .filter(Inspeccion.id_inspeccion.in_(ids))
             .all()
         )
-
+    
+    def get_ids_anteriores_a(self, db: Session, fecha_limite: datetime, limite: int) -> List[int]:
+        """IDs de las inspecciones realizadas antes de fecha_limite (para retención)"""
+        filas = (
+            db.query(Inspeccion.id_inspeccion)
+            .filter(Inspeccion.inspeccionado_en < fecha_limite)
+            .order_by(Inspeccion.inspeccionado_en, Inspeccion.id_inspeccion)
+            .limit(limite)
+            .all()
+        )
+        return [fila[0] for fila in filas]
+    
+    def delete_many(self, db: Session, inspecciones: List[Inspeccion]) -> None:
+        """Eliminar varias inspecciones en una sola transacción"""
+        # Un ajuste del rollup por fila diaria afectada, no por inspección
+        deltas = Counter(
+            tuple(estadisticas_repository.clave_de(inspeccion).items()) for inspeccion in inspecciones
+        )
+        for clave, cantidad in deltas.items():
+            estadisticas_repository.ajustar(db, dict(clave), -cantidad)
+        for inspeccion in inspecciones:
+            db.delete(inspeccion)
+        db.commit()
+    
+    def get_conteo_por_estado(self, db: Session, **filtros) -> List[Tuple[str, int]]:
+        """
+        Obtener conteo de inspecciones por estado
+        
+        Acepta los mismos filtros que get_all (q, id_planta, id_navieras, estado,
+        fecha_desde, fecha_hasta, id_inspector) y resuelve todo en un GROUP BY.
+        """
+        query = self._aplicar_filtros(
+            db.query(Inspeccion.estado, func.count(Inspeccion.id_inspeccion)),
+            **filtros
+        )
+        return query.group_by(Inspeccion.estado).all()
+    
+    def iter_manifiesto(self, db: Session, batch_size: int = 1000, **filtros) -> Iterator:
+        """
+        Itera los datos que firman un reporte: una fila por foto de cada inspección
+        
+        Une las inspecciones filtradas con el hash_hex de sus fotos en una sola
+        query ordenada por id_inspeccion, apta para agrupar en streaming. Es un
+        LEFT JOIN: id_foto es NULL cuando la inspección no tiene fotos.
+        """
+        query = self._aplicar_filtros(
+            db.query(
+                Inspeccion.id_inspeccion,
+                Inspeccion.codigo,
+                Inspeccion.numero_contenedor,
+                Inspeccion.estado,
+                Inspeccion.inspeccionado_en,
+                FotoInspeccion.id_foto,
+                FotoInspeccion.hash_hex
+            ).outerjoin(FotoInspeccion, FotoInspeccion.id_inspeccion == Inspeccion.id_inspeccion),
+            **filtros
+        )
+        query = query.order_by(Inspeccion.id_inspeccion.asc(), FotoInspeccion.hash_hex.asc())
+        yield from query.yield_per(batch_size)
 
 class FotoInspeccionRepository:
     """Repositorio para fotos de inspección"""
@@ -137,6 +411,24 @@ class FotoInspeccionRepository:
         db.refresh(foto)
         return foto
     
+    def create_many(self, db: Session, fotos_data: List[dict]) -> List[FotoInspeccion]:
+        """
+        Crear varias fotos en una sola transacción
+        
+        El flush agrupa los INSERT (con RETURNING de los IDs donde el dialecto
+        lo soporta) y el commit no expira las fotos, así que devolverlas no
+        dispara un SELECT de refresco por cada una.
+        """
+        fotos = [FotoInspeccion(**data) for data in fotos_data]
+        db.add_all(fotos)
+        db.flush()
+        expire_on_commit, db.expire_on_commit = db.expire_on_commit, False
+        try:
+            db.commit()
+        finally:
+            db.expire_on_commit = expire_on_commit
+        return fotos
+    
     def get_by_id(self, db: Session, id_foto: int) -> Optional[FotoInspeccion]:
         """Obtener foto por ID"""
         return db.query(FotoInspeccion).filter(FotoInspeccion.id_foto == id_foto).first()
@@ -156,5 +448,136 @@ class FotoInspeccionRepository:
         db.commit()
 
 
+class AsyncInspeccionRepository:
+    """
+    Variante async de InspeccionRepository (AsyncSession)
+    
+    Para endpoints async def. Las relaciones que se van a leer se cargan en
+    la misma query (selectinload): en async no hay carga diferida.
+    """
+    
+    _aplicar_filtros = InspeccionRepository._aplicar_filtros
+    
+    async def get_all(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        order_by: str = "inspeccionado_en",
+        order_dir: str = "desc",
+        **filtros
+    ) -> Tuple[List[Inspeccion], int]:
+        """Obtener inspecciones con filtros y paginación (mismos filtros que get_all)"""
+        query = self._aplicar_filtros(select(Inspeccion), **filtros)
+        
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        
+        order_column = getattr(Inspeccion, order_by, Inspeccion.inspeccionado_en)
+        if order_dir == "desc":
+            query = query.order_by(order_column.desc())
+        else:
+            query = query.order_by(order_column.asc())
+        
+        items = (await db.scalars(query.offset(skip).limit(limit))).all()
+        return list(items), total
+    
+    async def get_by_id(self, db: AsyncSession, id_inspeccion: int) -> Optional[Inspeccion]:
+        """Obtener inspección por ID con relaciones cargadas"""
+        return await db.scalar(
+            select(Inspeccion)
+            .options(
+                selectinload(Inspeccion.planta),
+                selectinload(Inspeccion.naviera),
+                selectinload(Inspeccion.inspector),
+                selectinload(Inspeccion.fotos)
+            )
+            .where(Inspeccion.id_inspeccion == id_inspeccion)
+        )
+    
+    async def get_by_codigo(self, db: AsyncSession, codigo: str) -> Optional[Inspeccion]:
+        """Obtener inspección por código"""
+        return await db.scalar(select(Inspeccion).where(Inspeccion.codigo == codigo))
+    
+    async def create(self, db: AsyncSession, inspeccion_data: dict) -> Inspeccion:
+        """Crear nueva inspección"""
+        inspeccion = Inspeccion(**inspeccion_data)
+        db.add(inspeccion)
+        await db.flush()
+        clave = estadisticas_repository.clave_de(inspeccion)
+        await db.run_sync(lambda s: estadisticas_repository.ajustar(s, clave, 1))
+        await db.commit()
+        await db.refresh(inspeccion)
+        return inspeccion
+    
+    async def update(self, db: AsyncSession, inspeccion: Inspeccion, update_data: dict) -> Inspeccion:
+        """Actualizar inspección existente (relee la fila bloqueada, como update)"""
+        await db.refresh(inspeccion, with_for_update=True)
+        clave_anterior = estadisticas_repository.clave_de(inspeccion)
+        for key, value in update_data.items():
+            if value is not None:
+                setattr(inspeccion, key, value)
+        clave_nueva = estadisticas_repository.clave_de(inspeccion)
+        if clave_nueva != clave_anterior:
+            def ajustar(s: Session) -> None:
+                estadisticas_repository.ajustar(s, clave_anterior, -1)
+                estadisticas_repository.ajustar(s, clave_nueva, 1)
+            await db.run_sync(ajustar)
+        await db.commit()
+        await db.refresh(inspeccion)
+        return inspeccion
+    
+    async def update_firma_path(self, db: AsyncSession, inspeccion: Inspeccion, firma_path: str) -> Inspeccion:
+        """Actualizar ruta de firma"""
+        inspeccion.firma_path = firma_path
+        await db.commit()
+        await db.refresh(inspeccion)
+        return inspeccion
+    
+    async def delete(self, db: AsyncSession, inspeccion: Inspeccion) -> None:
+        """Eliminar inspección (relee la fila bloqueada, como update)"""
+        await db.refresh(inspeccion, with_for_update=True)
+        clave = estadisticas_repository.clave_de(inspeccion)
+        await db.run_sync(lambda s: estadisticas_repository.ajustar(s, clave, -1))
+        await db.delete(inspeccion)
+        await db.commit()
+
+
+class AsyncFotoInspeccionRepository:
+    """Variante async de FotoInspeccionRepository (AsyncSession)"""
+    
+    async def create_many(self, db: AsyncSession, fotos_data: List[dict]) -> List[FotoInspeccion]:
+        """
+        Crear varias fotos en una sola transacción
+        
+        Como create_many: un flush para todos los INSERT y, con
+        expire_on_commit=False en AsyncSessionLocal, sin SELECT de refresco.
+        """
+        fotos = [FotoInspeccion(**data) for data in fotos_data]
+        db.add_all(fotos)
+        await db.flush()
+        await db.commit()
+        return fotos
+    
+    async def get_by_id(self, db: AsyncSession, id_foto: int) -> Optional[FotoInspeccion]:
+        """Obtener foto por ID"""
+        return await db.get(FotoInspeccion, id_foto)
+    
+    async def get_by_inspeccion(self, db: AsyncSession, id_inspeccion: int) -> List[FotoInspeccion]:
+        """Obtener fotos de una inspección"""
+        fotos = await db.scalars(
+            select(FotoInspeccion)
+            .where(FotoInspeccion.id_inspeccion == id_inspeccion)
+            .order_by(FotoInspeccion.orden, FotoInspeccion.tomada_en)
+        )
+        return list(fotos.all())
+    
+    async def delete(self, db: AsyncSession, foto: FotoInspeccion) -> None:
+        """Eliminar foto"""
+        await db.delete(foto)
+        await db.commit()
+
+
 inspeccion_repository = InspeccionRepository()
 foto_repository = FotoInspeccionRepository()
+inspeccion_repository_async = AsyncInspeccionRepository()
+foto_repository_async = AsyncFotoInspeccionRepository()
@@ -0,0 +1,69 @@
+"""Repositorio para notificaciones"""
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_
+from typing import List, Optional, Tuple
+from datetime import datetime
+from ..models import Notificacion
+
+
+class NotificacionRepository:
+    """Repositorio para la bandeja de notificaciones"""
+
+    def create_many(self, db: Session, notificaciones_data: List[dict]) -> List[Notificacion]:
+        """Crear varias notificaciones en una sola transacción"""
+        notificaciones = [Notificacion(**data) for data in notificaciones_data]
+        db.add_all(notificaciones)
+        db.commit()
+        return notificaciones
+
+    def get_by_id(self, db: Session, id_notificacion: str) -> Optional[Notificacion]:
+        """Obtener notificación por ID"""
+        return db.query(Notificacion).filter(Notificacion.id == id_notificacion).first()
+
+    def get_pagina_para_usuario(
+        self,
+        db: Session,
+        id_usuario: int,
+        roles: List[str],
+        limit: int = 50,
+        antes_de: Optional[Tuple[datetime, str]] = None
+    ) -> List[Notificacion]:
+        """
+        Obtener la página más reciente de notificaciones de un usuario (propias y de sus roles)
+
+        Se lanza una consulta por destinatario (usuario y roles), cada una resuelta
+        sobre su índice (destinatario, creado_en) con LIMIT, y se mezclan en memoria.
+        Así el costo depende del tamaño de página y no del total de notificaciones.
+
+        Args:
+            antes_de: (creado_en, id) de la última fila de la página anterior
+        """
+        condiciones = [Notificacion.id_usuario == id_usuario]
+        condiciones.extend(Notificacion.rol == rol for rol in roles)
+
+        filas = []
+        for condicion in condiciones:
+            query = db.query(Notificacion).filter(condicion)
+            if antes_de:
+                creado_en, id_notificacion = antes_de
+                query = query.filter(
+                    or_(
+                        Notificacion.creado_en < creado_en,
+                        and_(Notificacion.creado_en == creado_en, Notificacion.id < id_notificacion)
+                    )
+                )
+            filas.extend(
+                query.order_by(Notificacion.creado_en.desc(), Notificacion.id.desc()).limit(limit).all()
+            )
+
+        filas.sort(key=lambda n: (n.creado_en, n.id), reverse=True)
+        return filas[:limit]
+
+    def marcar_leida(self, db: Session, notificacion: Notificacion) -> Notificacion:
+        """Marcar una notificación como leída (actualiza solo esa fila)"""
+        notificacion.leida = True
+        db.commit()
+        return notificacion
+
+
+notificacion_repository = NotificacionRepository()
@@ -1,4 +1,6 @@
 """Repositorio para reportes PDF"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..models import Reporte
@@ -46,4 +48,39 @@ class ReporteRepository:
         db.commit()
 
 
+class AsyncReporteRepository:
+    """Variante async de ReporteRepository (AsyncSession)"""
+    
+    async def create(self, db: AsyncSession, reporte_data: dict) -> Reporte:
+        """Crear nuevo reporte"""
+        reporte = Reporte(**reporte_data)
+        db.add(reporte)
+        await db.commit()
+        await db.refresh(reporte)
+        return reporte
+    
+    async def get_by_id(self, db: AsyncSession, id_reporte: int) -> Optional[Reporte]:
+        """Obtener reporte por ID"""
+        return await db.get(Reporte, id_reporte)
+    
+    async def get_by_uuid(self, db: AsyncSession, uuid_reporte: str) -> Optional[Reporte]:
+        """Obtener reporte por UUID"""
+        return await db.scalar(select(Reporte).where(Reporte.uuid_reporte == uuid_reporte))
+    
+    async def get_by_inspeccion(self, db: AsyncSession, id_inspeccion: int) -> List[Reporte]:
+        """Obtener todos los reportes de una inspección"""
+        reportes = await db.scalars(
+            select(Reporte)
+            .where(Reporte.id_inspeccion == id_inspeccion)
+            .order_by(Reporte.creado_en.desc())
+        )
+        return list(reportes.all())
+    
+    async def delete(self, db: AsyncSession, reporte: Reporte) -> None:
+        """Eliminar reporte"""
+        await db.delete(reporte)
+        await db.commit()
+
+
 reporte_repository = ReporteRepository()
+reporte_repository_async = AsyncReporteRepository()
@@ -0,0 +1,78 @@
+"""Repositorio para trabajos de generación de PDF"""
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+from ..models import TrabajoPDF
+
+
+class TrabajoPDFRepository:
+    """Repositorio para el estado de los trabajos de PDF en segundo plano"""
+    
+    def create(self, db: Session, trabajo_data: dict) -> TrabajoPDF:
+        """Crear trabajo en estado 'queued'"""
+        trabajo = TrabajoPDF(**trabajo_data)
+        db.add(trabajo)
+        db.commit()
+        db.refresh(trabajo)
+        return trabajo
+    
+    def get_by_id(self, db: Session, id_trabajo: str) -> Optional[TrabajoPDF]:
+        """Obtener trabajo por ID"""
+        return db.query(TrabajoPDF).filter(TrabajoPDF.id == id_trabajo).first()
+    
+    def get_en_cola(self, db: Session) -> List[TrabajoPDF]:
+        """Trabajos en cola, más antiguos primero"""
+        return (
+            db.query(TrabajoPDF)
+            .filter(TrabajoPDF.estado == 'queued')
+            .order_by(TrabajoPDF.creado_en)
+            .all()
+        )
+    
+    def reclamar(self, db: Session, id_trabajo: str) -> bool:
+        """
+        Pasa el trabajo de 'queued' a 'running' en una sola sentencia
+        
+        Returns:
+            bool: True si este llamador lo reclamó; False si otro proceso ya
+            lo tomó o el trabajo no estaba en cola
+        """
+        reclamados = (
+            db.query(TrabajoPDF)
+            .filter(TrabajoPDF.id == id_trabajo, TrabajoPDF.estado == 'queued')
+            .update({"estado": 'running', "iniciado_en": datetime.now()}, synchronize_session=False)
+        )
+        db.commit()
+        return reclamados == 1
+    
+    def liberar_vencidos(self, db: Session, limite: datetime) -> int:
+        """Devuelve a la cola los trabajos 'running' iniciados antes de limite"""
+        liberados = (
+            db.query(TrabajoPDF)
+            .filter(
+                TrabajoPDF.estado == 'running',
+                or_(TrabajoPDF.iniciado_en.is_(None), TrabajoPDF.iniciado_en < limite)
+            )
+            .update({"estado": 'queued'}, synchronize_session=False)
+        )
+        db.commit()
+        return liberados
+    
+    def marcar_terminado(self, db: Session, trabajo: TrabajoPDF, id_reporte: int) -> TrabajoPDF:
+        trabajo.estado = 'done'
+        trabajo.id_reporte = id_reporte
+        trabajo.error = None
+        trabajo.terminado_en = datetime.now()
+        db.commit()
+        return trabajo
+    
+    def marcar_fallido(self, db: Session, trabajo: TrabajoPDF, error: str) -> TrabajoPDF:
+        trabajo.estado = 'failed'
+        trabajo.error = error
+        trabajo.terminado_en = datetime.now()
+        db.commit()
+        return trabajo
+
+
+trabajo_pdf_repository = TrabajoPDFRepository()
@@ -8,6 +8,8 @@ from .auth import router as auth_router
 from .notifications import router as notifications_router
 from .estadisticas import router as estadisticas_router
 from .reportes_export import router as reportes_export_router
+from .capturas import router as capturas_router
+from .metricas import router as metricas_router
 
 __all__ = [
     "plantas_router",
@@ -19,5 +21,7 @@ __all__ = [
     "auth_router",
     "notifications_router",
     "estadisticas_router",
-    "reportes_export_router"
+    "reportes_export_router",
+    "capturas_router",
+    "metricas_router"
 ]
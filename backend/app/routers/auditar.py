@@ -4,8 +4,6 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from io import BytesIO
 from datetime import datetime
-from pathlib import Path
-import os
 
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.pagesizes import letter
@@ -14,7 +12,7 @@ from reportlab.lib.enums import TA_CENTER
 from reportlab.lib import colors
 
 from ..core import get_db
-from ..core.settings import settings
+from ..core.storage import storage, clave_de_ruta
 from ..models import Usuario
 from ..repositories.reportes import reporte_repository
 from ..repositories.inspecciones import inspeccion_repository, foto_repository
@@ -125,19 +123,15 @@ def descargar_cadena_custodia(
     # Tabla de evidencias - encabezado
     ev_rows = [["ID", "Ruta", "SHA-256", "Tamaño", "Fecha", "Creado por"]]
 
-    capturas_base = Path(os.path.abspath(settings.CAPTURAS_DIR))
     for foto in fotos:
-        # Resolver path absoluto
+        # Clave en el almacenamiento (local o S3)
         rel = foto.foto_path.replace("\\", "/")
-        if rel.startswith("/capturas/"):
-            rel_clean = rel[len("/capturas/"):]
-            abs_path = capturas_base / rel_clean
-        else:
-            abs_path = capturas_base / rel
+        clave = clave_de_ruta(rel)
         size_str = ""
         try:
-            if abs_path.exists():
-                size_str = f"{abs_path.stat().st_size} B"
+            tamano = storage.tamano(clave)
+            if tamano is not None:
+                size_str = f"{tamano} B"
         except Exception:
             size_str = ""
 
@@ -145,8 +139,7 @@ def descargar_cadena_custodia(
         hash_hex = foto.hash_hex or ""
         if not hash_hex:
             try:
-                with open(abs_path, 'rb') as f:
-                    hash_hex = calculate_file_hash(f.read())
+                hash_hex = calculate_file_hash(storage.leer_bytes(clave))
             except Exception:
                 hash_hex = ""
 
@@ -196,14 +189,12 @@ def descargar_cadena_custodia(
     if inspeccion.estado == 'approved':
         # Leer metadatos de firma de revisor si existen
         firma_meta = None
-        firmas_dir = Path(os.path.abspath(settings.CAPTURAS_DIR)) / "firmas" / "revisiones"
-        meta_path = firmas_dir / f"inspeccion_{inspeccion.id_inspeccion}_revisor.json"
-        if meta_path.exists():
-            try:
-                import json
-                firma_meta = json.loads(meta_path.read_text(encoding='utf-8'))
-            except Exception:
-                firma_meta = None
+        meta_clave = f"firmas/revisiones/inspeccion_{inspeccion.id_inspeccion}_revisor.json"
+        try:
+            import json
+            firma_meta = json.loads(storage.leer_bytes(meta_clave).decode('utf-8'))
+        except Exception:
+            firma_meta = None
         if firma_meta:
             eventos.append(["APROBACION/FIRMA", firma_meta.get('firmado_en', ''), firma_meta.get('nombre', ''), "N/D"])
         else:
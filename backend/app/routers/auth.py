@@ -21,20 +21,23 @@ Autor: Sistema de Inspección de Contenedores
 Versión: 2.1.0
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 import logging
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from ..core.database import get_db
+from ..core.database import get_async_db
 from ..core.settings import settings
 from ..middleware import security_event_logger
+from ..services.ultimo_acceso import ultimo_acceso_tracker
+from ..services.principal_cache import principal_cache
 from ..models import Usuario, BitacoraAuditoria
 from ..schemas.auth import LoginRequest, LoginResponse, TokenData, SessionInfo, PasswordChange
 from ..utils.auth import (
-    verify_password, 
-    get_password_hash, 
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     get_current_active_user,
     get_user_permissions
@@ -56,7 +59,7 @@ limiter = Limiter(key_func=get_remote_address)
 # ==========================================
 @router.post("/login", response_model=LoginResponse)
 @limiter.limit("5/minute")  # Rate limiting: Máximo 5 intentos por minuto por IP
-async def login(request: Request, credentials: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: Request, credentials: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Iniciar sesión y obtener token JWT
     
@@ -77,7 +80,7 @@ async def login(request: Request, credentials: LoginRequest, db: Session = Depen
     Args:
         request: Objeto Request de FastAPI (para obtener IP del cliente)
         credentials: Credenciales del usuario (correo + password)
-        db: Sesión de base de datos (inyectada automáticamente)
+        db: Sesión async de base de datos (no bloquea el event loop)
         
     Returns:
         LoginResponse: Token JWT, datos del usuario y tiempo de expiración
@@ -110,7 +113,7 @@ async def login(request: Request, credentials: LoginRequest, db: Session = Depen
     client_ip = request.client.host if request.client else "unknown"
     
     # ===== PASO 1: BUSCAR USUARIO POR CORREO =====
-    usuario = db.query(Usuario).filter(Usuario.correo == credentials.correo).first()
+    usuario = await db.scalar(select(Usuario).where(Usuario.correo == credentials.correo))
     
     if not usuario:
         # Seguridad: No revelar si el usuario existe
@@ -122,7 +125,8 @@ async def login(request: Request, credentials: LoginRequest, db: Session = Depen
     
     # ===== PASO 2: VERIFICAR CONTRASEÑA =====
     # Compara password en texto plano con hash almacenado usando bcrypt
-    if not usuario.password_hash or not verify_password(credentials.password, usuario.password_hash):
+    # (en el pool de bcrypt, para no bloquear el event loop)
+    if not usuario.password_hash or not await verify_password_async(credentials.password, usuario.password_hash):
         security_event_logger.log_login_failure(credentials.correo, client_ip, "Contraseña incorrecta")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -164,7 +168,7 @@ async def login(request: Request, credentials: LoginRequest, db: Session = Depen
         detalles=f"Login exitoso desde {client_ip}"
     )
     db.add(bitacora)
-    db.commit()
+    await db.commit()
     
     # Log informativo en archivo app.log
     logger.info(f"Usuario {usuario.correo} inició sesión correctamente")
@@ -220,7 +224,8 @@ async def get_session_info(current_user: Usuario = Depends(get_current_active_us
         correo=current_user.correo,
         rol=current_user.rol,
         estado=current_user.estado,
-        ultimo_acceso=current_user.ultimo_acceso,
+        # El acceso más reciente puede estar aún en el buffer del tracker
+        ultimo_acceso=ultimo_acceso_tracker.ultimo(current_user.id_usuario) or current_user.ultimo_acceso,
         permisos=get_user_permissions(current_user.rol)  # Permisos según rol
     )
 
@@ -229,7 +234,7 @@ async def get_session_info(current_user: Usuario = Depends(get_current_active_us
 # ENDPOINT: CERRAR SESIÓN
 # ==========================================
 @router.post("/logout")
-async def logout(current_user: Usuario = Depends(get_current_active_user), db: Session = Depends(get_db)):
+async def logout(current_user: Usuario = Depends(get_current_active_user), db: AsyncSession = Depends(get_async_db)):
     """
     Cerrar sesión del usuario
     
@@ -260,7 +265,7 @@ async def logout(current_user: Usuario = Depends(get_current_active_user), db: S
         detalles="Logout desde aplicación web"
     )
     db.add(bitacora)
-    db.commit()
+    await db.commit()
     
     return {"mensaje": "Sesión cerrada exitosamente"}
 
@@ -272,7 +277,7 @@ async def logout(current_user: Usuario = Depends(get_current_active_user), db: S
 async def change_password(
     data: PasswordChange,
     current_user: Usuario = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cambiar la contraseña del usuario autenticado
@@ -304,9 +309,12 @@ async def change_password(
             "mensaje": "Contraseña actualizada exitosamente"
         }
     """
+    # El hash no está en principal_cache: se lee con la sesión async
+    usuario = await db.get(Usuario, current_user.id_usuario)
+    
     # ===== VERIFICAR CONTRASEÑA ACTUAL =====
     # Por seguridad, el usuario debe proporcionar su contraseña actual
-    if not current_user.password_hash or not verify_password(data.password_actual, current_user.password_hash):
+    if not usuario.password_hash or not await verify_password_async(data.password_actual, usuario.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Contraseña actual incorrecta"
@@ -314,7 +322,7 @@ async def change_password(
     
     # ===== ACTUALIZAR A NUEVA CONTRASEÑA =====
     # Hashear nueva contraseña antes de guardarla
-    current_user.password_hash = get_password_hash(data.password_nueva)
+    usuario.password_hash = await get_password_hash_async(data.password_nueva)
     
     # ===== REGISTRAR EN BITÁCORA =====
     # Importante para auditoría de seguridad
@@ -324,7 +332,8 @@ async def change_password(
         detalles="Cambio de contraseña exitoso"
     )
     db.add(bitacora)
-    db.commit()
+    await db.commit()
+    principal_cache.invalidate(current_user.id_usuario)
     
     return {"mensaje": "Contraseña actualizada exitosamente"}
 
@@ -0,0 +1,68 @@
+"""Router para los archivos de capturas (evidencias, derivados y firmas)"""
+import os
+import re
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse
+
+from ..core.storage import storage, validar_clave
+from ..utils.descargas import respuesta_archivo, etag_fuerte, CACHE_INMUTABLE, CACHE_REVALIDAR
+from ..utils.files import get_mime_type
+
+router = APIRouter(prefix="/capturas", tags=["Capturas"])
+
+# blobs/ab/cd/<sha256>.<ext> y sus derivados <sha256>_<tipo>.jpg
+_CLAVE_BLOB = re.compile(r"^blobs/[0-9a-f]{2}/[0-9a-f]{2}/(?P<id>[0-9a-f]{64}(?:_[a-z]+)?)\.[A-Za-z0-9]+$")
+
+
+def id_contenido(clave: str) -> Optional[str]:
+    """
+    Identificador de contenido de una clave del almacén de blobs
+
+    El nombre del archivo es el SHA-256 (más el tipo en los derivados), así
+    que sirve de ETag fuerte y la URL nunca cambia de contenido. Las demás
+    rutas (fotos anteriores al almacén, firmas) retornan None.
+    """
+    coincidencia = _CLAVE_BLOB.match(clave)
+    return coincidencia.group("id") if coincidencia else None
+
+
+@router.api_route("/{clave:path}", methods=["GET", "HEAD"])
+async def obtener_captura(clave: str, request: Request):
+    """
+    Entrega un archivo de capturas con caché HTTP
+
+    - Blobs y derivados: ETag = hash del contenido y Cache-Control immutable;
+      el navegador no vuelve a pedirlos.
+    - Resto: ETag por fecha/tamaño y revalidación (304 si no cambió).
+    - Con STORAGE_BACKEND=s3 redirige a una URL firmada del bucket, que
+      responde sus propios ETag y rangos.
+    """
+    try:
+        validar_clave(clave)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archivo no encontrado")
+
+    contenido = id_contenido(clave)
+    cache_control = CACHE_INMUTABLE if contenido else CACHE_REVALIDAR
+
+    url = await run_in_threadpool(storage.url_descarga, clave, cache_control=cache_control)
+    if url is not None:
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    try:
+        ruta = storage.ruta(clave)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archivo no encontrado")
+    if not await run_in_threadpool(os.path.isfile, ruta):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archivo no encontrado")
+    return await run_in_threadpool(
+        respuesta_archivo,
+        request,
+        ruta,
+        get_mime_type(clave),
+        etag=etag_fuerte(contenido) if contenido else None,
+        cache_control=cache_control,
+    )
@@ -3,13 +3,14 @@ Router de estadísticas y dashboard
 """
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
 
-from ..core.database import get_db
-from ..models import Inspeccion, Usuario, Planta, Naviera
+from ..core.database import get_read_db
+from ..models import Usuario
+from ..repositories.estadisticas import estadisticas_repository
 from ..schemas.estadisticas import (
     DashboardData,
     EstadisticasGeneral,
@@ -29,7 +30,7 @@ def get_dashboard_data(
     fecha_desde: Optional[str] = None,
     fecha_hasta: Optional[str] = None,
     current_user: Usuario = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Obtener datos para el dashboard
@@ -50,39 +51,59 @@ def get_dashboard_data(
         fecha_desde_dt = datetime.strptime(fecha_desde, "%Y-%m-%d")
     
     # Filtrar por rol
-    query = db.query(Inspeccion).filter(
-        Inspeccion.inspeccionado_en >= fecha_desde_dt,
-        Inspeccion.inspeccionado_en <= fecha_hasta_dt
-    )
-    
+    id_inspector = None
     if current_user.rol == 'inspector':
         # Inspector solo ve sus inspecciones
-        query = query.filter(Inspeccion.id_inspector == current_user.id_usuario)
+        id_inspector = current_user.id_usuario
     elif current_user.rol == 'supervisor':
         # Supervisor ve inspecciones de su planta
         # TODO: Agregar campo id_planta a Usuario
         pass  # Por ahora ve todas
     
+    # Una sola pasada sobre el rollup diario agrupada por (fecha, planta, inspector);
+    # el resto del dashboard se deriva en memoria a partir de estas filas
+    filas = estadisticas_repository.get_agregado(
+        db, fecha_desde_dt.date(), fecha_hasta_dt.date(), id_inspector=id_inspector
+    )
+    total_usuarios, total_plantas, total_navieras = estadisticas_repository.get_totales_catalogos(db)
+    
+    conteo_estados = {'pending': 0, 'approved': 0, 'rejected': 0}
+    conteo_fecha = defaultdict(int)
+    conteo_planta = defaultdict(int)
+    conteo_inspector = defaultdict(lambda: {'total': 0, 'pending': 0, 'approved': 0, 'rejected': 0})
+    
+    for row in filas:
+        pendientes = int(row.pendientes or 0)
+        aprobadas = int(row.aprobadas or 0)
+        rechazadas = int(row.rechazadas or 0)
+        conteo_estados['pending'] += pendientes
+        conteo_estados['approved'] += aprobadas
+        conteo_estados['rejected'] += rechazadas
+        conteo_fecha[row.fecha] += row.total
+        conteo_planta[row.planta] += row.total
+        acumulado = conteo_inspector[row.inspector]
+        acumulado['total'] += row.total
+        acumulado['pending'] += pendientes
+        acumulado['approved'] += aprobadas
+        acumulado['rejected'] += rechazadas
+    
     # 1. Estadísticas generales
-    total_inspecciones = query.count()
-    pendientes = query.filter(Inspeccion.estado == 'pending').count()
-    aprobadas = query.filter(Inspeccion.estado == 'approved').count()
-    rechazadas = query.filter(Inspeccion.estado == 'rejected').count()
+    total_inspecciones = sum(conteo_estados.values())
     
     estadisticas_generales = EstadisticasGeneral(
         total_inspecciones=total_inspecciones,
-        pendientes=pendientes,
-        aprobadas=aprobadas,
-        rechazadas=rechazadas,
-        total_usuarios=db.query(Usuario).count(),
-        total_plantas=db.query(Planta).count(),
-        total_navieras=db.query(Naviera).count()
+        pendientes=conteo_estados['pending'],
+        aprobadas=conteo_estados['approved'],
+        rechazadas=conteo_estados['rejected'],
+        total_usuarios=total_usuarios,
+        total_plantas=total_plantas,
+        total_navieras=total_navieras
     )
     
     # 2. Por estado
     por_estado = []
     for estado in ['pending', 'approved', 'rejected']:
-        cantidad = query.filter(Inspeccion.estado == estado).count()
+        cantidad = conteo_estados[estado]
         porcentaje = (cantidad / total_inspecciones * 100) if total_inspecciones > 0 else 0
         por_estado.append(InspeccionPorEstado(
             estado=estado,
@@ -91,66 +112,27 @@ def get_dashboard_data(
         ))
     
     # 3. Por fecha (últimos 30 días)
-    por_fecha_raw = db.query(
-        func.date(Inspeccion.inspeccionado_en).label('fecha'),
-        func.count(Inspeccion.id_inspeccion).label('cantidad')
-    ).filter(
-        Inspeccion.inspeccionado_en >= fecha_desde_dt,
-        Inspeccion.inspeccionado_en <= fecha_hasta_dt
-    ).group_by(
-        func.date(Inspeccion.inspeccionado_en)
-    ).all()
-    
     por_fecha = [
-        InspeccionPorFecha(fecha=row.fecha, cantidad=row.cantidad)
-        for row in por_fecha_raw
+        InspeccionPorFecha(fecha=fecha, cantidad=cantidad)
+        for fecha, cantidad in sorted(conteo_fecha.items(), key=lambda item: str(item[0]))
     ]
     
     # 4. Por planta (top 10)
-    por_planta_raw = db.query(
-        Planta.nombre.label('planta'),
-        func.count(Inspeccion.id_inspeccion).label('cantidad')
-    ).join(
-        Inspeccion, Planta.id_planta == Inspeccion.id_planta
-    ).filter(
-        Inspeccion.inspeccionado_en >= fecha_desde_dt,
-        Inspeccion.inspeccionado_en <= fecha_hasta_dt
-    ).group_by(
-        Planta.nombre
-    ).order_by(
-        func.count(Inspeccion.id_inspeccion).desc()
-    ).limit(10).all()
-    
     por_planta = [
-        InspeccionPorPlanta(planta=row.planta, cantidad=row.cantidad)
-        for row in por_planta_raw
+        InspeccionPorPlanta(planta=planta, cantidad=cantidad)
+        for planta, cantidad in sorted(conteo_planta.items(), key=lambda item: item[1], reverse=True)[:10]
     ]
     
     # 5. Por inspector
-    por_inspector_raw = db.query(
-        Usuario.nombre.label('inspector'),
-        func.count(Inspeccion.id_inspeccion).label('total'),
-        func.sum(case((Inspeccion.estado == 'pending', 1), else_=0)).label('pendientes'),
-        func.sum(case((Inspeccion.estado == 'approved', 1), else_=0)).label('aprobadas'),
-        func.sum(case((Inspeccion.estado == 'rejected', 1), else_=0)).label('rechazadas')
-    ).join(
-        Inspeccion, Usuario.id_usuario == Inspeccion.id_inspector
-    ).filter(
-        Inspeccion.inspeccionado_en >= fecha_desde_dt,
-        Inspeccion.inspeccionado_en <= fecha_hasta_dt
-    ).group_by(
-        Usuario.nombre
-    ).all()
-    
     por_inspector = [
         InspeccionPorInspector(
-            inspector=row.inspector,
-            total=row.total,
-            pendientes=row.pendientes or 0,
-            aprobadas=row.aprobadas or 0,
-            rechazadas=row.rechazadas or 0
+            inspector=inspector,
+            total=conteo['total'],
+            pendientes=conteo['pending'],
+            aprobadas=conteo['approved'],
+            rechazadas=conteo['rejected']
         )
-        for row in por_inspector_raw
+        for inspector, conteo in conteo_inspector.items()
     ]
     
     logger.info(f"Dashboard generado para {current_user.correo} ({current_user.rol})")
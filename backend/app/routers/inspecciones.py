@@ -1,13 +1,15 @@
 """Router para inspecciones"""
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union, Literal
 import io
 import csv
 from datetime import datetime
 
-from ..core import get_db
+from ..core import get_db, get_read_db, get_async_db
+from ..core.database import ReadSessionLocal
 from ..models import Usuario
 from ..schemas import (
     Inspeccion,
@@ -16,8 +18,10 @@ from ..schemas import (
     InspeccionUpdate,
     InspeccionEstadoUpdate,
     InspeccionCreated,
+    InspeccionesEliminar,
     FotoInspeccion,
     PaginatedResponse,
+    CursorPaginatedResponse,
     Message
 )
 from ..services import inspeccion_service
@@ -30,10 +34,13 @@ from ..core.settings import settings
 router = APIRouter(prefix="/inspecciones", tags=["Inspecciones"])
 
 
-@router.get("", response_model=PaginatedResponse)
+@router.get("", response_model=Union[PaginatedResponse, CursorPaginatedResponse])
 def listar_inspecciones(
     page: int = 1,
     page_size: int = 20,
+    paginacion: Literal["offset", "cursor"] = "offset",
+    cursor: Optional[str] = None,
+    total: Literal["exact", "estimate", "none"] = "exact",
     q: Optional[str] = None,
     planta: Optional[int] = None,
     naviera: Optional[int] = None,
@@ -43,7 +50,7 @@ def listar_inspecciones(
     inspector: Optional[int] = None,
     order_by: str = "inspeccionado_en",
     order_dir: str = "desc",
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
@@ -62,6 +69,9 @@ def listar_inspecciones(
     - **inspector**: Filtrar por ID de inspector (solo Admin/Supervisor)
     - **order_by**: Campo para ordenar (inspeccionado_en, numero_contenedor, estado)
     - **order_dir**: Dirección (asc/desc)
+    - **paginacion**: 'offset' (page/total_pages) o 'cursor' (keyset, latencia constante)
+    - **cursor**: Valor next_cursor de la página anterior (solo paginacion=cursor)
+    - **total**: En modo cursor: 'exact' (COUNT), 'estimate' (aproximado) o 'none' (omitido)
     """
     
     # Aplicar filtros según rol
@@ -82,7 +92,31 @@ def listar_inspecciones(
             id_inspector = inspector
     # Admin ve todo sin restricciones
     
-    items, total, total_pages = inspeccion_service.listar_inspecciones(
+    if paginacion == "cursor" or cursor:
+        items, next_cursor, total_items = inspeccion_service.listar_inspecciones_cursor(
+            db=db,
+            cursor=cursor,
+            page_size=page_size,
+            q=q,
+            id_planta=planta,
+            id_navieras=naviera,
+            estado=estado,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            order_by=order_by,
+            order_dir=order_dir,
+            id_inspector=id_inspector,
+            modo_total=total
+        )
+        return {
+            "items": items,
+            "next_cursor": next_cursor,
+            "page_size": page_size,
+            "total": total_items,
+            "total_estimado": total == "estimate"
+        }
+    
+    items, total_items, total_pages = inspeccion_service.listar_inspecciones(
         db=db,
         page=page,
         page_size=page_size,
@@ -99,7 +133,7 @@ def listar_inspecciones(
     
     return {
         "items": items,
-        "total": total,
+        "total": total_items,
         "page": page,
         "page_size": page_size,
         "total_pages": total_pages
@@ -237,11 +271,34 @@ def eliminar_inspeccion(
     return {"mensaje": f"Inspección {id_inspeccion} eliminada exitosamente"}
 
 
+@router.post("/eliminar-lote", response_model=Message)
+def eliminar_inspecciones(
+    datos: InspeccionesEliminar,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Eliminar varias inspecciones y sus archivos en una sola transacción
+    
+    - Máximo 500 IDs por petición
+    - Los IDs inexistentes se ignoran
+    """
+    # Solo admin y supervisor pueden eliminar
+    if current_user.rol not in ['admin', 'supervisor']:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permisos para eliminar inspecciones"
+        )
+    
+    eliminadas = inspeccion_service.eliminar_inspecciones(db, datos.ids)
+    return {"mensaje": f"{eliminadas} inspecciones eliminadas exitosamente"}
+
+
 @router.post("/{id_inspeccion}/fotos", response_model=List[FotoInspeccion])
 async def subir_fotos(
     id_inspeccion: int,
     archivos: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
@@ -249,10 +306,11 @@ async def subir_fotos(
     
     - Soporta múltiples archivos en una sola petición
     - Formatos: JPG, JPEG, PNG
-    - Se guardan en capturas/inspecciones/{id_inspeccion}/
+    - Tamaño máximo por archivo: MAX_FILE_SIZE (413 si se supera)
+    - Se guardan en capturas/inspecciones/{fecha}/{id_inspeccion}/
     """
     # Verificar permisos
-    inspeccion = inspeccion_service.obtener_inspeccion(db, id_inspeccion)
+    inspeccion = await inspeccion_service.obtener_inspeccion_async(db, id_inspeccion)
     if current_user.rol == 'inspector' and inspeccion.id_inspector != current_user.id_usuario:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -286,7 +344,7 @@ def eliminar_foto(
 async def subir_firma(
     id_inspeccion: int,
     archivo: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Subir firma digital para una inspección
@@ -323,6 +381,77 @@ def generar_pdf(id_inspeccion: int, db: Session = Depends(get_db)):
     }
 
 
+ESTADO_TEXTO = {
+    'pending': 'Pendiente',
+    'approved': 'Aprobada',
+    'rejected': 'Rechazada'
+}
+
+
+def _generar_csv_inspecciones(encabezado: List[List[str]], filtros: dict):
+    """
+    Genera el CSV de inspecciones fila a fila
+    
+    Usa su propia sesión de BD (de lectura, como la petición): la sesión de
+    la petición se cierra antes de que StreamingResponse empiece a consumir
+    el generador.
+    """
+    output = io.StringIO()
+    # Usar separador ';' común en configuraciones ES y CRLF para Excel
+    writer = csv.writer(
+        output,
+        delimiter=';',
+        lineterminator='\r\n',
+        quoting=csv.QUOTE_ALL
+    )
+    
+    def vaciar() -> str:
+        chunk = output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+        return chunk
+    
+    # Escribir BOM para compatibilidad con Excel en Windows
+    output.write('\ufeff')
+    for fila in encabezado:
+        writer.writerow(fila)
+    yield vaciar()
+    
+    db = ReadSessionLocal()
+    try:
+        totales = {'pending': 0, 'approved': 0, 'rejected': 0}
+        total = 0
+        for row in inspeccion_service.iterar_para_exportacion(db, **filtros):
+            total += 1
+            if row.estado in totales:
+                totales[row.estado] += 1
+            
+            writer.writerow([
+                row.inspeccionado_en.strftime('%d/%m/%Y %H:%M') if row.inspeccionado_en else '',
+                row.numero_contenedor or '',
+                row.planta or '',
+                row.naviera or '',
+                row.inspector or '',
+                ESTADO_TEXTO.get(row.estado, row.estado),
+                f"{settings.BACKEND_URL}/api/reportes/pdf/generar?id_inspeccion={row.id_inspeccion}"
+            ])
+            
+            # Enviar en bloques para no acumular el archivo en memoria
+            if total % 500 == 0:
+                yield vaciar()
+    finally:
+        db.close()
+    
+    # Línea de totales
+    writer.writerow([])
+    writer.writerow(["Totales"])
+    writer.writerow([f"Pendientes: {totales['pending']}"])
+    writer.writerow([f"Aprobadas: {totales['approved']}"])
+    writer.writerow([f"Rechazadas: {totales['rejected']}"])
+    writer.writerow([f"Total: {total}"])
+    yield vaciar()
+
+
 @router.get("/export/csv")
 def exportar_inspecciones_csv(
     q: Optional[str] = None,
@@ -334,7 +463,7 @@ def exportar_inspecciones_csv(
     inspector: Optional[int] = None,
     order_by: str = "inspeccionado_en",
     order_dir: str = "desc",
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
@@ -343,155 +472,66 @@ def exportar_inspecciones_csv(
     - **Requiere rol**: Admin
     - Incluye: Fecha, Contenedor, Planta, Naviera, Inspector, Estado, ReportePDF
     - Usa los mismos filtros que el endpoint de listado
+    - Las filas se leen con una sola query y se envían a medida que se generan
     """
-    try:
-        # Solo admin puede exportar
-        if current_user.rol != 'admin':
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo administradores pueden exportar inspecciones a CSV"
-            )
-        
-        # Aplicar filtros según rol (mismo que listado pero sin paginación)
-        id_inspector = None
-        if inspector:
-            id_inspector = inspector
-        
-    # Obtener todas las inspecciones sin paginación (límite razonable)
-        items, total, _ = inspeccion_service.listar_inspecciones(
-            db=db,
-            page=1,
-            page_size=10000,  # Límite alto para exportación
-            q=q,
-            id_planta=planta,
-            id_navieras=naviera,
-            estado=estado,
-            fecha_desde=fecha_desde,
-            fecha_hasta=fecha_hasta,
-            order_by=order_by,
-            order_dir=order_dir,
-            id_inspector=id_inspector
-        )
-        
-        # Crear CSV en memoria
-        output = io.StringIO()
-        # Escribir BOM para compatibilidad con Excel en Windows
-        output.write('\ufeff')
-        # Usar separador ';' común en configuraciones ES y CRLF para Excel
-        writer = csv.writer(
-            output,
-            delimiter=';',
-            lineterminator='\r\n',
-            quoting=csv.QUOTE_ALL
-        )
-
-        # Encabezado de reporte (tipo informe)
-        writer.writerow(["Reporte de Inspecciones"])
-        writer.writerow([f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}"])
-        try:
-            writer.writerow([f"Usuario: {getattr(current_user, 'nombre', '')} ({getattr(current_user, 'correo', '')})"])
-        except Exception:
-            writer.writerow(["Usuario:"])
-
-        # Línea de filtros aplicados
-        filtros_aplicados = []
-        if q:
-            filtros_aplicados.append(f"Búsqueda: {q}")
-        if planta:
-            pl = planta_repository.get_by_id(db, int(planta))
-            filtros_aplicados.append(f"Planta: {pl.nombre if pl else planta}")
-        if naviera:
-            nv = naviera_repository.get_by_id(db, int(naviera))
-            filtros_aplicados.append(f"Naviera: {nv.nombre if nv else naviera}")
-        if estado:
-            estado_map = {
-                'pending': 'Pendiente',
-                'approved': 'Aprobada',
-                'rejected': 'Rechazada'
-            }
-            filtros_aplicados.append(f"Estado: {estado_map.get(estado, estado)}")
-        if fecha_desde:
-            filtros_aplicados.append(f"Desde: {fecha_desde}")
-        if fecha_hasta:
-            filtros_aplicados.append(f"Hasta: {fecha_hasta}")
-        if inspector:
-            insp = usuario_repository.get_by_id(db, int(inspector))
-            filtros_aplicados.append(f"Inspector: {insp.nombre if insp else inspector}")
-
-        writer.writerow(["Filtros: " + (", ".join(filtros_aplicados) if filtros_aplicados else "Ninguno")])
-        writer.writerow([])  # Línea en blanco
-
-        # Cabeceras de tabla
-        writer.writerow(['Fecha', 'Contenedor', 'Planta', 'Naviera', 'Inspector', 'Estado', 'ReportePDF'])
-        
-        # Estado en español
-        estado_map = {
-            'pending': 'Pendiente',
-            'approved': 'Aprobada',
-            'rejected': 'Rechazada'
-        }
-        
-        # Datos - procesar cada inspección
-        total_pend = total_apr = total_rech = 0
-        for inspeccion in items:
-            try:
-                # Obtener detalle con relaciones cargadas
-                detalle = inspeccion_service.obtener_inspeccion(db, inspeccion.id_inspeccion)
-                
-                # Formatear fecha
-                fecha = detalle.inspeccionado_en.strftime('%d/%m/%Y %H:%M') if detalle.inspeccionado_en else ''
-                
-                estado_texto = estado_map.get(detalle.estado, detalle.estado)
-                if detalle.estado == 'pending':
-                    total_pend += 1
-                elif detalle.estado == 'approved':
-                    total_apr += 1
-                elif detalle.estado == 'rejected':
-                    total_rech += 1
-                
-                # URL del reporte PDF
-                reporte_pdf = f"{settings.BACKEND_URL}/api/reportes/pdf/generar?id_inspeccion={detalle.id_inspeccion}"
-                
-                writer.writerow([
-                    fecha,
-                    detalle.numero_contenedor or '',
-                    detalle.planta.nombre if hasattr(detalle, 'planta') and detalle.planta else '',
-                    detalle.naviera.nombre if hasattr(detalle, 'naviera') and detalle.naviera else '',
-                    detalle.inspector.nombre if hasattr(detalle, 'inspector') and detalle.inspector else '',
-                    estado_texto,
-                    reporte_pdf
-                ])
-            except Exception as e:
-                # Si falla una inspección individual, continuar con las demás
-                import logging
-                logging.error(f"Error procesando inspección {inspeccion.id_inspeccion}: {e}")
-                continue
-        
-        # Línea de totales
-        writer.writerow([])
-        writer.writerow(["Totales"])
-        writer.writerow([f"Pendientes: {total_pend}"])
-        writer.writerow([f"Aprobadas: {total_apr}"])
-        writer.writerow([f"Rechazadas: {total_rech}"])
-        writer.writerow([f"Total: {total}"])
-
-        # Preparar respuesta
-        output.seek(0)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"reporte_inspecciones_{timestamp}.csv"
-        
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv; charset=utf-8",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error general en exportación CSV: {e}")
+    # Solo admin puede exportar
+    if current_user.rol != 'admin':
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al generar el archivo CSV: {str(e)}"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo administradores pueden exportar inspecciones a CSV"
         )
+    
+    # Encabezado de reporte (tipo informe)
+    encabezado = [
+        ["Reporte de Inspecciones"],
+        [f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}"],
+        [f"Usuario: {getattr(current_user, 'nombre', '')} ({getattr(current_user, 'correo', '')})"],
+    ]
+    
+    # Línea de filtros aplicados
+    filtros_aplicados = []
+    if q:
+        filtros_aplicados.append(f"Búsqueda: {q}")
+    if planta:
+        pl = planta_repository.get_by_id(db, int(planta))
+        filtros_aplicados.append(f"Planta: {pl.nombre if pl else planta}")
+    if naviera:
+        nv = naviera_repository.get_by_id(db, int(naviera))
+        filtros_aplicados.append(f"Naviera: {nv.nombre if nv else naviera}")
+    if estado:
+        filtros_aplicados.append(f"Estado: {ESTADO_TEXTO.get(estado, estado)}")
+    if fecha_desde:
+        filtros_aplicados.append(f"Desde: {fecha_desde}")
+    if fecha_hasta:
+        filtros_aplicados.append(f"Hasta: {fecha_hasta}")
+    if inspector:
+        insp = usuario_repository.get_by_id(db, int(inspector))
+        filtros_aplicados.append(f"Inspector: {insp.nombre if insp else inspector}")
+    
+    encabezado.append(["Filtros: " + (", ".join(filtros_aplicados) if filtros_aplicados else "Ninguno")])
+    encabezado.append([])  # Línea en blanco
+    # Cabeceras de tabla
+    encabezado.append(['Fecha', 'Contenedor', 'Planta', 'Naviera', 'Inspector', 'Estado', 'ReportePDF'])
+    
+    filtros = {
+        "q": q,
+        "id_planta": planta,
+        "id_navieras": naviera,
+        "estado": estado,
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
+        "order_by": order_by,
+        "order_dir": order_dir,
+        "id_inspector": inspector
+    }
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"reporte_inspecciones_{timestamp}.csv"
+    
+    return StreamingResponse(
+        _generar_csv_inspecciones(encabezado, filtros),
+        media_type="text/csv; charset=utf-8",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
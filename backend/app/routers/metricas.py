@@ -0,0 +1,29 @@
+"""Router de métricas en formato Prometheus"""
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import Response
+
+from ..core.metrics import metricas, CONTENT_TYPE
+from ..core.settings import settings
+
+router = APIRouter(tags=["Métricas"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def exportar_metricas(authorization: Optional[str] = Header(None)):
+    """
+    Métricas del proceso para Prometheus
+
+    - Latencia HTTP por ruta, consultas SQL por petición
+    - Pool de conexiones: en uso, overflow, espera por checkout, timeouts
+    - Consultas lentas (contador y últimas muestras con su sentencia)
+
+    Si METRICS_TOKEN está definido exige "Authorization: Bearer <token>".
+    """
+    if settings.METRICS_TOKEN and not secrets.compare_digest(
+        authorization or "", f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de métricas inválido")
+    return Response(metricas.exportar(), media_type=CONTENT_TYPE)
@@ -1,27 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from ..core.database import get_db
-from ..utils.auth import get_current_active_user
+from ..core.database import get_db, get_async_db
+from ..utils.auth import get_current_active_user, require_admin, authenticate_token_async
 from ..models import Usuario
 from ..services.notification_manager import notification_manager
+from ..services.email_queue import email_queue
+from ..services.event_bus import event_bus
 
 router = APIRouter(prefix="/notifications", tags=["Notificaciones"])
 
+# Intervalo del comentario keep-alive para proxies y para detectar desconexiones
+HEARTBEAT_SECONDS = 15
+
 
 @router.get("/", response_model=List[dict])
-def list_notifications(db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_active_user)):
-    """Listar notificaciones para el usuario autenticado (incluye por rol)."""
+def list_notifications(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor por la página anterior"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """Listar notificaciones para el usuario autenticado (incluye por rol), más recientes primero.
+
+    La siguiente página se pide con el valor del header X-Next-Cursor.
+    """
     roles = [current_user.rol]
-    items = notification_manager.list_for_user(user_id=current_user.id_usuario, roles=roles)
+    try:
+        items, next_cursor = notification_manager.list_for_user(
+            db, user_id=current_user.id_usuario, roles=roles, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return items
 
 
 @router.post("/{notif_id}/read")
 def mark_read(notif_id: str, db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_active_user)):
     """Marcar notificación como leída."""
-    ok = notification_manager.mark_read(notif_id, user_id=current_user.id_usuario)
+    ok = notification_manager.mark_read(db, notif_id, user_id=current_user.id_usuario, roles=[current_user.rol])
     if not ok:
         raise HTTPException(status_code=404, detail="Notificación no encontrada")
     return {"ok": True}
+
+
+@router.get("/email-queue")
+def email_queue_metrics(current_user: Usuario = Depends(require_admin)):
+    """Profundidad y contadores de la cola de envío de emails (solo admin)."""
+    return email_queue.metrics()
+
+
+def formato_sse(mensaje: dict) -> str:
+    """Serializa un evento del bus en formato text/event-stream"""
+    data = json.dumps(mensaje["data"], ensure_ascii=False, default=str)
+    return f"event: {mensaje['event']}\ndata: {data}\n\n"
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    token: Optional[str] = Query(None, description="JWT (EventSource no permite enviar headers)"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
+):
+    """Server-Sent Events con las notificaciones del usuario y de su rol.
+
+    Se autentica al conectar sin bloquear el event loop (principal_cache o
+    la sesión async, que devuelve su conexión al pool); un cliente conectado
+    sin eventos no consume conexiones ni consultas.
+    """
+    token = token or (credentials.credentials if credentials else None)
+    if not token:
+        raise HTTPException(status_code=401, detail="No se pudo validar las credenciales")
+    usuario = await authenticate_token_async(db, async_db, token)
+    id_usuario, rol = usuario.id_usuario, usuario.rol
+
+    suscripcion = event_bus.subscribe(id_usuario, rol)
+
+    async def eventos():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    mensaje = await asyncio.wait_for(suscripcion.queue.get(), timeout=HEARTBEAT_SECONDS)
+                    yield formato_sse(mensaje)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+        finally:
+            event_bus.unsubscribe(suscripcion)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
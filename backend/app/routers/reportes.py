@@ -1,20 +1,22 @@
 """Router para reportes"""
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List
 import os
 import json
 from datetime import datetime
 
-from ..core import get_db
-from ..schemas import ConteoEstado, ResumenReporte, Reporte, ReporteCreated, ReporteCreate
+from ..core import get_db, get_read_db
+from ..schemas import ConteoEstado, ResumenReporte, Reporte, ReporteCreate, TrabajoPDF
 from ..services import reporte_service
 from ..services.pdf_generator import pdf_generator_service
+from ..services.pdf_jobs import pdf_job_service
 from ..utils.auth import get_current_user, require_roles
 from ..models import Usuario
-from ..core.settings import settings
-from ..utils.files import ensure_dir
+from ..core.storage import storage, clave_de_ruta, PREFIJO_CAPTURAS
+from ..utils.descargas import respuesta_archivo, etag_fuerte, coincide_etag, CACHE_REVALIDAR
 from ..repositories import reporte_repository as _reporte_repo
 from ..repositories.inspecciones import inspeccion_repository
 
@@ -22,7 +24,7 @@ router = APIRouter(prefix="/reportes", tags=["Reportes"])
 
 
 @router.get("/conteo-estado", response_model=List[ConteoEstado])
-def obtener_conteo_por_estado(db: Session = Depends(get_db)):
+def obtener_conteo_por_estado(db: Session = Depends(get_read_db)):
     """
     Obtener conteo de inspecciones por estado
     
@@ -43,7 +45,7 @@ def obtener_resumen(
     id_planta: Optional[int] = None,
     id_navieras: Optional[int] = None,
     id_inspector: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Obtener resumen de inspecciones
@@ -68,14 +70,32 @@ def obtener_resumen(
 
 # ===== GENERACIÓN DE PDF =====
 
-@router.post("/pdf/generar", response_model=ReporteCreated, status_code=status.HTTP_201_CREATED)
+def _trabajo_to_schema(trabajo) -> dict:
+    """Convierte un objeto ORM TrabajoPDF al esquema de respuesta"""
+    return {
+        "id_trabajo": trabajo.id,
+        "id_inspeccion": trabajo.id_inspeccion,
+        "estado": trabajo.estado,
+        "id_reporte": trabajo.id_reporte,
+        "error": trabajo.error,
+        "creado_en": trabajo.creado_en,
+        "terminado_en": trabajo.terminado_en,
+    }
+
+
+@router.post("/pdf/generar", response_model=TrabajoPDF, status_code=status.HTTP_202_ACCEPTED)
 def generar_pdf_inspeccion(
     data: ReporteCreate,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
-    Genera un PDF estándar para una inspección
+    Encola la generación del PDF estándar de una inspección
+    
+    Responde de inmediato con el trabajo; el PDF se genera en un proceso
+    aparte. Consultar GET /reportes/pdf/trabajos/{id_trabajo} hasta que el
+    estado sea 'done' (id_reporte disponible) o 'failed'. Al terminar también
+    se envía una notificación al solicitante.
     
     Validaciones:
     - Inspección debe tener al menos 1 evidencia
@@ -85,40 +105,72 @@ def generar_pdf_inspeccion(
     require_roles(current_user, ["admin"])
     
     try:
-        # Generar el PDF utilizando el servicio
-        # Nota: el método del servicio se llama 'generar_pdf'
-        reporte = pdf_generator_service.generar_pdf(db, data.id_inspeccion)
-        
-        return ReporteCreated(
-            id_reporte=reporte.id,
-            uuid_reporte=reporte.uuid_reporte,
-            pdf_ruta=reporte.pdf_ruta,
-            mensaje="Reporte PDF generado exitosamente"
-        )
+        trabajo = pdf_job_service.encolar(db, data.id_inspeccion, id_usuario=current_user.id_usuario)
+        return _trabajo_to_schema(trabajo)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error al generar PDF: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error al encolar PDF: {str(e)}")
+
+
+@router.get("/pdf/trabajos/{id_trabajo}", response_model=TrabajoPDF)
+def obtener_trabajo_pdf(
+    id_trabajo: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Consulta el estado de un trabajo de generación de PDF"""
+    require_roles(current_user, ["admin"])
+    
+    trabajo = pdf_job_service.obtener(db, id_trabajo)
+    if not trabajo:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo no encontrado")
+    return _trabajo_to_schema(trabajo)
 
 
 @router.get("/pdf/{reporte_id}/descargar")
 def descargar_pdf(
     reporte_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
-    """Descarga el archivo PDF de un reporte"""
+    """
+    Descarga el archivo PDF de un reporte
+    
+    - ETag = hash_global del PDF: con If-None-Match responde 304 sin leer el archivo
+    - Acepta Range para descargas parciales o reanudadas (206)
+    """
     from ..repositories import reporte_repository
     
     reporte = reporte_repository.get_by_id(db, reporte_id)
     if not reporte:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reporte no encontrado")
     
-    if not os.path.exists(reporte.pdf_ruta):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archivo PDF no encontrado")
-    
     filename = os.path.basename(reporte.pdf_ruta)
-    return FileResponse(path=reporte.pdf_ruta, media_type="application/pdf", filename=filename)
+    etag = etag_fuerte(reporte.hash_global) if reporte.hash_global else None
+    
+    # El PDF no cambió desde la última descarga: no se toca el almacenamiento
+    if etag and coincide_etag(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": CACHE_REVALIDAR}
+        )
+    
+    # Reportes antiguos guardaban la ruta absoluta en disco
+    if not reporte.pdf_ruta.startswith(PREFIJO_CAPTURAS):
+        ruta = reporte.pdf_ruta
+    else:
+        clave = clave_de_ruta(reporte.pdf_ruta)
+        # S3: el cliente descarga directo del bucket con una URL firmada
+        url = storage.url_descarga(clave, nombre=filename, content_type="application/pdf")
+        if url is not None:
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+        ruta = storage.ruta(clave)
+    
+    if not os.path.exists(ruta):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archivo PDF no encontrado")
+    return respuesta_archivo(request, ruta, "application/pdf", etag=etag, filename=filename)
 
 
 def _reporte_to_schema(reporte_obj) -> dict:
@@ -182,15 +234,13 @@ async def firmar_reporte(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato de firma no válido. Use PNG o JPG")
 
     # Guardar firma en capturas/firmas/revisiones
-    firmas_dir = os.path.abspath(os.path.join(settings.CAPTURAS_DIR, "firmas", "revisiones"))
-    ensure_dir(firmas_dir)
+    firmas_dir = "firmas/revisiones"
     ext = ".png" if archivo.content_type == "image/png" else ".jpg"
-    firma_path = os.path.join(firmas_dir, f"inspeccion_{inspeccion.id_inspeccion}{ext}")
+    firma_clave = f"{firmas_dir}/inspeccion_{inspeccion.id_inspeccion}{ext}"
 
     contenido = await archivo.read()
     try:
-        with open(firma_path, "wb") as f:
-            f.write(contenido)
+        await run_in_threadpool(storage.guardar_bytes, firma_clave, contenido, archivo.content_type)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"No se pudo guardar la firma: {e}")
 
@@ -201,10 +251,14 @@ async def firmar_reporte(
         "rol": current_user.rol,
         "firmado_en": datetime.now().strftime("%d/%m/%Y %H:%M")
     }
-    meta_path = os.path.join(firmas_dir, f"inspeccion_{inspeccion.id_inspeccion}_revisor.json")
+    meta_clave = f"{firmas_dir}/inspeccion_{inspeccion.id_inspeccion}_revisor.json"
     try:
-        with open(meta_path, "w", encoding="utf-8") as f:
-            json.dump(meta, f, ensure_ascii=False, indent=2)
+        await run_in_threadpool(
+            storage.guardar_bytes,
+            meta_clave,
+            json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"),
+            "application/json"
+        )
     except Exception as e:
         # No es crítico para el flujo, solo registrar el problema
         print(f"Advertencia: no se pudo guardar metadatos de firma: {e}")
@@ -13,16 +13,25 @@ def calcular_hash_reporte(inspecciones, filtros):
     hash_input = (manifest_str + filtros_str).encode('utf-8')
     return hashlib.sha256(hash_input).hexdigest()
 
+
 """
 Router para exportación de reportes en PDF y Excel
+
+Las exportaciones leen las inspecciones en streaming (una query proyectada,
+sin fotos) y escriben el archivo en un SpooledTemporaryFile que pasa a disco
+al superar SPOOL_MAX_SIZE. En Excel la memoria no depende de la cantidad de
+filas. ReportLab, en cambio, conserva todas las páginas del PDF hasta
+guardarlo: el detalle del PDF se limita a MAX_FILAS_PDF filas (el resumen y
+el hash cubren todas); para el listado completo está la exportación a Excel.
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, date
-from typing import Optional
+from datetime import datetime, time
+from itertools import chain, groupby, islice
+from typing import Iterable, Iterator, Optional
 import io
+import tempfile
 
 # Importaciones para PDF
 from reportlab.lib import colors
@@ -35,22 +44,150 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 
 # Importaciones para Excel
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 
-from ..core.database import get_db
-from ..models import Inspeccion, Planta, Naviera, Usuario
+from ..core.database import get_db, get_read_db
+from ..models import Inspeccion, Usuario
+from ..repositories.inspecciones import inspeccion_repository
 from ..utils.auth import get_current_active_user
 
 router = APIRouter(tags=["Reportes Export"])
 
+# Tamaño a partir del cual el archivo temporal pasa de memoria a disco
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# Tamaño de bloque al enviar el archivo al cliente
+CHUNK_SIZE = 64 * 1024
+# Filas por tabla en el detalle del PDF (aprox. una página)
+FILAS_POR_TABLA_PDF = 25
+# Filas del detalle del PDF: las páginas quedan en memoria hasta guardarlo
+MAX_FILAS_PDF = 1000
+
+
+def calcular_hash_reporte_stream(manifiesto: Iterable, filtros: dict) -> str:
+    """
+    Variante incremental de calcular_hash_reporte para exportaciones grandes
+
+    Recibe filas (inspección, hash_hex de una foto) ordenadas por id_inspeccion,
+    como las de inspeccion_repository.iter_manifiesto, y las agrupa sin
+    materializarlas. Para una sola inspección produce el mismo hash que
+    calcular_hash_reporte (es lo que valida /verificar-reporte).
+    """
+    sha = hashlib.sha256()
+    primera = True
+    for _, grupo in groupby(manifiesto, key=lambda fila: fila.id_inspeccion):
+        grupo = list(grupo)
+        insp = grupo[0]
+        fotos_hashes = sorted(fila.hash_hex or '' for fila in grupo if fila.id_foto is not None)
+        linea = f"{insp.id_inspeccion}|{insp.codigo}|{insp.numero_contenedor}|{insp.estado}|{insp.inspeccionado_en}|{','.join(fotos_hashes)}"
+        sha.update((linea if primera else '\n' + linea).encode('utf-8'))
+        primera = False
+    sha.update(str(sorted(filtros.items())).encode('utf-8'))
+    return sha.hexdigest()
+
+
+class _FlowablesEnStreaming(list):
+    """
+    Lista de flowables que se rellena bajo demanda desde un generador
+
+    SimpleDocTemplate.build consume la lista desde el frente; al rellenarla
+    de a poco solo se mantienen en memoria las tablas de las próximas páginas.
+    """
+
+    def __init__(self, iniciales, generador: Iterator, minimo: int = 4):
+        super().__init__(iniciales)
+        self._generador = generador
+        self._minimo = minimo
+
+    def _rellenar(self):
+        if self._generador is None:
+            return
+        while super().__len__() < self._minimo:
+            siguiente = next(self._generador, None)
+            if siguiente is None:
+                self._generador = None
+                return
+            self.append(siguiente)
+
+    def __len__(self):
+        self._rellenar()
+        return super().__len__()
+
+
+def _enviar_archivo(archivo) -> Iterator[bytes]:
+    """Envía un archivo temporal en bloques y lo cierra al terminar"""
+    try:
+        archivo.seek(0)
+        while True:
+            bloque = archivo.read(CHUNK_SIZE)
+            if not bloque:
+                break
+            yield bloque
+    finally:
+        archivo.close()
+
+
+def _filtros_exportacion(
+    current_user: Usuario,
+    fecha_desde: Optional[str],
+    fecha_hasta: Optional[str],
+    estado: Optional[str],
+    id_planta: Optional[int],
+    id_navieras: Optional[int],
+    id_inspector: Optional[int]
+) -> dict:
+    """
+    Traduce los parámetros de exportación a filtros del repositorio
+
+    Las fechas (YYYY-MM-DD) se convierten en un rango [00:00, 23:59:59] para
+    que la comparación use el índice de inspeccionado_en.
+    """
+    filtros = {
+        'estado': estado,
+        'id_planta': id_planta,
+        'id_navieras': id_navieras,
+        'id_inspector': id_inspector,
+    }
+
+    # Filtrar por rol: el inspector solo exporta sus propias inspecciones
+    if current_user.rol == 'inspector':
+        if id_inspector and id_inspector != current_user.id_usuario:
+            raise HTTPException(status_code=404, detail="No se encontraron inspecciones con los filtros aplicados")
+        filtros['id_inspector'] = current_user.id_usuario
+
+    if fecha_desde:
+        try:
+            filtros['fecha_desde'] = datetime.combine(datetime.strptime(fecha_desde, "%Y-%m-%d").date(), time.min)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Formato de fecha_desde inválido")
+
+    if fecha_hasta:
+        try:
+            filtros['fecha_hasta'] = datetime.combine(datetime.strptime(fecha_hasta, "%Y-%m-%d").date(), time.max)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Formato de fecha_hasta inválido")
+
+    return filtros
+
 
-def crear_pdf_inspecciones(inspecciones: list, filtros: dict) -> io.BytesIO:
+def _conteo_estados(db: Session, filtros: dict) -> dict:
+    """Conteo por estado de las inspecciones filtradas (un GROUP BY)"""
+    conteo = {'pending': 0, 'approved': 0, 'rejected': 0}
+    for estado, total in inspeccion_repository.get_conteo_por_estado(db, **filtros):
+        conteo[estado] = total
+    return conteo
+
+
+def crear_pdf_inspecciones(db: Session, filtros_query: dict, filtros: dict, conteo: dict, filas: Iterator, archivo) -> None:
     """
     Genera un PDF profesional y moderno con el reporte de inspecciones
+
+    Escribe el documento en `archivo`; las filas del detalle se consumen del
+    iterador a medida que ReportLab avanza por las páginas, hasta
+    MAX_FILAS_PDF (ReportLab mantiene las páginas generadas en memoria).
     """
     try:
-        buffer = io.BytesIO()
         # Definir colores corporativos
         COLOR_PRIMARY = colors.HexColor('#2563eb')  # Azul moderno
         COLOR_SUCCESS = colors.HexColor('#10b981')  # Verde (Aprobado)
@@ -90,9 +227,16 @@ def crear_pdf_inspecciones(inspecciones: list, filtros: dict) -> io.BytesIO:
             spaceAfter=12,
             spaceBefore=20,
             leading=17)
+        pie_style = ParagraphStyle(
+            'Pie',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.HexColor('#94a3b8'),
+            alignment=TA_CENTER
+        )
 
         doc = SimpleDocTemplate(
-            buffer, 
+            archivo,
             pagesize=A4,
             topMargin=0.5*inch,
             bottomMargin=0.5*inch,
@@ -101,7 +245,7 @@ def crear_pdf_inspecciones(inspecciones: list, filtros: dict) -> io.BytesIO:
         )
         elementos = []
 
-        # ========== ENCABEZADO ========== 
+        # ========== ENCABEZADO ==========
         # Logo/Título de la empresa
         elementos.append(Paragraph("🏭 INSPECCIÓN DE CONTENEDORES", titulo_principal))
         elementos.append(Paragraph("Sistema de Control de Calidad", subtitulo_style))
@@ -115,12 +259,19 @@ def crear_pdf_inspecciones(inspecciones: list, filtros: dict) -> io.BytesIO:
         elementos.append(line_table)
         elementos.append(Spacer(1, 0.2*inch))
 
-        # ========== CÓDIGO QR DE VERIFICACIÓN ========== 
-        id_reporte = inspecciones[0].id_inspeccion if inspecciones else 0
+        # ========== CÓDIGO QR DE VERIFICACIÓN ==========
         try:
-            hash_reporte = calcular_hash_reporte(inspecciones, filtros)
+            # Primera pasada (completa antes de abrir la del detalle) solo para el hash
+            hash_reporte = calcular_hash_reporte_stream(
+                inspeccion_repository.iter_manifiesto(db, **filtros_query),
+                filtros
+            )
         except Exception:
             hash_reporte = "errorhash"
+        primera = next(filas, None)
+        if primera is not None:
+            filas = chain([primera], filas)
+        id_reporte = primera.id_inspeccion if primera is not None else 0
         url_verificacion = f"https://tuservidor/verificar-reporte/{id_reporte}/{hash_reporte}"
         try:
             qr = qrcode.QRCode(
@@ -150,16 +301,17 @@ def crear_pdf_inspecciones(inspecciones: list, filtros: dict) -> io.BytesIO:
         except Exception:
             pass
 
-        # ========== INFORMACIÓN DEL REPORTE ========== 
+        # ========== INFORMACIÓN DEL REPORTE ==========
+        total = sum(conteo.values())
         fecha_actual = datetime.now().strftime("%d/%m/%Y %H:%M")
         info_data = [
-            ['📅 Fecha de Generación:', fecha_actual, '📊 Total de Registros:', str(len(inspecciones))]
+            ['📅 Fecha de Generación:', fecha_actual, '📊 Total de Registros:', str(total)]
         ]
         if filtros.get('fecha_desde') and filtros.get('fecha_hasta'):
             info_data.append([
-                '📆 Período:', 
-                f"{filtros['fecha_desde']} al {filtros['fecha_hasta']}", 
-                '', 
+                '📆 Período:',
+                f"{filtros['fecha_desde']} al {filtros['fecha_hasta']}",
+                '',
                 ''
             ])
         info_table = Table(info_data, colWidths=[1.8*inch, 2.5*inch, 1.8*inch, 1.1*inch])
@@ -180,13 +332,12 @@ def crear_pdf_inspecciones(inspecciones: list, filtros: dict) -> io.BytesIO:
         elementos.append(info_table)
         elementos.append(Spacer(1, 0.3*inch))
 
-        # ========== RESUMEN ESTADÍSTICO ========== 
+        # ========== RESUMEN ESTADÍSTICO ==========
         elementos.append(Paragraph("📈 RESUMEN ESTADÍSTICO", titulo_seccion))
         elementos.append(Spacer(1, 0.15*inch))
-        total = len(inspecciones)
-        aprobadas = sum(1 for i in inspecciones if i.estado == 'approved')
-        rechazadas = sum(1 for i in inspecciones if i.estado == 'rejected')
-        pendientes = sum(1 for i in inspecciones if i.estado == 'pending')
+        aprobadas = conteo['approved']
+        rechazadas = conteo['rejected']
+        pendientes = conteo['pending']
         porcentaje_aprobadas = (aprobadas / total * 100) if total > 0 else 0
         porcentaje_rechazadas = (rechazadas / total * 100) if total > 0 else 0
         porcentaje_pendientes = (pendientes / total * 100) if total > 0 else 0
@@ -226,271 +377,94 @@ def crear_pdf_inspecciones(inspecciones: list, filtros: dict) -> io.BytesIO:
         elementos.append(resumen_table)
         elementos.append(Spacer(1, 0.4*inch))
 
-        # ========== DETALLE DE INSPECCIONES ========== 
-        if inspecciones:
-            elementos.append(Paragraph("DETALLE DE INSPECCIONES", titulo_seccion))
-            elementos.append(Spacer(1, 0.15*inch))
-            data = [['CÓDIGO', 'CONTENEDOR', 'PLANTA', 'FECHA', 'ESTADO', 'INSPECTOR']]
-            for insp in inspecciones[:100]:
-                estado_texto = {
-                    'pending': '⏳ Pendiente',
-                    'approved': 'OK Aprobado',
-                    'rejected': 'X Rechazado'
-                }.get(insp.estado, insp.estado)
-                fecha = insp.inspeccionado_en.strftime("%d/%m/%Y") if insp.inspeccionado_en else 'N/A'
-                planta_nombre = insp.planta.nombre if insp.planta else 'N/A'
-                inspector_nombre = insp.inspector.nombre if insp.inspector else 'N/A'
-                data.append([
-                    insp.codigo[:18] if insp.codigo else 'N/A',
-                    insp.numero_contenedor[:15] if insp.numero_contenedor else 'N/A',
-                    planta_nombre[:18],
-                    fecha,
-                    estado_texto,
-                    inspector_nombre[:18]
-                ])
+        # ========== DETALLE DE INSPECCIONES ==========
+        def detalle():
+            """Genera las tablas del detalle por bloques de filas"""
+            encabezado = ['CÓDIGO', 'CONTENEDOR', 'PLANTA', 'FECHA', 'ESTADO', 'INSPECTOR']
             col_widths = [1.3*inch, 1.4*inch, 1.3*inch, 0.9*inch, 1.1*inch, 1.2*inch]
-            tabla = Table(data, colWidths=col_widths)
-            table_style = [
-                ('BACKGROUND', (0, 0), (-1, 0), COLOR_PRIMARY),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('TOPPADDING', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ALIGN', (0, 1), (5, -1), 'LEFT'),
-                ('ALIGN', (3, 1), (3, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('TOPPADDING', (0, 1), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-                ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, COLOR_BORDER),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, COLOR_LIGHT_BG]),
-            ]
-            for i, insp in enumerate(inspecciones[:100], start=1):
-                if insp.estado == 'approved':
-                    table_style.append(('TEXTCOLOR', (4, i), (4, i), COLOR_SUCCESS))
-                    table_style.append(('FONTNAME', (4, i), (4, i), 'Helvetica-Bold'))
-                elif insp.estado == 'rejected':
-                    table_style.append(('TEXTCOLOR', (4, i), (4, i), COLOR_DANGER))
-                    table_style.append(('FONTNAME', (4, i), (4, i), 'Helvetica-Bold'))
-                elif insp.estado == 'pending':
-                    table_style.append(('TEXTCOLOR', (4, i), (4, i), COLOR_WARNING))
-                    table_style.append(('FONTNAME', (4, i), (4, i), 'Helvetica-Bold'))
-            tabla.setStyle(TableStyle(table_style))
-            elementos.append(tabla)
-            elementos.append(Spacer(1, 0.3*inch))
-            pie_style = ParagraphStyle(
-                'Pie',
-                parent=styles['Normal'],
-                fontSize=8,
-                textColor=colors.HexColor('#94a3b8'),
-                alignment=TA_CENTER
-            )
-            elementos.append(Paragraph(
+            detalle_filas = islice(filas, MAX_FILAS_PDF)
+            while True:
+                bloque = list(islice(detalle_filas, FILAS_POR_TABLA_PDF))
+                if not bloque:
+                    break
+                data = [encabezado]
+                table_style = [
+                    ('BACKGROUND', (0, 0), (-1, 0), COLOR_PRIMARY),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 9),
+                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                    ('TOPPADDING', (0, 0), (-1, 0), 12),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                    ('FONTSIZE', (0, 1), (-1, -1), 8),
+                    ('ALIGN', (0, 1), (5, -1), 'LEFT'),
+                    ('ALIGN', (3, 1), (3, -1), 'CENTER'),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('TOPPADDING', (0, 1), (-1, -1), 8),
+                    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+                    ('LEFTPADDING', (0, 0), (-1, -1), 8),
+                    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+                    ('GRID', (0, 0), (-1, -1), 0.5, COLOR_BORDER),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, COLOR_LIGHT_BG]),
+                ]
+                for i, insp in enumerate(bloque, start=1):
+                    estado_texto = {
+                        'pending': '⏳ Pendiente',
+                        'approved': 'OK Aprobado',
+                        'rejected': 'X Rechazado'
+                    }.get(insp.estado, insp.estado)
+                    fecha = insp.inspeccionado_en.strftime("%d/%m/%Y") if insp.inspeccionado_en else 'N/A'
+                    data.append([
+                        insp.codigo[:18] if insp.codigo else 'N/A',
+                        insp.numero_contenedor[:15] if insp.numero_contenedor else 'N/A',
+                        (insp.planta or 'N/A')[:18],
+                        fecha,
+                        estado_texto,
+                        (insp.inspector or 'N/A')[:18]
+                    ])
+                    color_estado = {
+                        'approved': COLOR_SUCCESS,
+                        'rejected': COLOR_DANGER,
+                        'pending': COLOR_WARNING
+                    }.get(insp.estado)
+                    if color_estado is not None:
+                        table_style.append(('TEXTCOLOR', (4, i), (4, i), color_estado))
+                        table_style.append(('FONTNAME', (4, i), (4, i), 'Helvetica-Bold'))
+                tabla = Table(data, colWidths=col_widths, repeatRows=1)
+                tabla.setStyle(TableStyle(table_style))
+                yield tabla
+
+            if total > MAX_FILAS_PDF:
+                yield Spacer(1, 0.2*inch)
+                yield Paragraph(
+                    f"Se muestran las primeras {MAX_FILAS_PDF} de {total} inspecciones. "
+                    "Para el listado completo use la exportación a Excel.",
+                    subtitulo_style
+                )
+            yield Spacer(1, 0.3*inch)
+            yield Paragraph(
                 "Este reporte ha sido generado automáticamente por el Sistema de Inspección de Contenedores",
                 pie_style
-            ))
-            elementos.append(Paragraph(
+            )
+            yield Paragraph(
                 f"Hash de verificación: {hash_reporte[:16]}...",
                 pie_style
-            ))
+            )
 
-        doc.build(elementos)
-        buffer.seek(0)
-        return buffer
+        if total > 0:
+            elementos.append(Paragraph("DETALLE DE INSPECCIONES", titulo_seccion))
+            elementos.append(Spacer(1, 0.15*inch))
+            doc.build(_FlowablesEnStreaming(elementos, detalle()))
+        else:
+            doc.build(elementos)
     except Exception as e:
-        buffer_err = io.BytesIO()
-        doc = SimpleDocTemplate(buffer_err, pagesize=A4)
+        archivo.seek(0)
+        archivo.truncate()
+        doc = SimpleDocTemplate(archivo, pagesize=A4)
         styles = getSampleStyleSheet()
         doc.build([Paragraph(f"Error generando PDF: {str(e)}", styles['Normal'])])
-        buffer_err.seek(0)
-        return buffer_err
-    info_data = [
-        ['📅 Fecha de Generación:', fecha_actual, '📊 Total de Registros:', str(len(inspecciones))]
-    ]
-    
-    if filtros.get('fecha_desde') and filtros.get('fecha_hasta'):
-        info_data.append([
-            '📆 Período:', 
-            f"{filtros['fecha_desde']} al {filtros['fecha_hasta']}", 
-            '', 
-            ''
-        ])
-    
-    info_table = Table(info_data, colWidths=[1.8*inch, 2.5*inch, 1.8*inch, 1.1*inch])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), COLOR_LIGHT_BG),
-        ('TEXTCOLOR', (0, 0), (-1, -1), COLOR_DARK),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('LEFTPADDING', (0, 0), (-1, -1), 12),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-        ('BOX', (0, 0), (-1, -1), 1, COLOR_BORDER),
-    ]))
-    elementos.append(info_table)
-    elementos.append(Spacer(1, 0.3*inch))
-    
-    # ========== RESUMEN ESTADÍSTICO ==========
-    elementos.append(Paragraph("📈 RESUMEN ESTADÍSTICO", titulo_seccion))
-    elementos.append(Spacer(1, 0.15*inch))
-    
-    total = len(inspecciones)
-    aprobadas = sum(1 for i in inspecciones if i.estado == 'approved')
-    rechazadas = sum(1 for i in inspecciones if i.estado == 'rejected')
-    pendientes = sum(1 for i in inspecciones if i.estado == 'pending')
-    
-    porcentaje_aprobadas = (aprobadas / total * 100) if total > 0 else 0
-    porcentaje_rechazadas = (rechazadas / total * 100) if total > 0 else 0
-    porcentaje_pendientes = (pendientes / total * 100) if total > 0 else 0
-    
-    resumen_data = [
-        ['ESTADO', 'CANTIDAD', 'PORCENTAJE'],
-        ['OK Aprobadas', str(aprobadas), f'{porcentaje_aprobadas:.1f}%'],
-        ['Pendientes', str(pendientes), f'{porcentaje_pendientes:.1f}%'],
-        ['X Rechazadas', str(rechazadas), f'{porcentaje_rechazadas:.1f}%'],
-        ['TOTAL', str(total), '100%']
-    ]
-    
-    resumen_table = Table(resumen_data, colWidths=[3*inch, 1.8*inch, 1.8*inch])
-    resumen_table.setStyle(TableStyle([
-        # Encabezado
-        ('BACKGROUND', (0, 0), (-1, 0), COLOR_PRIMARY),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        
-        # Fila Aprobadas
-        ('BACKGROUND', (0, 1), (-1, 1), colors.HexColor('#ecfdf5')),
-        ('TEXTCOLOR', (0, 1), (-1, 1), COLOR_SUCCESS),
-        ('FONTNAME', (0, 1), (0, 1), 'Helvetica-Bold'),
-        
-        # Fila Pendientes
-        ('BACKGROUND', (0, 2), (-1, 2), colors.HexColor('#fffbeb')),
-        ('TEXTCOLOR', (0, 2), (-1, 2), COLOR_WARNING),
-        ('FONTNAME', (0, 2), (0, 2), 'Helvetica-Bold'),
-        
-        # Fila Rechazadas
-        ('BACKGROUND', (0, 3), (-1, 3), colors.HexColor('#fef2f2')),
-        ('TEXTCOLOR', (0, 3), (-1, 3), COLOR_DANGER),
-        ('FONTNAME', (0, 3), (0, 3), 'Helvetica-Bold'),
-        
-        # Fila Total
-        ('BACKGROUND', (0, 4), (-1, 4), COLOR_DARK),
-        ('TEXTCOLOR', (0, 4), (-1, 4), colors.white),
-        ('FONTNAME', (0, 4), (-1, 4), 'Helvetica-Bold'),
-        
-        # General
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, COLOR_BORDER),
-    ]))
-    
-    elementos.append(resumen_table)
-    elementos.append(Spacer(1, 0.4*inch))
-    
-    # ========== DETALLE DE INSPECCIONES ==========
-    if inspecciones:
-        elementos.append(Paragraph("DETALLE DE INSPECCIONES", titulo_seccion))
-        elementos.append(Spacer(1, 0.15*inch))
-        
-        # Encabezados
-        data = [['CÓDIGO', 'CONTENEDOR', 'PLANTA', 'FECHA', 'ESTADO', 'INSPECTOR']]
-        
-        # Datos con formato condicional
-        for insp in inspecciones[:100]:  # Limitar a 100 registros
-            estado_texto = {
-                'pending': '⏳ Pendiente',
-                'approved': 'OK Aprobado',
-                'rejected': 'X Rechazado'
-            }.get(insp.estado, insp.estado)
-            
-            fecha = insp.inspeccionado_en.strftime("%d/%m/%Y") if insp.inspeccionado_en else 'N/A'
-            planta_nombre = insp.planta.nombre if insp.planta else 'N/A'
-            inspector_nombre = insp.inspector.nombre if insp.inspector else 'N/A'
-            
-            data.append([
-                insp.codigo[:18] if insp.codigo else 'N/A',
-                insp.numero_contenedor[:15] if insp.numero_contenedor else 'N/A',
-                planta_nombre[:18],
-                fecha,
-                estado_texto,
-                inspector_nombre[:18]
-            ])
-        
-        # Crear tabla con mejor diseño
-        col_widths = [1.3*inch, 1.4*inch, 1.3*inch, 0.9*inch, 1.1*inch, 1.2*inch]
-        tabla = Table(data, colWidths=col_widths)
-        
-        # Estilo moderno para la tabla
-        table_style = [
-            # Encabezado
-            ('BACKGROUND', (0, 0), (-1, 0), COLOR_PRIMARY),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('TOPPADDING', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            
-            # Contenido
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('ALIGN', (0, 1), (5, -1), 'LEFT'),
-            ('ALIGN', (3, 1), (3, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            
-            # Bordes y fondos alternados
-            ('GRID', (0, 0), (-1, -1), 0.5, COLOR_BORDER),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, COLOR_LIGHT_BG]),
-        ]
-        
-        # Aplicar colores según estado
-        for i, insp in enumerate(inspecciones[:100], start=1):
-            if insp.estado == 'approved':
-                table_style.append(('TEXTCOLOR', (4, i), (4, i), COLOR_SUCCESS))
-                table_style.append(('FONTNAME', (4, i), (4, i), 'Helvetica-Bold'))
-            elif insp.estado == 'rejected':
-                table_style.append(('TEXTCOLOR', (4, i), (4, i), COLOR_DANGER))
-                table_style.append(('FONTNAME', (4, i), (4, i), 'Helvetica-Bold'))
-            elif insp.estado == 'pending':
-                table_style.append(('TEXTCOLOR', (4, i), (4, i), COLOR_WARNING))
-                table_style.append(('FONTNAME', (4, i), (4, i), 'Helvetica-Bold'))
-        
-        tabla.setStyle(TableStyle(table_style))
-        elementos.append(tabla)
-        
-        # Pie de página
-        elementos.append(Spacer(1, 0.3*inch))
-        pie_style = ParagraphStyle(
-            'Pie',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.HexColor('#94a3b8'),
-            alignment=TA_CENTER
-        )
-        elementos.append(Paragraph(
-            "Este reporte ha sido generado automáticamente por el Sistema de Inspección de Contenedores",
-            pie_style
-        ))
-        elementos.append(Paragraph(
-            f"Hash de verificación: {hash_reporte[:16]}...",
-            pie_style
-        ))
+
+
 @router.get("/verificar-reporte/{id_reporte}/{hash_reporte}", response_class=HTMLResponse)
 def verificar_reporte(id_reporte: int, hash_reporte: str, db: Session = Depends(get_db)):
     # Buscar todas las inspecciones con el mismo id_reporte (puede ser un lote, aquí solo una)
@@ -515,151 +489,172 @@ def verificar_reporte(id_reporte: int, hash_reporte: str, db: Session = Depends(
     return HTMLResponse(html)
 
 
-def crear_excel_inspecciones(inspecciones: list, filtros: dict) -> io.BytesIO:
+
+
+def crear_excel_inspecciones(filtros: dict, conteo: dict, filas: Iterator, archivo) -> None:
     """
     Genera un archivo Excel con el reporte de inspecciones
+
+    Usa el modo write-only de openpyxl: cada fila se escribe directamente al
+    archivo temporal de la hoja en lugar de mantenerse en memoria.
     """
-    buffer = io.BytesIO()
-    wb = Workbook()
-    
-    # Hoja de Resumen
-    ws_resumen = wb.active
-    ws_resumen.title = "Resumen"
-    
+    wb = Workbook(write_only=True)
+    borde = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    def celda(ws, valor, **estilos):
+        cell = WriteOnlyCell(ws, value=valor)
+        for nombre, estilo in estilos.items():
+            setattr(cell, nombre, estilo)
+        return cell
+
+    # Hoja de Resumen (se crea primero para que sea la hoja inicial)
+    ws_resumen = wb.create_sheet(title="Resumen")
+    # Ajustar anchos de columna (antes de escribir filas en modo write-only)
+    for col in range(1, 7):
+        ws_resumen.column_dimensions[get_column_letter(col)].width = 20
+
     # Título
-    ws_resumen['A1'] = 'REPORTE DE INSPECCIONES DE CONTENEDORES'
-    ws_resumen['A1'].font = Font(size=16, bold=True, color='1e3a8a')
-    ws_resumen['A1'].alignment = Alignment(horizontal='center')
-    ws_resumen.merge_cells('A1:F1')
-    
+    ws_resumen.append([celda(ws_resumen, 'REPORTE DE INSPECCIONES DE CONTENEDORES', font=Font(size=16, bold=True, color='1e3a8a'))])
+
     # Información del reporte
     fecha_actual = datetime.now().strftime("%d/%m/%Y %H:%M")
-    ws_resumen['A2'] = f'Generado el: {fecha_actual}'
-    ws_resumen['A2'].alignment = Alignment(horizontal='center')
-    ws_resumen.merge_cells('A2:F2')
-    
+    ws_resumen.append([f'Generado el: {fecha_actual}'])
+
     if filtros.get('fecha_desde') and filtros.get('fecha_hasta'):
-        ws_resumen['A3'] = f"Período: {filtros['fecha_desde']} al {filtros['fecha_hasta']}"
-        ws_resumen['A3'].alignment = Alignment(horizontal='center')
-        ws_resumen.merge_cells('A3:F3')
-    
+        ws_resumen.append([f"Período: {filtros['fecha_desde']} al {filtros['fecha_hasta']}"])
+    else:
+        ws_resumen.append([])
+
     # Estadísticas
-    row = 5
-    ws_resumen[f'A{row}'] = 'ESTADÍSTICAS GENERALES'
-    ws_resumen[f'A{row}'].font = Font(size=12, bold=True)
-    ws_resumen.merge_cells(f'A{row}:D{row}')
-    
-    row += 1
+    ws_resumen.append([])
+    ws_resumen.append([celda(ws_resumen, 'ESTADÍSTICAS GENERALES', font=Font(size=12, bold=True))])
+
     headers = ['Total Inspecciones', 'Aprobadas', 'Rechazadas', 'Pendientes']
-    for col, header in enumerate(headers, 1):
-        cell = ws_resumen.cell(row, col, header)
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color='e5e7eb', end_color='e5e7eb', fill_type='solid')
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-    
-    row += 1
-    total = len(inspecciones)
-    aprobadas = sum(1 for i in inspecciones if i.estado == 'approved')
-    rechazadas = sum(1 for i in inspecciones if i.estado == 'rejected')
-    pendientes = sum(1 for i in inspecciones if i.estado == 'pending')
-    
-    valores = [total, aprobadas, rechazadas, pendientes]
-    for col, valor in enumerate(valores, 1):
-        cell = ws_resumen.cell(row, col, valor)
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
+    ws_resumen.append([
+        celda(
+            ws_resumen, header,
+            font=Font(bold=True),
+            fill=PatternFill(start_color='e5e7eb', end_color='e5e7eb', fill_type='solid'),
+            alignment=Alignment(horizontal='center'),
+            border=borde
         )
-    
-    # Ajustar anchos de columna
-    for col in range(1, 7):
-        ws_resumen.column_dimensions[get_column_letter(col)].width = 20
-    
+        for header in headers
+    ])
+
+    valores = [sum(conteo.values()), conteo['approved'], conteo['rejected'], conteo['pending']]
+    ws_resumen.append([
+        celda(ws_resumen, valor, alignment=Alignment(horizontal='center'), border=borde)
+        for valor in valores
+    ])
+
     # Hoja de Detalle
     ws_detalle = wb.create_sheet(title="Detalle")
-    
+
+    # Ajustar anchos de columna
+    anchos = [15, 18, 25, 25, 18, 15, 25, 40]
+    for col, ancho in enumerate(anchos, 1):
+        ws_detalle.column_dimensions[get_column_letter(col)].width = ancho
+
     # Encabezados
     encabezados = ['Código', 'N° Contenedor', 'Planta', 'Naviera', 'Fecha Inspección', 'Estado', 'Inspector', 'Observaciones']
-    for col, header in enumerate(encabezados, 1):
-        cell = ws_detalle.cell(1, col, header)
-        cell.font = Font(bold=True, color='FFFFFF')
-        cell.fill = PatternFill(start_color='1e3a8a', end_color='1e3a8a', fill_type='solid')
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
+    ws_detalle.append([
+        celda(
+            ws_detalle, header,
+            font=Font(bold=True, color='FFFFFF'),
+            fill=PatternFill(start_color='1e3a8a', end_color='1e3a8a', fill_type='solid'),
+            alignment=Alignment(horizontal='center'),
+            border=borde
         )
-    
+        for header in encabezados
+    ])
+
+    # Estilos de la columna Estado
+    estilos_estado = {
+        'Aprobado': (PatternFill(start_color='d1fae5', end_color='d1fae5', fill_type='solid'), Font(color='065f46', bold=True)),
+        'Rechazado': (PatternFill(start_color='fee2e2', end_color='fee2e2', fill_type='solid'), Font(color='991b1b', bold=True)),
+        'Pendiente': (PatternFill(start_color='fef3c7', end_color='fef3c7', fill_type='solid'), Font(color='92400e', bold=True)),
+    }
+    alineacion_izq = Alignment(horizontal='left')
+    alineacion_centro = Alignment(horizontal='center')
+
     # Datos
-    for row_idx, insp in enumerate(inspecciones, 2):
+    for insp in filas:
         estado_texto = {
             'pending': 'Pendiente',
             'approved': 'Aprobado',
             'rejected': 'Rechazado'
         }.get(insp.estado, insp.estado)
-        
+
         fecha = insp.inspeccionado_en.strftime("%d/%m/%Y") if insp.inspeccionado_en else 'N/A'
-        planta_nombre = insp.planta.nombre if insp.planta else 'N/A'
-        naviera_nombre = insp.naviera.nombre if insp.naviera else 'N/A'
-        inspector_nombre = insp.inspector.nombre if insp.inspector else 'N/A'
-        
+
         datos = [
             insp.codigo or 'N/A',
             insp.numero_contenedor or 'N/A',
-            planta_nombre,
-            naviera_nombre,
+            insp.planta or 'N/A',
+            insp.naviera or 'N/A',
             fecha,
             estado_texto,
-            inspector_nombre,
+            insp.inspector or 'N/A',
             insp.observaciones[:50] if insp.observaciones else ''
         ]
-        
+
+        fila = []
         for col_idx, valor in enumerate(datos, 1):
-            cell = ws_detalle.cell(row_idx, col_idx, valor)
-            cell.alignment = Alignment(horizontal='left' if col_idx in [1, 2, 3, 4, 7, 8] else 'center')
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
+            cell = celda(
+                ws_detalle, valor,
+                alignment=alineacion_izq if col_idx in [1, 2, 3, 4, 7, 8] else alineacion_centro,
+                border=borde
             )
-            
             # Color según estado
-            if col_idx == 6:  # Columna Estado
-                if estado_texto == 'Aprobado':
-                    cell.fill = PatternFill(start_color='d1fae5', end_color='d1fae5', fill_type='solid')
-                    cell.font = Font(color='065f46', bold=True)
-                elif estado_texto == 'Rechazado':
-                    cell.fill = PatternFill(start_color='fee2e2', end_color='fee2e2', fill_type='solid')
-                    cell.font = Font(color='991b1b', bold=True)
-                elif estado_texto == 'Pendiente':
-                    cell.fill = PatternFill(start_color='fef3c7', end_color='fef3c7', fill_type='solid')
-                    cell.font = Font(color='92400e', bold=True)
-    
-    # Ajustar anchos de columna
-    anchos = [15, 18, 25, 25, 18, 15, 25, 40]
-    for col, ancho in enumerate(anchos, 1):
-        ws_detalle.column_dimensions[get_column_letter(col)].width = ancho
-    
+            if col_idx == 6 and estado_texto in estilos_estado:
+                cell.fill, cell.font = estilos_estado[estado_texto]
+            fila.append(cell)
+        ws_detalle.append(fila)
+
     # Guardar
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
+    wb.save(archivo)
+
+
+def _preparar_exportacion(
+    db: Session,
+    current_user: Usuario,
+    fecha_desde: Optional[str],
+    fecha_hasta: Optional[str],
+    estado: Optional[str],
+    id_planta: Optional[int],
+    id_navieras: Optional[int],
+    id_inspector: Optional[int]
+):
+    """Valida filtros y devuelve (filtros_query, filtros, conteo, filas) para un exportador"""
+    filtros_query = _filtros_exportacion(
+        current_user, fecha_desde, fecha_hasta, estado, id_planta, id_navieras, id_inspector
+    )
+
+    conteo = _conteo_estados(db, filtros_query)
+    if sum(conteo.values()) == 0:
+        raise HTTPException(status_code=404, detail="No se encontraron inspecciones con los filtros aplicados")
+
+    filtros = {
+        'fecha_desde': fecha_desde,
+        'fecha_hasta': fecha_hasta,
+        'estado': estado,
+        'id_planta': id_planta,
+        'id_inspector': id_inspector
+    }
+
+    # Filas proyectadas en streaming (sin límite de cantidad)
+    filas = inspeccion_repository.iter_para_exportacion(db, **filtros_query)
+
+    return filtros_query, filtros, conteo, filas
 
 
 @router.get("/pdf")
-async def exportar_pdf(
+def exportar_pdf(
     fecha_desde: Optional[str] = Query(None, description="Fecha desde (YYYY-MM-DD)"),
     fecha_hasta: Optional[str] = Query(None, description="Fecha hasta (YYYY-MM-DD)"),
     estado: Optional[str] = Query(None, description="Estado: pending, approved, rejected"),
@@ -667,81 +662,41 @@ async def exportar_pdf(
     id_navieras: Optional[int] = Query(None, description="ID de la naviera"),
     id_inspector: Optional[int] = Query(None, description="ID del inspector"),
     current_user: Usuario = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Genera un reporte en PDF con las inspecciones filtradas
     """
+    archivo = None
     try:
-        # Construir query base (sin JOINs, usaremos las relaciones de SQLAlchemy)
-        query = db.query(Inspeccion)
-        
-        # Filtrar por rol
-        if current_user.rol == 'inspector':
-            query = query.filter(Inspeccion.id_inspector == current_user.id_usuario)
-        
-        # Filtros adicionales
-        if fecha_desde:
-            try:
-                fecha_desde_obj = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
-                query = query.filter(func.date(Inspeccion.inspeccionado_en) >= fecha_desde_obj)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Formato de fecha_desde inválido")
-        
-        if fecha_hasta:
-            try:
-                fecha_hasta_obj = datetime.strptime(fecha_hasta, "%Y-%m-%d").date()
-                query = query.filter(func.date(Inspeccion.inspeccionado_en) <= fecha_hasta_obj)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Formato de fecha_hasta inválido")
-        
-        if estado:
-            query = query.filter(Inspeccion.estado == estado)
-        
-        if id_planta:
-            query = query.filter(Inspeccion.id_planta == id_planta)
-        
-        if id_navieras:
-            query = query.filter(Inspeccion.id_navieras == id_navieras)
-        
-        if id_inspector:
-            query = query.filter(Inspeccion.id_inspector == id_inspector)
-        
-        # Ordenar y obtener resultados
-        inspecciones = query.order_by(Inspeccion.inspeccionado_en.desc()).limit(1000).all()
-        
-        if not inspecciones:
-            raise HTTPException(status_code=404, detail="No se encontraron inspecciones con los filtros aplicados")
-        
-        # Generar PDF
-        filtros = {
-            'fecha_desde': fecha_desde,
-            'fecha_hasta': fecha_hasta,
-            'estado': estado,
-            'id_planta': id_planta,
-            'id_inspector': id_inspector
-        }
-        
-        pdf_buffer = crear_pdf_inspecciones(inspecciones, filtros)
-        
+        filtros_query, filtros, conteo, filas = _preparar_exportacion(
+            db, current_user, fecha_desde, fecha_hasta, estado, id_planta, id_navieras, id_inspector
+        )
+
+        # Generar PDF en un archivo temporal (memoria acotada)
+        archivo = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        crear_pdf_inspecciones(db, filtros_query, filtros, conteo, filas, archivo)
+
         # Nombre del archivo
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"reporte_inspecciones_{timestamp}.pdf"
-        
+
         return StreamingResponse(
-            pdf_buffer,
+            _enviar_archivo(archivo),
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
-    
+
     except HTTPException:
         raise
     except Exception as e:
+        if archivo is not None:
+            archivo.close()
         raise HTTPException(status_code=500, detail=f"Error generando PDF: {str(e)}")
 
 
 @router.get("/excel")
-async def exportar_excel(
+def exportar_excel(
     fecha_desde: Optional[str] = Query(None, description="Fecha desde (YYYY-MM-DD)"),
     fecha_hasta: Optional[str] = Query(None, description="Fecha hasta (YYYY-MM-DD)"),
     estado: Optional[str] = Query(None, description="Estado: pending, approved, rejected"),
@@ -749,74 +704,34 @@ async def exportar_excel(
     id_navieras: Optional[int] = Query(None, description="ID de la naviera"),
     id_inspector: Optional[int] = Query(None, description="ID del inspector"),
     current_user: Usuario = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Genera un reporte en Excel con las inspecciones filtradas
     """
+    archivo = None
     try:
-        # Construir query base (sin JOINs, usaremos las relaciones de SQLAlchemy)
-        query = db.query(Inspeccion)
-        
-        # Filtrar por rol
-        if current_user.rol == 'inspector':
-            query = query.filter(Inspeccion.id_inspector == current_user.id_usuario)
-        
-        # Filtros adicionales
-        if fecha_desde:
-            try:
-                fecha_desde_obj = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
-                query = query.filter(func.date(Inspeccion.inspeccionado_en) >= fecha_desde_obj)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Formato de fecha_desde inválido")
-        
-        if fecha_hasta:
-            try:
-                fecha_hasta_obj = datetime.strptime(fecha_hasta, "%Y-%m-%d").date()
-                query = query.filter(func.date(Inspeccion.inspeccionado_en) <= fecha_hasta_obj)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Formato de fecha_hasta inválido")
-        
-        if estado:
-            query = query.filter(Inspeccion.estado == estado)
-        
-        if id_planta:
-            query = query.filter(Inspeccion.id_planta == id_planta)
-        
-        if id_navieras:
-            query = query.filter(Inspeccion.id_navieras == id_navieras)
-        
-        if id_inspector:
-            query = query.filter(Inspeccion.id_inspector == id_inspector)
-        
-        # Ordenar y obtener resultados
-        inspecciones = query.order_by(Inspeccion.inspeccionado_en.desc()).limit(5000).all()
-        
-        if not inspecciones:
-            raise HTTPException(status_code=404, detail="No se encontraron inspecciones con los filtros aplicados")
-        
-        # Generar Excel
-        filtros = {
-            'fecha_desde': fecha_desde,
-            'fecha_hasta': fecha_hasta,
-            'estado': estado,
-            'id_planta': id_planta,
-            'id_inspector': id_inspector
-        }
-        
-        excel_buffer = crear_excel_inspecciones(inspecciones, filtros)
-        
+        _, filtros, conteo, filas = _preparar_exportacion(
+            db, current_user, fecha_desde, fecha_hasta, estado, id_planta, id_navieras, id_inspector
+        )
+
+        # Generar Excel en un archivo temporal (memoria acotada)
+        archivo = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        crear_excel_inspecciones(filtros, conteo, filas, archivo)
+
         # Nombre del archivo
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"reporte_inspecciones_{timestamp}.xlsx"
-        
+
         return StreamingResponse(
-            excel_buffer,
+            _enviar_archivo(archivo),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
-    
+
     except HTTPException:
         raise
     except Exception as e:
+        if archivo is not None:
+            archivo.close()
         raise HTTPException(status_code=500, detail=f"Error generando Excel: {str(e)}")
@@ -8,6 +8,7 @@ from ..models import Usuario as UsuarioModel
 from ..schemas import Usuario, UsuarioCreate, UsuarioUpdate, UsuarioEstado, Message
 from ..repositories import usuario_repository
 from ..utils.auth import get_current_user, require_admin, require_supervisor
+from ..services.principal_cache import principal_cache
 
 router = APIRouter(prefix="/usuarios", tags=["Usuarios"])
 
@@ -90,7 +91,10 @@ def actualizar_usuario(
                 detail=f"Ya existe un usuario con correo '{usuario_data.correo}'"
             )
     
-    return usuario_repository.update(db, usuario, usuario_data)
+    actualizado = usuario_repository.update(db, usuario, usuario_data)
+    # Rol, estado o contraseña pueden haber cambiado
+    principal_cache.invalidate(id_usuario)
+    return actualizado
 
 
 @router.patch("/{id_usuario}/estado", response_model=Usuario)
@@ -112,7 +116,9 @@ def cambiar_estado_usuario(
             detail=f"Usuario {id_usuario} no encontrado"
         )
     
-    return usuario_repository.update_estado(db, usuario, estado_data.estado)
+    actualizado = usuario_repository.update_estado(db, usuario, estado_data.estado)
+    principal_cache.invalidate(id_usuario)
+    return actualizado
 
 
 @router.delete("/{id_usuario}", response_model=Message)
@@ -135,6 +141,7 @@ def eliminar_usuario(
     
     try:
         usuario_repository.delete(db, usuario)
+        principal_cache.invalidate(id_usuario)
         return {"mensaje": f"Usuario '{usuario.nombre}' eliminado exitosamente"}
     except Exception as e:
         raise HTTPException(
@@ -1,7 +1,8 @@
 """Schemas Pydantic para validación y serialización"""
-from pydantic import BaseModel, Field, EmailStr, ConfigDict, field_validator
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, computed_field, field_validator
 from typing import Optional, List, Literal
 from datetime import datetime
+from ..utils.images import url_derivado
 
 
 # ===== USUARIOS =====
@@ -118,6 +119,12 @@ class FotoInspeccion(FotoInspeccionBase):
     creado_en: datetime
     
     model_config = ConfigDict(from_attributes=True)
+    
+    @computed_field
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        """Miniatura generada al subir la foto (junto al original)"""
+        return url_derivado(self.foto_path, self.hash_hex, "thumb")
 
 
 # ===== INSPECCIONES =====
@@ -153,6 +160,11 @@ class InspeccionEstadoUpdate(BaseModel):
     comentario: Optional[str] = Field(None, max_length=500)
 
 
+class InspeccionesEliminar(BaseModel):
+    """Esquema para eliminar inspecciones en lote"""
+    ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
 class Inspeccion(InspeccionBase):
     """Esquema completo de inspección (respuesta)"""
     id_inspeccion: int
@@ -254,6 +266,17 @@ class ReporteCreated(BaseModel):
     mensaje: str = "Reporte PDF generado exitosamente"
 
 
+class TrabajoPDF(BaseModel):
+    """Estado de un trabajo de generación de PDF en segundo plano"""
+    id_trabajo: str
+    id_inspeccion: int
+    estado: str  # queued, running, done, failed
+    id_reporte: Optional[int] = None
+    error: Optional[str] = None
+    creado_en: datetime
+    terminado_en: Optional[datetime] = None
+
+
 # ===== PAGINACIÓN =====
 
 class PaginatedResponse(BaseModel):
@@ -265,6 +288,15 @@ class PaginatedResponse(BaseModel):
     total_pages: int
 
 
+class CursorPaginatedResponse(BaseModel):
+    """Respuesta paginada por cursor (keyset)"""
+    items: List[Inspeccion]
+    next_cursor: Optional[str] = None
+    page_size: int
+    total: Optional[int] = None
+    total_estimado: bool = False
+
+
 # ===== MENSAJES =====
 
 class Message(BaseModel):
@@ -0,0 +1,157 @@
+"""Almacén de evidencias direccionado por contenido"""
+import logging
+import os
+import shutil
+import tempfile
+from typing import Optional, Tuple
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.storage import storage, clave_de_ruta, ruta_de_clave
+from ..models import FotoInspeccion
+from ..repositories import blob_repository
+from ..utils import save_upload_to_temp, delete_file_safe, get_mime_type, generar_derivados, clave_derivado
+from ..utils.images import DERIVADOS
+
+LOG = logging.getLogger(__name__)
+
+# Prefijo de foto_path de las fotos guardadas en el almacén
+PREFIJO_BLOBS = "/capturas/blobs/"
+
+
+class BlobStore:
+    """Guarda cada archivo una sola vez en blobs/ab/cd/<sha256>.<ext>.
+
+    - Los archivos van al almacenamiento configurado (disco local o S3).
+    - La tabla blobs lleva el conteo de referencias (filas de fotos_inspeccion).
+    - Subir de nuevo una imagen idéntica solo suma una referencia.
+    - liberar() resta la referencia y, al llegar a cero, indica qué archivo
+      borrar; el borrado se hace después del commit y solo si el blob no
+      volvió a referenciarse.
+    - Los derivados (miniatura/impresión) quedan junto al blob y se comparten.
+    """
+
+    def clave_blob(self, hash_hex: str, extension: str = "") -> str:
+        """Clave del blob: dos niveles de carpetas según el hash"""
+        return f"blobs/{hash_hex[:2]}/{hash_hex[2:4]}/{hash_hex}{extension}"
+
+    async def recibir(self, upload_file: UploadFile) -> Tuple[str, str, int]:
+        """
+        Escribe el archivo subido en un temporal local (sin tocar la BD)
+
+        Returns:
+            tuple: (ruta_temporal, hash, tamaño)
+        """
+        return await save_upload_to_temp(upload_file)
+
+    async def reservar(
+        self,
+        db: AsyncSession,
+        hash_hex: str,
+        tamano: int,
+        filename: Optional[str] = None
+    ) -> Tuple[str, str, bool]:
+        """
+        Suma la referencia al blob de un contenido recibido (sin commit)
+
+        El archivo se considera nuevo si el upsert creó la fila: aunque
+        storage aún lo tenga, un borrado concurrente de la última referencia
+        puede estar por eliminarlo.
+
+        Returns:
+            tuple: (clave, ruta_relativa, nuevo). Si nuevo es True el archivo
+                aún no está almacenado y hay que llamar a almacenar().
+        """
+        ruta = ruta_de_clave(self.clave_blob(hash_hex, _extension(filename)))
+        blob = await db.run_sync(blob_repository.incrementar, hash_hex, ruta, tamano)
+        clave = clave_de_ruta(blob.ruta)
+        nuevo = blob.referencias == 1 or not await run_in_threadpool(storage.existe, clave)
+        return clave, blob.ruta, nuevo
+
+    def almacenar(self, temp_path: str, clave: str, hash_hex: str) -> None:
+        """
+        Genera los derivados desde el temporal y guarda todo bajo la clave
+
+        Los derivados se calculan antes de subir el original, así en S3 no
+        hay que volver a descargarlo. El temporal se consume. Es bloqueante:
+        desde código async llamarlo con run_in_threadpool.
+        """
+        carpeta = tempfile.mkdtemp(dir=os.path.dirname(temp_path))
+        try:
+            try:
+                derivados = generar_derivados(temp_path, hash_hex, carpeta)
+            except Exception:
+                # Sin derivados el PDF usa el original
+                LOG.warning("Error al generar derivados de %s", clave, exc_info=True)
+                derivados = {}
+            for tipo, ruta in derivados.items():
+                storage.guardar_archivo(clave_derivado(clave, hash_hex, tipo), str(ruta), "image/jpeg")
+            storage.guardar_archivo(clave, temp_path, get_mime_type(clave))
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    async def guardar(self, db: AsyncSession, upload_file: UploadFile) -> Tuple[str, str, str, bool]:
+        """
+        Guarda un archivo subido en el almacén y suma su referencia (sin commit)
+
+        Returns:
+            tuple: (clave, ruta_relativa, hash, nuevo). nuevo es False si el
+                contenido ya estaba almacenado.
+        """
+        temp_path, hash_hex, tamano = await self.recibir(upload_file)
+        try:
+            clave, relative_path, nuevo = await self.reservar(
+                db, hash_hex, tamano, upload_file.filename
+            )
+            if nuevo:
+                await run_in_threadpool(self.almacenar, temp_path, clave, hash_hex)
+        finally:
+            delete_file_safe(temp_path)
+        return clave, relative_path, hash_hex, nuevo
+
+    def liberar(self, db: Session, foto: FotoInspeccion) -> Optional[str]:
+        """
+        Resta la referencia de la foto al blob (sin commit)
+
+        Returns:
+            str: Clave a eliminar tras el commit, o None si el archivo sigue
+                en uso. Las fotos anteriores al almacén son exclusivas de su
+                fila, así que siempre se eliminan.
+        """
+        if not foto.foto_path.startswith(PREFIJO_BLOBS):
+            return clave_de_ruta(foto.foto_path)
+        ruta = blob_repository.decrementar(db, foto.hash_hex)
+        return clave_de_ruta(ruta) if ruta is not None else None
+
+    def eliminar_archivo(self, db: Session, clave: str, hash_hex: Optional[str]) -> None:
+        """
+        Elimina un archivo liberado y sus derivados (llamar tras el commit)
+
+        Un blob se vuelve a comprobar con la fila bloqueada: si otra subida
+        del mismo contenido lo referenció entre tanto, se conserva.
+        """
+        es_blob = hash_hex is not None and ruta_de_clave(clave).startswith(PREFIJO_BLOBS)
+        try:
+            if es_blob and blob_repository.bloquear(db, hash_hex) is not None:
+                return
+            claves = [clave]
+            if hash_hex:
+                claves += [clave_derivado(clave, hash_hex, tipo) for tipo in DERIVADOS]
+            for c in claves:
+                try:
+                    storage.eliminar(c)
+                except Exception:
+                    LOG.warning("Error al eliminar archivo %s", c, exc_info=True)
+        finally:
+            if es_blob:
+                db.commit()
+
+def _extension(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return ".jpg" if extension == ".jpeg" else extension
+
+
+blob_store = BlobStore()
@@ -0,0 +1,189 @@
+"""Cola de envío de emails de notificación en segundo plano"""
+import logging
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+
+from ..core.settings import settings
+
+LOG = logging.getLogger("email_queue")
+
+
+class EmailDeliveryQueue:
+    """Cola acotada con un worker que entrega los emails fuera del request.
+
+    - El request solo encola (put_nowait); si la cola está llena el mensaje se
+      descarta y se contabiliza, nunca se bloquea al llamador.
+    - El worker toma lotes de hasta batch_size mensajes y los envía por una
+      única conexión SMTP que se reutiliza entre lotes mientras siga viva.
+    - Si un envío falla se cierra la conexión y se reintenta lo pendiente del
+      lote con backoff exponencial, hasta max_retries intentos.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        maxsize: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        idle_timeout: float = 30.0,
+    ):
+        self.host = settings.SMTP_HOST if host is None else host
+        self.port = settings.SMTP_PORT if port is None else port
+        self.user = settings.SMTP_USER if user is None else user
+        self.password = settings.SMTP_PASS if password is None else password
+        self.batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+        self.max_retries = settings.EMAIL_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.EMAIL_RETRY_BACKOFF if backoff is None else backoff
+        self.idle_timeout = idle_timeout
+
+        self._queue: "queue.Queue[EmailMessage]" = queue.Queue(maxsize=maxsize or settings.EMAIL_QUEUE_MAXSIZE)
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {"enviados": 0, "fallidos": 0, "reintentos": 0, "descartados": 0, "lotes": 0}
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def enqueue(self, msg: EmailMessage) -> bool:
+        """Encola un mensaje sin bloquear. Devuelve False si se descartó."""
+        self.start()
+        try:
+            self._queue.put_nowait(msg)
+            return True
+        except queue.Full:
+            self._incr("descartados")
+            LOG.warning("Cola de emails llena (%d), se descarta: %s", self._queue.maxsize, msg["Subject"])
+            return False
+
+    def start(self) -> None:
+        """Inicia el worker si no está corriendo (idempotente)"""
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="email-queue", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Detiene el worker después de vaciar lo encolado (o al vencer timeout)"""
+        self._stop.set()
+        worker = self._worker
+        if worker:
+            worker.join(timeout)
+        self._close()
+
+    def join(self, timeout: float = 10.0) -> bool:
+        """Espera a que la cola quede vacía y procesada. Devuelve False si venció el timeout."""
+        limite = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > limite:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def metrics(self) -> Dict[str, int]:
+        """Profundidad de la cola y contadores acumulados"""
+        with self._lock:
+            datos = dict(self._stats)
+        datos["pendientes"] = self._queue.qsize()
+        datos["capacidad"] = self._queue.maxsize
+        return datos
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def _incr(self, clave: str, cantidad: int = 1) -> None:
+        with self._lock:
+            self._stats[clave] += cantidad
+
+    def _next_batch(self) -> List[EmailMessage]:
+        try:
+            primero = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        lote = [primero]
+        while len(lote) < self.batch_size:
+            try:
+                lote.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _run(self) -> None:
+        ultimo_envio = time.monotonic()
+        while not (self._stop.is_set() and self._queue.empty()):
+            lote = self._next_batch()
+            if not lote:
+                # Cerrar la conexión ociosa para no retener sockets del servidor
+                if self._smtp and time.monotonic() - ultimo_envio > self.idle_timeout:
+                    self._close()
+                continue
+            try:
+                self._send_batch(lote)
+            finally:
+                for _ in lote:
+                    self._queue.task_done()
+            ultimo_envio = time.monotonic()
+        self._close()
+
+    def _send_batch(self, lote: List[EmailMessage]) -> None:
+        pendientes = list(lote)
+        intento = 0
+        while pendientes:
+            try:
+                smtp = self._connection()
+                while pendientes:
+                    smtp.send_message(pendientes[0])
+                    pendientes.pop(0)
+                    self._incr("enviados")
+            except Exception:
+                self._close()
+                intento += 1
+                if intento > self.max_retries:
+                    self._incr("fallidos", len(pendientes))
+                    LOG.exception("Se descartan %d emails tras %d intentos", len(pendientes), intento)
+                    return
+                espera = self.backoff * (2 ** (intento - 1))
+                self._incr("reintentos")
+                LOG.warning("Fallo SMTP, reintento %d/%d en %.1fs", intento, self.max_retries, espera)
+                # Un stop() no interrumpe la espera de forma abrupta, solo la acorta
+                self._stop.wait(espera)
+        self._incr("lotes")
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except Exception:
+                self._close()
+        smtp = smtplib.SMTP(self.host, self.port, timeout=10)
+        if self.user and self.password:
+            smtp.starttls()
+            smtp.login(self.user, self.password)
+        self._smtp = smtp
+        return smtp
+
+    def _close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except Exception:
+                try:
+                    smtp.close()
+                except Exception:
+                    pass
+
+
+email_queue = EmailDeliveryQueue()
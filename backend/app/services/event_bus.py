@@ -0,0 +1,86 @@
+"""Bus de eventos en proceso para empujar notificaciones a clientes conectados (SSE)"""
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+LOG = logging.getLogger("event_bus")
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente conectado, filtrada por usuario y rol"""
+
+    def __init__(self, id_usuario: int, rol: str, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.id_usuario = id_usuario
+        self.rol = rol
+        self.loop = loop
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=maxsize)
+        self.descartados = 0
+
+    def acepta(self, destinatarios: List[Dict[str, Any]]) -> bool:
+        return any(
+            d.get("user_id") == self.id_usuario or d.get("role") == self.rol
+            for d in destinatarios
+        )
+
+    def _entregar(self, evento: Dict[str, Any]) -> None:
+        # Se ejecuta dentro del loop del cliente; un cliente lento no frena a los demás
+        try:
+            self.queue.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.descartados += 1
+
+
+class EventBus:
+    """Pub/sub en memoria del proceso.
+
+    publish() se puede llamar desde código síncrono (los endpoints def corren
+    en el threadpool): cada evento se entrega con call_soon_threadsafe en el
+    loop del suscriptor. Los clientes sin eventos no consumen nada más que su
+    cola vacía. Cada worker tiene su propio bus; los eventos llegan a los
+    clientes conectados al mismo proceso que atendió la operación.
+    """
+
+    def __init__(self, maxsize: int = 100):
+        self.maxsize = maxsize
+        self._suscripciones: Set[Suscripcion] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, id_usuario: int, rol: str) -> Suscripcion:
+        """Registra un cliente; debe llamarse desde el loop que lo atenderá"""
+        suscripcion = Suscripcion(id_usuario, rol, asyncio.get_running_loop(), self.maxsize)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def unsubscribe(self, suscripcion: Suscripcion) -> None:
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def publish(self, evento: str, data: Dict[str, Any], destinatarios: List[Dict[str, Any]]) -> int:
+        """Publica un evento a los clientes que coinciden con algún destinatario.
+
+        destinatarios: list of dicts: {"user_id": int} or {"role": "supervisor"}
+        Returns the number of clients it was delivered to.
+        """
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+        mensaje = {"event": evento, "data": data}
+        entregados = 0
+        for suscripcion in suscripciones:
+            if not suscripcion.acepta(destinatarios):
+                continue
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion._entregar, mensaje)
+                entregados += 1
+            except RuntimeError:
+                # El loop del cliente ya se cerró
+                self.unsubscribe(suscripcion)
+        return entregados
+
+    def conectados(self, rol: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(1 for s in self._suscripciones if rol is None or s.rol == rol)
+
+
+event_bus = EventBus()
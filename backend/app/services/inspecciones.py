@@ -1,16 +1,28 @@
 """Servicio para inspecciones"""
+import asyncio
 import os
+import posixpath
 from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import UploadFile, HTTPException, status
-from typing import List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from typing import Iterator, List, Optional, Tuple
 
-from ..repositories import inspeccion_repository, foto_repository
+from ..repositories import (
+    inspeccion_repository,
+    foto_repository,
+    inspeccion_repository_async,
+    foto_repository_async,
+)
 from .notification_manager import notification_manager
+from .event_bus import event_bus
+from .blob_store import blob_store, PREFIJO_BLOBS
 from ..schemas import InspeccionCreate, InspeccionUpdate
 from ..models import Inspeccion, FotoInspeccion
 from ..utils import save_upload_file, delete_file_safe, get_mime_type
 from ..core.settings import settings
+from ..core.storage import storage, clave_de_ruta
 
 
 class InspeccionService:
@@ -39,14 +51,16 @@ class InspeccionService:
             data_dict["inspeccionado_en"] = datetime.now()
         
         created = inspeccion_repository.create(db, data_dict)
+        self._publicar_evento("inspeccion_creada", created)
 
-        # Si la inspección quedó en estado 'pending', emitir notificación a revisores/admins (MVP sin DB)
+        # Si la inspección quedó en estado 'pending', emitir notificación a revisores/admins
         try:
             estado = getattr(created, "estado", None)
             if estado == "pending":
                 title = "Inspección en revisión"
                 message = f"La inspección {created.codigo} ha sido creada y está pendiente de revisión."
                 notification_manager.create(
+                    db,
                     recipients=[{"role": "supervisor"}, {"role": "admin"}],
                     title=title,
                     message=message,
@@ -79,18 +93,8 @@ class InspeccionService:
         skip = (page - 1) * page_size
         
         # Convertir fechas
-        fecha_desde_dt = None
-        fecha_hasta_dt = None
-        if fecha_desde:
-            try:
-                fecha_desde_dt = datetime.fromisoformat(fecha_desde)
-            except:
-                pass
-        if fecha_hasta:
-            try:
-                fecha_hasta_dt = datetime.fromisoformat(fecha_hasta)
-            except:
-                pass
+        fecha_desde_dt = self._parse_fecha(fecha_desde)
+        fecha_hasta_dt = self._parse_fecha(fecha_hasta)
         
         items, total = inspeccion_repository.get_all(
             db=db,
@@ -111,6 +115,81 @@ class InspeccionService:
         
         return items, total, total_pages
     
+    def listar_inspecciones_cursor(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        page_size: int = 20,
+        q: Optional[str] = None,
+        id_planta: Optional[int] = None,
+        id_navieras: Optional[int] = None,
+        estado: Optional[str] = None,
+        fecha_desde: Optional[str] = None,
+        fecha_hasta: Optional[str] = None,
+        order_by: str = "inspeccionado_en",
+        order_dir: str = "desc",
+        id_inspector: Optional[int] = None,
+        modo_total: str = "exact"
+    ) -> Tuple[List[Inspeccion], Optional[str], Optional[int]]:
+        """Lista inspecciones con paginación por cursor (latencia constante en páginas profundas)"""
+        try:
+            return inspeccion_repository.get_all_keyset(
+                db=db,
+                cursor=cursor,
+                limit=page_size,
+                q=q,
+                id_planta=id_planta,
+                id_navieras=id_navieras,
+                estado=estado,
+                fecha_desde=self._parse_fecha(fecha_desde),
+                fecha_hasta=self._parse_fecha(fecha_hasta),
+                order_by=order_by,
+                order_dir=order_dir,
+                id_inspector=id_inspector,
+                modo_total=modo_total
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    def iterar_para_exportacion(
+        self,
+        db: Session,
+        q: Optional[str] = None,
+        id_planta: Optional[int] = None,
+        id_navieras: Optional[int] = None,
+        estado: Optional[str] = None,
+        fecha_desde: Optional[str] = None,
+        fecha_hasta: Optional[str] = None,
+        order_by: str = "inspeccionado_en",
+        order_dir: str = "desc",
+        id_inspector: Optional[int] = None
+    ) -> Iterator:
+        """Itera filas planas (sin fotos) para exportaciones con los filtros del listado"""
+        return inspeccion_repository.iter_para_exportacion(
+            db=db,
+            q=q,
+            id_planta=id_planta,
+            id_navieras=id_navieras,
+            estado=estado,
+            fecha_desde=self._parse_fecha(fecha_desde),
+            fecha_hasta=self._parse_fecha(fecha_hasta),
+            order_by=order_by,
+            order_dir=order_dir,
+            id_inspector=id_inspector
+        )
+    
+    def _parse_fecha(self, fecha: Optional[str]) -> Optional[datetime]:
+        """Convierte una fecha ISO en datetime (None si no es válida)"""
+        if not fecha:
+            return None
+        try:
+            return datetime.fromisoformat(fecha)
+        except ValueError:
+            return None
+    
     def obtener_inspeccion(self, db: Session, id_inspeccion: int) -> Inspeccion:
         """Obtiene una inspección por ID"""
         inspeccion = inspeccion_repository.get_by_id(db, id_inspeccion)
@@ -121,6 +200,16 @@ class InspeccionService:
             )
         return inspeccion
     
+    async def obtener_inspeccion_async(self, db: AsyncSession, id_inspeccion: int) -> Inspeccion:
+        """Obtiene una inspección por ID (sesión async)"""
+        inspeccion = await inspeccion_repository_async.get_by_id(db, id_inspeccion)
+        if not inspeccion:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Inspección {id_inspeccion} no encontrada"
+            )
+        return inspeccion
+    
     def actualizar_inspeccion(
         self,
         db: Session,
@@ -131,11 +220,12 @@ class InspeccionService:
         inspeccion = self.obtener_inspeccion(db, id_inspeccion)
         update_dict = inspeccion_data.model_dump(exclude_unset=True)
 
-        # Detectar cambio de estado para emitir notificaciones (MVP sin DB)
+        # Detectar cambio de estado para emitir notificaciones
         old_estado = getattr(inspeccion, "estado", None)
         new_estado = update_dict.get("estado", old_estado)
 
         updated = inspeccion_repository.update(db, inspeccion, update_dict)
+        self._publicar_evento("inspeccion_actualizada", updated)
 
         # Normalizar eventos: 'pending' -> INSPECCION_EN_REVISION, 'rejected' -> INSPECCION_RECHAZADA
         try:
@@ -145,6 +235,7 @@ class InspeccionService:
                     title = "Inspección en revisión"
                     message = f"La inspección {updated.codigo} ha sido enviada para revisión."
                     notification_manager.create(
+                        db,
                         recipients=[{"role": "supervisor"}, {"role": "admin"}],
                         title=title,
                         message=message,
@@ -157,6 +248,7 @@ class InspeccionService:
                     title = "Inspección rechazada"
                     message = f"La inspección {updated.codigo} ha sido rechazada. Revise las observaciones."
                     notification_manager.create(
+                        db,
                         recipients=[{"user_id": updated.id_inspector}],
                         title=title,
                         message=message,
@@ -171,52 +263,90 @@ class InspeccionService:
 
         return updated
     
+    def _publicar_evento(self, evento: str, inspeccion: Inspeccion) -> None:
+        """Empuja el cambio a supervisores, admins y al inspector conectados por SSE"""
+        event_bus.publish(
+            evento,
+            {
+                "id_inspeccion": inspeccion.id_inspeccion,
+                "codigo": inspeccion.codigo,
+                "estado": inspeccion.estado,
+                "id_inspector": inspeccion.id_inspector,
+            },
+            [{"role": "supervisor"}, {"role": "admin"}, {"user_id": inspeccion.id_inspector}]
+        )
+    
     def eliminar_inspeccion(self, db: Session, id_inspeccion: int) -> None:
         """Elimina una inspección y sus archivos asociados"""
         inspeccion = self.obtener_inspeccion(db, id_inspeccion)
+        self._eliminar(db, [inspeccion])
+    
+    def eliminar_inspecciones(self, db: Session, ids: List[int]) -> int:
+        """
+        Elimina varias inspecciones y sus archivos en una sola transacción
         
-        # Eliminar fotos físicas
-        for foto in inspeccion.fotos:
-            # Convertir ruta relativa a absoluta
-            foto_path = foto.foto_path.replace("/capturas/", "")
-            full_path = os.path.join(settings.CAPTURAS_DIR, foto_path)
-            delete_file_safe(full_path)
+        Returns:
+            int: Cantidad de inspecciones eliminadas (los IDs inexistentes se ignoran)
+        """
+        inspecciones = inspeccion_repository.get_many_con_fotos(db, ids)
+        if inspecciones:
+            self._eliminar(db, inspecciones)
+        return len(inspecciones)
+    
+    def eliminar_anteriores_a(self, db: Session, fecha_limite: datetime, lote: int = 200) -> int:
+        """
+        Retención: elimina las inspecciones realizadas antes de fecha_limite
         
-        # Eliminar firma física
-        if inspeccion.firma_path:
-            firma_path = inspeccion.firma_path.replace("/capturas/", "")
-            full_path = os.path.join(settings.CAPTURAS_DIR, firma_path)
-            delete_file_safe(full_path)
+        Trabaja por lotes de `lote` inspecciones, con un commit por lote.
         
-        # Intentar eliminar directorio de la inspección (puede estar en cualquier fecha)
-        # La estructura es: capturas/inspecciones/dd-mm-yyyy/id_inspeccion/
-        insp_dir_base = os.path.join(settings.CAPTURAS_DIR, "inspecciones")
-        try:
-            # Buscar en todos los subdirectorios de fecha
-            if os.path.exists(insp_dir_base):
-                for fecha_dir in os.listdir(insp_dir_base):
-                    dir_path = os.path.join(insp_dir_base, fecha_dir, str(id_inspeccion))
-                    if os.path.exists(dir_path):
-                        # Eliminar archivos dentro del directorio
-                        for file in os.listdir(dir_path):
-                            file_path = os.path.join(dir_path, file)
-                            delete_file_safe(file_path)
-                        # Eliminar directorio vacío
-                        os.rmdir(dir_path)
-        except Exception as e:
-            print(f"Error al eliminar directorio de inspección: {e}")
+        Returns:
+            int: Cantidad total de inspecciones eliminadas
+        """
+        total = 0
+        while True:
+            ids = inspeccion_repository.get_ids_anteriores_a(db, fecha_limite, lote)
+            if not ids:
+                return total
+            total += self.eliminar_inspecciones(db, ids)
+    
+    def _eliminar(self, db: Session, inspecciones: List[Inspeccion]) -> None:
+        """
+        Elimina inspecciones de la BD y después sus archivos
         
-        # Eliminar de BD
-        inspeccion_repository.delete(db, inspeccion)
+        Las rutas salen de foto_path y firma_path: el costo depende de los
+        archivos de cada inspección, no de cuántas carpetas de fecha existan.
+        """
+        archivos = []
+        directorios = set()
+        for inspeccion in inspecciones:
+            # Liberar fotos: solo se borran los blobs que quedan sin referencias
+            for foto in inspeccion.fotos:
+                clave = blob_store.liberar(db, foto)
+                if clave is None:
+                    continue
+                archivos.append((clave, foto.hash_hex))
+                if not foto.foto_path.startswith(PREFIJO_BLOBS):
+                    # Fotos anteriores al almacén: capturas/inspecciones/<fecha>/<id>/
+                    directorios.add(posixpath.dirname(clave))
+            if inspeccion.firma_path:
+                archivos.append((clave_de_ruta(inspeccion.firma_path), None))
+        
+        # Eliminar de BD (incluye el conteo de referencias de los blobs)
+        inspeccion_repository.delete_many(db, inspecciones)
+        
+        for clave, hash_hex in archivos:
+            blob_store.eliminar_archivo(db, clave, hash_hex)
+        for directorio in directorios:
+            storage.eliminar_directorio_vacio(directorio)
     
     async def subir_fotos(
         self,
-        db: Session,
+        db: AsyncSession,
         id_inspeccion: int,
         archivos: List[UploadFile]
     ) -> List[FotoInspeccion]:
-        """Sube múltiples fotos para una inspección"""
-        inspeccion = self.obtener_inspeccion(db, id_inspeccion)
+        """Sube múltiples fotos para una inspección (sesión async)"""
+        inspeccion = await self.obtener_inspeccion_async(db, id_inspeccion)
         
         # Validar que la inspección no esté aprobada
         if inspeccion.estado == 'approved':
@@ -225,41 +355,66 @@ class InspeccionService:
                 detail="La evidencia es inmutable (inspección aprobada)"
             )
         
-        # Obtener fecha actual en formato dd-mm-yyyy
-        fecha_carpeta = datetime.now().strftime("%d-%m-%Y")
+        orden_actual = len(inspeccion.fotos)
+        limite = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY)
         
-        # Directorio destino organizado por fecha
-        dest_dir = os.path.join(
-            settings.CAPTURAS_DIR,
-            "inspecciones",
-            fecha_carpeta,
-            str(id_inspeccion)
-        )
+        async def recibir(archivo: UploadFile) -> Tuple[str, str, int]:
+            async with limite:
+                return await blob_store.recibir(archivo)
         
-        fotos_creadas = []
-        orden_actual = len(inspeccion.fotos)
+        # 1. Escribir todos los archivos a la vez (acotado) en temporales
+        recibidos = await asyncio.gather(*(recibir(a) for a in archivos), return_exceptions=True)
+        errores = [r for r in recibidos if isinstance(r, BaseException)]
+        if errores:
+            for recibido in recibidos:
+                if not isinstance(recibido, BaseException):
+                    delete_file_safe(recibido[0])
+            raise errores[0]
         
-        for idx, archivo in enumerate(archivos):
-            # Guardar archivo
-            full_path, relative_path, file_hash = await save_upload_file(
-                archivo,
-                dest_dir
-            )
+        # Blobs creados por esta subida: se borran juntos si algo falla
+        nuevos = []
+        try:
+            # 2. Reservar el blob de cada temporal. Una imagen repetida no se
+            # vuelve a escribir, solo suma una referencia
+            fotos_data = []
+            pendientes = []
+            for idx, (archivo, (temp_path, file_hash, tamano)) in enumerate(zip(archivos, recibidos)):
+                clave, relative_path, nuevo = await blob_store.reservar(
+                    db, file_hash, tamano, archivo.filename
+                )
+                if nuevo and all(c != clave for c, _ in nuevos):
+                    nuevos.append((clave, file_hash))
+                    pendientes.append((temp_path, clave, file_hash))
+                else:
+                    delete_file_safe(temp_path)
+                fotos_data.append({
+                    "id_inspeccion": id_inspeccion,
+                    "foto_path": relative_path,
+                    "mime_type": get_mime_type(archivo.filename),
+                    "hash_hex": file_hash,
+                    "orden": orden_actual + idx,
+                    "tomada_en": datetime.now()
+                })
             
-            # Crear registro en BD
-            foto_data = {
-                "id_inspeccion": id_inspeccion,
-                "foto_path": relative_path,
-                "mime_type": get_mime_type(archivo.filename),
-                "hash_hex": file_hash,
-                "orden": orden_actual + idx,
-                "tomada_en": datetime.now()
-            }
+            # 3. Derivados y escritura en el almacenamiento de los blobs nuevos
+            await asyncio.gather(*(
+                self._almacenar(limite, *pendiente) for pendiente in pendientes
+            ))
             
-            foto = foto_repository.create(db, foto_data)
-            fotos_creadas.append(foto)
-        
-        return fotos_creadas
+            # 4. Todas las filas (y sus referencias) en una transacción
+            return await foto_repository_async.create_many(db, fotos_data)
+        except BaseException:
+            await db.rollback()
+            for temp_path, _, _ in recibidos:
+                delete_file_safe(temp_path)
+            for clave, file_hash in nuevos:
+                await db.run_sync(blob_store.eliminar_archivo, clave, file_hash)
+            raise
+    
+    async def _almacenar(self, limite: asyncio.Semaphore, temp_path: str, clave: str, file_hash: str) -> None:
+        """Guarda un blob nuevo y sus derivados fuera del event loop"""
+        async with limite:
+            await run_in_threadpool(blob_store.almacenar, temp_path, clave, file_hash)
     
     def eliminar_foto(
         self,
@@ -286,45 +441,40 @@ class InspeccionService:
                 detail="Foto no encontrada"
             )
         
-        # Eliminar archivo físico
-        foto_path = foto.foto_path.replace("/capturas/", "")
-        full_path = os.path.join(settings.CAPTURAS_DIR, foto_path)
-        delete_file_safe(full_path)
-        
-        # Eliminar de BD
+        # Liberar la referencia al blob y eliminar de BD
+        clave = blob_store.liberar(db, foto)
         foto_repository.delete(db, foto)
+        
+        # El archivo solo se borra si ninguna otra foto lo usa
+        if clave is not None:
+            blob_store.eliminar_archivo(db, clave, foto.hash_hex)
     
     async def subir_firma(
         self,
-        db: Session,
+        db: AsyncSession,
         id_inspeccion: int,
         archivo: UploadFile
     ) -> Inspeccion:
-        """Sube firma para una inspección"""
-        inspeccion = self.obtener_inspeccion(db, id_inspeccion)
+        """Sube firma para una inspección (sesión async)"""
+        inspeccion = await self.obtener_inspeccion_async(db, id_inspeccion)
         
         # Si ya existe firma, eliminar anterior
         if inspeccion.firma_path:
-            old_firma = inspeccion.firma_path.replace("/capturas/", "")
-            old_path = os.path.join(settings.CAPTURAS_DIR, old_firma)
-            delete_file_safe(old_path)
-        
-        # Directorio destino
-        dest_dir = os.path.join(settings.CAPTURAS_DIR, "firmas")
+            await run_in_threadpool(storage.eliminar, clave_de_ruta(inspeccion.firma_path))
         
         # Nombre único para firma
         extension = os.path.splitext(archivo.filename)[1]
         filename = f"{id_inspeccion}_{int(datetime.now().timestamp())}{extension}"
         
-        # Guardar archivo
-        full_path, relative_path, _ = await save_upload_file(
+        # Guardar archivo en capturas/firmas
+        _, relative_path, _ = await save_upload_file(
             archivo,
-            dest_dir,
+            "firmas",
             filename
         )
         
         # Actualizar BD
-        return inspeccion_repository.update_firma_path(db, inspeccion, relative_path)
+        return await inspeccion_repository_async.update_firma_path(db, inspeccion, relative_path)
 
 
 inspeccion_service = InspeccionService()
@@ -3,6 +3,7 @@ import os
 import json
 import uuid
 import hashlib
+import tempfile
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
@@ -21,20 +22,13 @@ from PIL import Image as PILImage
 from ..models import Inspeccion, FotoInspeccion, Reporte
 from ..repositories.inspecciones import inspeccion_repository, foto_repository
 from ..repositories.reportes import reporte_repository
+from ..core.storage import storage, clave_de_ruta, ruta_de_clave
+from ..utils.images import clave_derivado
 
 
 class PDFGeneratorService:
     """Servicio para generar PDFs de inspecciones"""
     
-    def __init__(self):
-        # Construir ruta absoluta: subir desde pdf_generator.py -> services -> app -> backend -> proyecto raíz
-        # Path(__file__) = .../backend/app/services/pdf_generator.py
-        # .parent.parent.parent.parent = .../Planta-Fructicola (raíz del proyecto)
-        proyecto_root = Path(__file__).resolve().parent.parent.parent.parent
-        self.capturas_base = proyecto_root / "capturas"
-        self.pdf_storage_path = self.capturas_base / "reportes"
-        self.pdf_storage_path.mkdir(parents=True, exist_ok=True)
-    
     def validar_inspeccion_para_pdf(self, db: Session, id_inspeccion: int) -> tuple[bool, str]:
         """
         Valida que la inspección tenga los datos necesarios para generar PDF
@@ -110,19 +104,17 @@ class PDFGeneratorService:
         # Crear nombre de archivo
         fecha_str = datetime.now().strftime("%Y%m%d_%H%M%S")
         pdf_filename = f"reporte_{inspeccion.codigo}_{fecha_str}.pdf"
-        pdf_path = self.pdf_storage_path / pdf_filename
-        
-        # Generar PDF (pasamos el uuid_reporte para el QR; el hash aún no está disponible)
-        self._crear_pdf(inspeccion, fotos, pdf_path, uuid_corto, uuid_reporte=uuid_reporte)
         
-        # Calcular hash del PDF
-        hash_global = self._calcular_hash_pdf(pdf_path)
+        # Generar y guardar PDF (pasamos el uuid_reporte para el QR; el hash aún no está disponible)
+        pdf_ruta, hash_global = self._generar_y_guardar(
+            inspeccion, fotos, pdf_filename, uuid_corto, uuid_reporte
+        )
         
         # Guardar en BD
         reporte_data = {
             "uuid_reporte": uuid_reporte,
             "id_inspeccion": id_inspeccion,
-            "pdf_ruta": str(pdf_path),
+            "pdf_ruta": pdf_ruta,
             "hash_global": hash_global
         }
         
@@ -130,6 +122,32 @@ class PDFGeneratorService:
         
         return reporte
     
+    def _generar_y_guardar(
+        self,
+        inspeccion: Inspeccion,
+        fotos: list,
+        pdf_filename: str,
+        uuid_corto: str,
+        uuid_reporte: str
+    ) -> tuple[str, str]:
+        """
+        Genera el PDF en un temporal local y lo guarda en capturas/reportes
+        
+        Returns:
+            tuple: (ruta para BD, hash SHA-256 del PDF)
+        """
+        fd, temp_path = tempfile.mkstemp(dir=storage.directorio_temporal(), prefix=".", suffix=".pdf")
+        os.close(fd)
+        try:
+            self._crear_pdf(inspeccion, fotos, Path(temp_path), uuid_corto, uuid_reporte=uuid_reporte)
+            hash_global = self._calcular_hash_pdf(Path(temp_path))
+            clave = f"reportes/{pdf_filename}"
+            storage.guardar_archivo(clave, temp_path, "application/pdf")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return ruta_de_clave(clave), hash_global
+    
     def _crear_pdf(
         self,
         inspeccion: Inspeccion,
@@ -253,31 +271,32 @@ class PDFGeneratorService:
         
         # === FIRMA DE REVISIÓN (si existe) ===
         try:
-            firma_dir = self.capturas_base / "firmas" / "revisiones"
+            firma_dir = "firmas/revisiones"
             # Priorizar PNG, luego JPG
-            posibles = [
-                firma_dir / f"inspeccion_{inspeccion.id_inspeccion}.png",
-                firma_dir / f"inspeccion_{inspeccion.id_inspeccion}.jpg",
-                firma_dir / f"inspeccion_{inspeccion.id_inspeccion}.jpeg",
-            ]
-            firma_path = next((p for p in posibles if p.exists()), None)
+            firma_datos = None
+            for ext in (".png", ".jpg", ".jpeg"):
+                try:
+                    firma_datos = storage.leer_bytes(f"{firma_dir}/inspeccion_{inspeccion.id_inspeccion}{ext}")
+                    break
+                except FileNotFoundError:
+                    continue
 
-            if firma_path and firma_path.exists():
+            if firma_datos is not None:
                 story.append(Spacer(1, 0.2*inch))
                 story.append(Paragraph("Aprobación y Firma de Revisión", subtitulo_style))
 
                 # Cargar metadatos si existen
-                meta_path = firma_dir / f"inspeccion_{inspeccion.id_inspeccion}_revisor.json"
                 meta = None
-                if meta_path.exists():
-                    try:
-                        meta = json.loads(meta_path.read_text(encoding="utf-8"))
-                    except Exception:
-                        meta = None
+                try:
+                    meta = json.loads(storage.leer_bytes(
+                        f"{firma_dir}/inspeccion_{inspeccion.id_inspeccion}_revisor.json"
+                    ).decode("utf-8"))
+                except Exception:
+                    meta = None
 
                 # Construir imagen de firma (ajustar tamaño)
                 try:
-                    img_pil = PILImage.open(firma_path)
+                    img_pil = PILImage.open(BytesIO(firma_datos))
                     max_w = 3.0 * inch
                     ratio = img_pil.width / img_pil.height if img_pil.height else 3.0
                     width = max_w
@@ -474,17 +493,17 @@ class PDFGeneratorService:
         # Crear nuevo nombre de archivo firmado
         fecha_str = datetime.now().strftime("%Y%m%d_%H%M%S")
         pdf_filename = f"reporte_{inspeccion.codigo}_{fecha_str}_firmado.pdf"
-        pdf_path = self.pdf_storage_path / pdf_filename
 
         # Reusar el mismo uuid del reporte para mantener la referencia del QR
         uuid_corto = reporte.uuid_reporte.split('-')[0] if reporte.uuid_reporte else ""
 
         # Generar nuevo PDF (con _crear_pdf que ahora incluye sección de firma si existe)
-        self._crear_pdf(inspeccion, fotos, pdf_path, uuid_corto, uuid_reporte=reporte.uuid_reporte)
+        pdf_ruta, hash_global = self._generar_y_guardar(
+            inspeccion, fotos, pdf_filename, uuid_corto, reporte.uuid_reporte
+        )
 
-        # Calcular nuevo hash y actualizar registro
-        hash_global = self._calcular_hash_pdf(pdf_path)
-        reporte.pdf_ruta = str(pdf_path)
+        # Actualizar registro con la nueva ruta y hash
+        reporte.pdf_ruta = pdf_ruta
         reporte.hash_global = hash_global
         db.commit()
         db.refresh(reporte)
@@ -496,27 +515,28 @@ class PDFGeneratorService:
         elementos = []
         styles = getSampleStyleSheet()
         
-        # Construir ruta completa de la imagen
-        # Las rutas en BD son relativas (ej: inspecciones/28-10-2025/8/foto_1.jpg)
-        # Necesitamos construir ruta absoluta: self.capturas_base / foto.foto_path
-        foto_path = self.capturas_base / foto.foto_path if not Path(foto.foto_path).is_absolute() else Path(foto.foto_path)
+        # Las rutas en BD son relativas (ej: /capturas/inspecciones/28-10-2025/8/foto_1.jpg)
+        # y se leen del almacenamiento por su clave
+        clave = clave_de_ruta(foto.foto_path)
         
-        if foto_path.exists():
+        # Versión de impresión generada al subir la foto: ya tiene el tamaño
+        # adecuado y ReportLab incrusta el JPEG sin volver a decodificarlo
+        impresion = self._leer_foto(clave_derivado(clave, foto.hash_hex, "print")) if foto.hash_hex else None
+        original = self._leer_foto(clave) if impresion is None else None
+        
+        if impresion is not None:
             try:
-                # Abrir con PIL para redimensionar manteniendo aspecto
-                img_pil = PILImage.open(foto_path)
-                
-                # Obtener dimensiones originales
-                original_width, original_height = img_pil.size
-                
-                # Calcular nuevo tamaño manteniendo aspecto
-                aspect_ratio = original_width / original_height
-                if aspect_ratio > 1:  # Imagen horizontal
-                    new_width = int(size)
-                    new_height = int(size / aspect_ratio)
-                else:  # Imagen vertical o cuadrada
-                    new_height = int(size)
-                    new_width = int(size * aspect_ratio)
+                # Solo lee la cabecera para conocer las dimensiones
+                with PILImage.open(BytesIO(impresion)) as img_pil:
+                    new_width, new_height = self._escalar(img_pil.size, size)
+                elementos.append(Image(BytesIO(impresion), width=new_width, height=new_height))
+            except Exception as e:
+                elementos.append(Paragraph(f"[Imagen no disponible: {str(e)}]", styles['Normal']))
+        elif original is not None:
+            try:
+                # Fotos sin derivados: abrir el original y redimensionar
+                img_pil = PILImage.open(BytesIO(original))
+                new_width, new_height = self._escalar(img_pil.size, size)
                 
                 # Redimensionar
                 img_pil = img_pil.resize((new_width, new_height), PILImage.Resampling.LANCZOS)
@@ -534,7 +554,7 @@ class PDFGeneratorService:
                 # Si falla, mostrar placeholder con el error
                 elementos.append(Paragraph(f"[Imagen no disponible: {str(e)}]", styles['Normal']))
         else:
-            elementos.append(Paragraph(f"[Imagen no encontrada: {foto_path}]", styles['Normal']))
+            elementos.append(Paragraph(f"[Imagen no encontrada: {foto.foto_path}]", styles['Normal']))
         
         # Metadatos
         meta_style = ParagraphStyle(
@@ -551,6 +571,22 @@ class PDFGeneratorService:
         
         return elementos
     
+    def _leer_foto(self, clave: str) -> Optional[bytes]:
+        """Contenido de una foto del almacenamiento, o None si no existe"""
+        try:
+            return storage.leer_bytes(clave)
+        except FileNotFoundError:
+            return None
+    
+    def _escalar(self, dimensiones: tuple, size: float) -> tuple:
+        """Calcula ancho y alto que caben en size manteniendo el aspecto"""
+        original_width, original_height = dimensiones
+        aspect_ratio = original_width / original_height
+        if aspect_ratio > 1:  # Imagen horizontal
+            return int(size), int(size / aspect_ratio)
+        # Imagen vertical o cuadrada
+        return int(size * aspect_ratio), int(size)
+    
     def _calcular_hash_pdf(self, pdf_path: Path) -> str:
         """Calcula el hash SHA-256 del archivo PDF"""
         sha256 = hashlib.sha256()
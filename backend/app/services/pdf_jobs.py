@@ -0,0 +1,185 @@
+"""Generación de PDFs en segundo plano con un pool de procesos"""
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from functools import partial
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..core.database import SessionLocal, engine
+from ..core.logging import usar_handlers_directos
+from ..core.settings import settings
+from ..models import TrabajoPDF
+from ..repositories.trabajos_pdf import trabajo_pdf_repository
+from .notification_manager import notification_manager
+from .pdf_generator import pdf_generator_service
+
+LOG = logging.getLogger("pdf_jobs")
+
+
+def _inicializar_proceso() -> None:
+    """
+    Al iniciar cada proceso del pool: no reutilizar conexiones heredadas del
+    padre y escribir los logs directamente (el hilo escritor de la cola de
+    logs no existe en el hijo)
+    """
+    engine.dispose(close=False)
+    usar_handlers_directos()
+
+
+def ejecutar_trabajo(id_trabajo: str) -> bool:
+    """
+    Genera el PDF de un trabajo (se ejecuta en un proceso del pool)
+
+    El estado queda registrado en trabajos_pdf, de modo que cualquier worker
+    de la API puede consultarlo. El trabajo se reclama con un UPDATE
+    condicionado a 'queued': si dos workers lo envían, solo uno lo ejecuta.
+
+    Returns:
+        bool: True si este proceso ejecutó el trabajo
+    """
+    db = SessionLocal()
+    try:
+        if not trabajo_pdf_repository.reclamar(db, id_trabajo):
+            return False
+        trabajo = trabajo_pdf_repository.get_by_id(db, id_trabajo)
+        try:
+            reporte = pdf_generator_service.generar_pdf(db, trabajo.id_inspeccion)
+        except Exception as e:
+            db.rollback()
+            LOG.exception("Error generando PDF del trabajo %s", id_trabajo)
+            trabajo_pdf_repository.marcar_fallido(db, trabajo, str(e))
+            return True
+
+        trabajo_pdf_repository.marcar_terminado(db, trabajo, reporte.id)
+        return True
+    finally:
+        db.close()
+
+
+class PDFJobService:
+    """Encola trabajos de PDF y los ejecuta en un ProcessPoolExecutor acotado.
+
+    - encolar() valida la inspección, registra el trabajo y vuelve de inmediato.
+    - La concurrencia la limita PDF_JOB_WORKERS (procesos del pool).
+    - reanudar_pendientes() vuelve a enviar al pool los trabajos que quedaron
+      en cola o cuya ejecución superó PDF_JOB_LEASE_SECONDS (interrumpidos
+      por un reinicio).
+    - Al terminar se notifica al solicitante (bandeja + SSE).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.PDF_JOB_WORKERS
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_inicializar_proceso
+                )
+            return self._executor
+
+    def encolar(self, db: Session, id_inspeccion: int, id_usuario: Optional[int] = None) -> TrabajoPDF:
+        """
+        Registra un trabajo de PDF y lo envía al pool
+
+        Raises:
+            ValueError: Si la inspección no es válida para generar PDF
+        """
+        es_valida, mensaje = pdf_generator_service.validar_inspeccion_para_pdf(db, id_inspeccion)
+        if not es_valida:
+            raise ValueError(mensaje)
+
+        trabajo = trabajo_pdf_repository.create(db, {
+            "id": str(uuid.uuid4()),
+            "id_inspeccion": id_inspeccion,
+            "id_usuario": id_usuario,
+            "estado": "queued",
+        })
+        self._enviar(trabajo.id, id_usuario)
+        return trabajo
+
+    def obtener(self, db: Session, id_trabajo: str) -> Optional[TrabajoPDF]:
+        """Obtiene el estado de un trabajo"""
+        return trabajo_pdf_repository.get_by_id(db, id_trabajo)
+
+    def reanudar_pendientes(self) -> int:
+        """
+        Reenvía al pool los trabajos sin terminar (llamar al iniciar la aplicación)
+
+        Solo se recuperan los 'running' con el plazo vencido: los demás pueden
+        estar ejecutándose en otro worker de la API.
+        """
+        db = SessionLocal()
+        try:
+            limite = datetime.now() - timedelta(seconds=settings.PDF_JOB_LEASE_SECONDS)
+            trabajo_pdf_repository.liberar_vencidos(db, limite)
+            pendientes = trabajo_pdf_repository.get_en_cola(db)
+            for trabajo in pendientes:
+                self._enviar(trabajo.id, trabajo.id_usuario)
+            if pendientes:
+                LOG.info("Reanudados %d trabajos de PDF pendientes", len(pendientes))
+            return len(pendientes)
+        finally:
+            db.close()
+
+    def shutdown(self) -> None:
+        """Detiene el pool; los trabajos sin empezar siguen en cola en la BD"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _enviar(self, id_trabajo: str, id_usuario: Optional[int]) -> None:
+        future = self._get_executor().submit(ejecutar_trabajo, id_trabajo)
+        future.add_done_callback(partial(self._al_terminar, id_trabajo, id_usuario))
+
+    def _al_terminar(self, id_trabajo: str, id_usuario: Optional[int], future: Future) -> None:
+        """Callback en el proceso de la API: registra fallos del pool y notifica"""
+        if future.cancelled():
+            return
+        if future.exception() is None and not future.result():
+            # Lo ejecutó otro proceso, que también notifica
+            return
+        db = SessionLocal()
+        try:
+            trabajo = trabajo_pdf_repository.get_by_id(db, id_trabajo)
+            if trabajo is None:
+                return
+            if future.exception() is not None and trabajo.estado != 'failed':
+                # El proceso del pool murió antes de registrar el resultado
+                trabajo_pdf_repository.marcar_fallido(db, trabajo, str(future.exception()))
+            if id_usuario is None:
+                return
+            if trabajo.estado == 'done':
+                notification_manager.create(
+                    db,
+                    recipients=[{"user_id": id_usuario}],
+                    title="Reporte PDF listo",
+                    message=f"El PDF de la inspección {trabajo.id_inspeccion} está disponible.",
+                    link=f"/api/reportes/pdf/{trabajo.id_reporte}/descargar",
+                    payload={"id_trabajo": trabajo.id, "id_reporte": trabajo.id_reporte},
+                    event="REPORTE_PDF_LISTO"
+                )
+            elif trabajo.estado == 'failed':
+                notification_manager.create(
+                    db,
+                    recipients=[{"user_id": id_usuario}],
+                    title="Error al generar PDF",
+                    message=f"No se pudo generar el PDF de la inspección {trabajo.id_inspeccion}.",
+                    payload={"id_trabajo": trabajo.id, "error": trabajo.error},
+                    event="REPORTE_PDF_FALLIDO"
+                )
+        except Exception:
+            LOG.exception("Error procesando el resultado del trabajo de PDF %s", id_trabajo)
+        finally:
+            db.close()
+
+
+pdf_job_service = PDFJobService()
@@ -0,0 +1,60 @@
+"""Cache en memoria de los usuarios autenticados (principal) por id_usuario"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..core.settings import settings
+
+# Columnas de Usuario que se guardan; el resto (password_hash, ultimo_acceso...)
+# se carga de forma diferida solo si algún endpoint lo usa
+CAMPOS_PRINCIPAL = ("id_usuario", "nombre", "correo", "rol", "estado")
+
+
+class PrincipalCache:
+    """LRU con TTL corto de los datos de autorización de cada usuario.
+
+    Evita consultar usuarios en cada request autenticado. routers/usuarios.py
+    y el cambio de contraseña invalidan la entrada, así un cambio de estado o
+    de rol se aplica de inmediato en este proceso y, en los demás workers,
+    como máximo tras ttl_seconds.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, maxsize: Optional[int] = None):
+        self.ttl_seconds = settings.AUTH_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.maxsize = settings.AUTH_CACHE_MAXSIZE if maxsize is None else maxsize
+        self._datos: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, id_usuario: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entrada = self._datos.get(id_usuario)
+            if entrada is None:
+                return None
+            expira, principal = entrada
+            if expira < time.monotonic():
+                del self._datos[id_usuario]
+                return None
+            self._datos.move_to_end(id_usuario)
+            return principal
+
+    def set(self, usuario: Any) -> None:
+        principal = {campo: getattr(usuario, campo) for campo in CAMPOS_PRINCIPAL}
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._datos[principal["id_usuario"]] = (time.monotonic() + self.ttl_seconds, principal)
+            self._datos.move_to_end(principal["id_usuario"])
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def invalidate(self, id_usuario: int) -> None:
+        with self._lock:
+            self._datos.pop(id_usuario, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+
+principal_cache = PrincipalCache()
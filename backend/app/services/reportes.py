@@ -1,9 +1,9 @@
 """Servicio para reportes"""
 from sqlalchemy.orm import Session
 from typing import Dict, Optional
-from datetime import datetime
+from datetime import date, datetime
 
-from ..repositories import inspeccion_repository
+from ..repositories import inspeccion_repository, estadisticas_repository
 
 
 class ReporteService:
@@ -33,7 +33,26 @@ class ReporteService:
         id_navieras: Optional[int] = None,
         id_inspector: Optional[int] = None
     ) -> Dict:
-        """Obtiene resumen general de inspecciones"""
+        """
+        Obtiene resumen general de inspecciones
+
+        Si los límites de fecha son días completos (YYYY-MM-DD) o no se indican,
+        el conteo se lee del rollup estadisticas_diarias (fechas inclusivas);
+        con fecha y hora se resuelve con un GROUP BY sobre inspecciones.
+        """
+        if self._es_dia(fecha_desde) and self._es_dia(fecha_hasta):
+            conteo = {"pending": 0, "approved": 0, "rejected": 0}
+            for estado, cantidad in estadisticas_repository.get_conteo_por_estado(
+                db,
+                fecha_desde=date.fromisoformat(fecha_desde) if fecha_desde else None,
+                fecha_hasta=date.fromisoformat(fecha_hasta) if fecha_hasta else None,
+                id_planta=id_planta,
+                id_navieras=id_navieras,
+                id_inspector=id_inspector
+            ):
+                conteo[estado] = cantidad
+            return self._armar_resumen(conteo, fecha_desde, fecha_hasta)
+
         # Convertir fechas
         fecha_desde_dt = None
         fecha_hasta_dt = None
@@ -50,22 +69,35 @@ class ReporteService:
             except:
                 pass
         
-        # Obtener inspecciones filtradas
-        items, total = inspeccion_repository.get_all(
-            db=db,
-            skip=0,
-            limit=100000,  # Traer todas
+        # Conteo agrupado en SQL con los mismos filtros del listado
+        conteo = {"pending": 0, "approved": 0, "rejected": 0}
+        for estado, cantidad in inspeccion_repository.get_conteo_por_estado(
+            db,
             fecha_desde=fecha_desde_dt,
             fecha_hasta=fecha_hasta_dt,
             id_planta=id_planta,
             id_navieras=id_navieras,
             id_inspector=id_inspector
-        )
-        
-        # Calcular estadísticas
-        aprobadas = sum(1 for i in items if i.estado == 'approved')
-        pendientes = sum(1 for i in items if i.estado == 'pending')
-        rechazadas = sum(1 for i in items if i.estado == 'rejected')
+        ):
+            conteo[estado] = cantidad
+        return self._armar_resumen(conteo, fecha_desde, fecha_hasta)
+
+    def _es_dia(self, valor: Optional[str]) -> bool:
+        """Indica si el valor está vacío o es una fecha sin hora (YYYY-MM-DD)"""
+        if not valor:
+            return True
+        try:
+            date.fromisoformat(valor)
+        except ValueError:
+            return False
+        return len(valor) == 10
+
+    def _armar_resumen(self, conteo: Dict[str, int], fecha_desde: Optional[str], fecha_hasta: Optional[str]) -> Dict:
+        """Arma la respuesta del resumen a partir del conteo por estado"""
+        total = sum(conteo.values())
+        aprobadas = conteo["approved"]
+        pendientes = conteo["pending"]
+        rechazadas = conteo["rejected"]
         
         tasa_aprobacion = (aprobadas / total * 100) if total > 0 else 0
         
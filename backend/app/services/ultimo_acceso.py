@@ -0,0 +1,115 @@
+"""Registro diferido del último acceso de los usuarios"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from ..core.database import SessionLocal
+from ..core.settings import settings
+from ..models import Usuario
+
+LOG = logging.getLogger("ultimo_acceso")
+
+
+class UltimoAccesoTracker:
+    """Acumula en memoria el último acceso por usuario y lo escribe por lotes.
+
+    - registrar() no toca la BD: solo actualiza un dict en memoria.
+    - Dentro de la ventana de coalescencia un mismo usuario no se vuelve a
+      marcar, así un dashboard que hace polling no genera escrituras extra.
+    - Un hilo escribe lo pendiente cada flush_seconds con un único UPDATE
+      ejecutado en lote (executemany) y una sola transacción.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_seconds: Optional[float] = None,
+        ventana_seconds: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.flush_seconds = settings.ULTIMO_ACCESO_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.ventana_seconds = settings.ULTIMO_ACCESO_VENTANA_SECONDS if ventana_seconds is None else ventana_seconds
+
+        self._pendientes: Dict[int, datetime] = {}
+        self._ultimo_registro: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def registrar(self, id_usuario: int) -> bool:
+        """Marca el acceso del usuario. Devuelve False si se omitió por la ventana."""
+        ahora = time.monotonic()
+        with self._lock:
+            previo = self._ultimo_registro.get(id_usuario)
+            if previo is not None and ahora - previo < self.ventana_seconds:
+                return False
+            self._ultimo_registro[id_usuario] = ahora
+            self._pendientes[id_usuario] = datetime.now()
+        self.start()
+        return True
+
+    def ultimo(self, id_usuario: int) -> Optional[datetime]:
+        """Último acceso aún no escrito en la BD (None si no hay pendiente)"""
+        with self._lock:
+            return self._pendientes.get(id_usuario)
+
+    def flush(self) -> int:
+        """Escribe los accesos pendientes. Devuelve la cantidad de usuarios actualizados."""
+        with self._lock:
+            lote, self._pendientes = self._pendientes, {}
+            # Olvidar registros viejos para que el dict no crezca sin límite
+            limite = time.monotonic() - self.ventana_seconds
+            self._ultimo_registro = {k: v for k, v in self._ultimo_registro.items() if v >= limite}
+        if not lote:
+            return 0
+
+        db = self.session_factory()
+        try:
+            stmt = (
+                update(Usuario.__table__)
+                .where(Usuario.__table__.c.id_usuario == bindparam("b_id"))
+                .values(ultimo_acceso=bindparam("b_ultimo"))
+            )
+            db.execute(stmt, [{"b_id": k, "b_ultimo": v} for k, v in lote.items()])
+            db.commit()
+            return len(lote)
+        except Exception:
+            db.rollback()
+            LOG.exception("Error guardando último acceso de %d usuarios", len(lote))
+            # Reponer lo no escrito sin pisar accesos más recientes
+            with self._lock:
+                for k, v in lote.items():
+                    self._pendientes.setdefault(k, v)
+            return 0
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        """Inicia el hilo de escritura periódica si no está corriendo (idempotente)"""
+        if self._worker and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="ultimo-acceso", daemon=True)
+            self._worker.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo y escribe lo pendiente"""
+        self._stop.set()
+        if self._worker:
+            self._worker.join(self.flush_seconds + 5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+
+ultimo_acceso_tracker = UltimoAccesoTracker()
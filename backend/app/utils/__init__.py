@@ -4,9 +4,13 @@ from .files import (
     generate_unique_filename,
     calculate_file_hash,
     save_upload_file,
+    save_upload_to_temp,
+    ruta_publica,
+    ruta_local,
     delete_file_safe,
     get_mime_type
 )
+from .images import generar_derivados, eliminar_derivados, ruta_derivado, clave_derivado, url_derivado
 
 __all__ = [
     "hash_password",
@@ -15,6 +19,14 @@ __all__ = [
     "generate_unique_filename",
     "calculate_file_hash",
     "save_upload_file",
+    "save_upload_to_temp",
+    "ruta_publica",
+    "ruta_local",
     "delete_file_safe",
     "get_mime_type",
+    "generar_derivados",
+    "eliminar_derivados",
+    "ruta_derivado",
+    "clave_derivado",
+    "url_derivado",
 ]
@@ -1,15 +1,21 @@
 """Sistema de autenticación JWT"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Literal
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from ..core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from ..core.database import get_db, get_async_db
+from ..core.replica import marcar_usuario_actual
 from ..core.settings import settings
 from ..models import Usuario
 from ..schemas.auth import TokenData
+from ..services.ultimo_acceso import ultimo_acceso_tracker
+from ..services.principal_cache import principal_cache, CAMPOS_PRINCIPAL
 
 
 # Security scheme
@@ -33,6 +39,26 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+# Pool acotado para bcrypt: el hash cuesta ~250ms de CPU y no debe correr en el
+# event loop. bcrypt libera el GIL, así que los hilos sí trabajan en paralelo.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password ejecutado en el pool de bcrypt (para endpoints async)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash ejecutado en el pool de bcrypt (para endpoints async)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Crear token JWT"""
     to_encode = data.copy()
@@ -76,11 +102,25 @@ def decode_token(token: str) -> Optional[TokenData]:
         return None
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> Usuario:
-    """Obtener usuario actual desde token"""
+def _usuario_desde_cache(db: Session, id_usuario: int) -> Optional[Usuario]:
+    """Reconstruir el usuario desde principal_cache sin consultar la BD"""
+    principal = principal_cache.get(id_usuario)
+    if principal is None:
+        return None
+    return _usuario_desde_principal(db, principal)
+
+
+def _usuario_desde_principal(db: Session, principal: dict) -> Usuario:
+    """Asociar a la sesión un usuario armado con los campos del principal"""
+    usuario = Usuario(**principal)
+    # Queda como persistente en la sesión: las columnas no cacheadas
+    # (password_hash, ultimo_acceso) se cargan solo si se acceden
+    make_transient_to_detached(usuario)
+    return db.merge(usuario, load=False)
+
+
+def authenticate_token(db: Session, token: str) -> Usuario:
+    """Validar token y obtener el usuario activo (solo lectura)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar las credenciales",
@@ -88,13 +128,16 @@ async def get_current_user(
     )
     
     try:
-        token = credentials.credentials
         token_data = decode_token(token)
         
         if token_data is None:
             raise credentials_exception
         
-        usuario = db.query(Usuario).filter(Usuario.id_usuario == token_data.id_usuario).first()
+        usuario = _usuario_desde_cache(db, token_data.id_usuario)
+        if usuario is None:
+            usuario = db.query(Usuario).filter(Usuario.id_usuario == token_data.id_usuario).first()
+            if usuario is not None:
+                principal_cache.set(usuario)
         
         if usuario is None:
             raise credentials_exception
@@ -105,9 +148,56 @@ async def get_current_user(
                 detail="Usuario inactivo"
             )
         
-        # Actualizar último acceso
-        usuario.ultimo_acceso = datetime.now()
-        db.commit()
+        return usuario
+    except HTTPException:
+        raise
+    except Exception:
+        raise credentials_exception
+
+
+async def authenticate_token_async(db: Session, async_db: AsyncSession, token: str) -> Usuario:
+    """
+    Como authenticate_token, sin bloquear el event loop
+    
+    Si el usuario no está en principal_cache se consulta con la sesión
+    async. El usuario se entrega asociado a la sesión sync del request (igual
+    que desde el cache), para que los endpoints sync puedan modificarlo.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="No se pudo validar las credenciales",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    try:
+        token_data = decode_token(token)
+        
+        if token_data is None:
+            raise credentials_exception
+        
+        usuario = _usuario_desde_cache(db, token_data.id_usuario)
+        if usuario is None:
+            try:
+                encontrado = await async_db.get(Usuario, token_data.id_usuario)
+                principal = None
+                if encontrado is not None:
+                    principal_cache.set(encontrado)
+                    principal = {campo: getattr(encontrado, campo) for campo in CAMPOS_PRINCIPAL}
+            finally:
+                # Devolver la conexión async al pool: el endpoint no debe
+                # retener dos conexiones (sync y async) toda la petición
+                await async_db.close()
+            if principal is not None:
+                usuario = _usuario_desde_principal(db, principal)
+        
+        if usuario is None:
+            raise credentials_exception
+        
+        if usuario.estado != 'active':
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Usuario inactivo"
+            )
         
         return usuario
     except HTTPException:
@@ -116,6 +206,22 @@ async def get_current_user(
         raise credentials_exception
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
+) -> Usuario:
+    """Obtener usuario actual desde token (la consulta a BD, si hace falta, es async)"""
+    usuario = await authenticate_token_async(db, async_db, credentials.credentials)
+    # Lecturas posteriores a sus propias escrituras van al primario (get_read_db)
+    marcar_usuario_actual(usuario.id_usuario)
+    
+    # Último acceso: se acumula en memoria y se escribe por lotes, sin commit aquí
+    ultimo_acceso_tracker.registrar(usuario.id_usuario)
+    
+    return usuario
+
+
 async def get_current_active_user(
     current_user: Usuario = Depends(get_current_user)
 ) -> Usuario:
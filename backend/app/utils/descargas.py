@@ -0,0 +1,143 @@
+"""Respuestas de descarga con ETag, GET condicional y rangos de bytes"""
+import os
+import re
+from email.utils import formatdate
+from typing import Iterator, Optional, Tuple
+
+from fastapi import Request, status
+from fastapi.responses import Response, StreamingResponse
+
+# Tamaño de bloque al enviar un rango
+CHUNK_SIZE = 64 * 1024
+
+# Archivos direccionados por contenido: la URL cambia si cambia el contenido
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+# Archivos que pueden cambiar o requieren sesión: revalidar con el ETag
+CACHE_REVALIDAR = "private, no-cache"
+
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_fuerte(valor: str) -> str:
+    """ETag fuerte a partir de un hash de contenido"""
+    return f'"{valor}"'
+
+
+def etag_debil(ruta: str) -> str:
+    """ETag débil (fecha y tamaño) para archivos sin hash conocido"""
+    stat = os.stat(ruta)
+    return f'W/"{int(stat.st_mtime)}-{stat.st_size}"'
+
+
+def coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara If-None-Match con el ETag (comparación débil, RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    valor = etag.removeprefix("W/")
+    return any(
+        candidato.strip().removeprefix("W/") == valor
+        for candidato in if_none_match.split(",")
+    )
+
+
+def parsear_rango(header: Optional[str], tamano: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta un header Range de un solo rango
+
+    Returns:
+        tuple: (inicio, fin) inclusivos, o None si se debe enviar el archivo
+            completo (sin Range o con varios rangos)
+
+    Raises:
+        ValueError: Si el rango no se puede satisfacer (416)
+    """
+    if not header:
+        return None
+    coincidencia = _RANGO.match(header.strip())
+    if not coincidencia:
+        # Varios rangos o unidad desconocida: se ignora y se envía completo
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        if not fin or int(fin) == 0:
+            raise ValueError("Rango no satisfacible")
+        return max(tamano - int(fin), 0), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        raise ValueError("Rango no satisfacible")
+    return inicio, fin
+
+
+def _leer_rango(ruta: str, inicio: int, fin: int) -> Iterator[bytes]:
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        restante = fin - inicio + 1
+        while restante > 0:
+            bloque = f.read(min(CHUNK_SIZE, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+
+
+def respuesta_archivo(
+    request: Request,
+    ruta: str,
+    media_type: str,
+    etag: Optional[str] = None,
+    cache_control: str = CACHE_REVALIDAR,
+    filename: Optional[str] = None
+) -> Response:
+    """
+    Responde un archivo en disco con soporte de caché HTTP
+
+    - ETag (fuerte si se pasa el hash del contenido, débil si no)
+    - If-None-Match -> 304 sin cuerpo
+    - Range de un solo rango -> 206 (If-Range se respeta)
+    - HEAD -> solo headers
+
+    El archivo se lee por bloques en el threadpool (StreamingResponse con
+    un iterador síncrono).
+    """
+    tamano = os.path.getsize(ruta)
+    etag = etag or etag_debil(ruta)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        "Last-Modified": formatdate(os.path.getmtime(ruta), usegmt=True),
+    }
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    rango = None
+    if_range = request.headers.get("if-range")
+    # If-Range: solo se envía el rango si el archivo no cambió (ETag fuerte)
+    if not if_range or (if_range == etag and not etag.startswith("W/")):
+        try:
+            rango = parsear_rango(request.headers.get("range"), tamano)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{tamano}"}
+            )
+
+    inicio, fin = rango if rango is not None else (0, tamano - 1)
+    headers["Content-Length"] = str(max(fin - inicio + 1, 0))
+    codigo = status.HTTP_200_OK
+    if rango is not None:
+        codigo = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+
+    if request.method == "HEAD" or tamano == 0:
+        return Response(status_code=codigo, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        _leer_rango(ruta, inicio, fin), status_code=codigo, headers=headers, media_type=media_type
+    )
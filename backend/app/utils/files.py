@@ -1,10 +1,18 @@
 """Utilidades para manejo de archivos"""
 import os
 import hashlib
+import tempfile
 from pathlib import Path
 from datetime import datetime
-from typing import Tuple
-from fastapi import UploadFile
+from typing import BinaryIO, Optional, Tuple
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+
+from ..core.settings import settings
+from ..core.storage import storage, ruta_de_clave
+
+# Tamaño de bloque al guardar archivos subidos
+CHUNK_SIZE = 1024 * 1024
 
 
 def ensure_dir(directory: str) -> None:
@@ -26,36 +34,104 @@ def calculate_file_hash(file_content: bytes) -> str:
     return hashlib.sha256(file_content).hexdigest()
 
 
+def _escribir_bloque(destino: BinaryIO, sha256: "hashlib._Hash", bloque: bytes) -> None:
+    """Escribe un bloque y actualiza el hash (se ejecuta en el threadpool)"""
+    sha256.update(bloque)
+    destino.write(bloque)
+
+
+async def save_upload_to_temp(
+    upload_file: UploadFile,
+    destination_dir: Optional[str] = None,
+    max_size: Optional[int] = None
+) -> Tuple[str, str, int]:
+    """
+    Guarda el archivo subido en un temporal y retorna (ruta_temporal, hash, tamaño)
+    
+    El archivo se lee por bloques de CHUNK_SIZE y el SHA-256 se calcula mientras
+    se escribe. El temporal queda oculto en destination_dir (por defecto la
+    carpeta temporal del almacenamiento, para que guardar_archivo pueda moverlo
+    sin copiarlo). La E/S de disco corre en el threadpool, fuera del event loop.
+    
+    Raises:
+        HTTPException 413: Si el archivo supera max_size (por defecto MAX_FILE_SIZE)
+    """
+    limite = settings.MAX_FILE_SIZE if max_size is None else max_size
+    
+    # Rechazo inmediato si el tamaño ya se conoce
+    if upload_file.size is not None and upload_file.size > limite:
+        raise _archivo_demasiado_grande(upload_file.filename, limite)
+    
+    if destination_dir is None:
+        destination_dir = await run_in_threadpool(storage.directorio_temporal)
+    else:
+        await run_in_threadpool(ensure_dir, destination_dir)
+    fd, temp_path = await run_in_threadpool(
+        tempfile.mkstemp, dir=destination_dir, prefix=".", suffix=".part"
+    )
+    sha256 = hashlib.sha256()
+    total = 0
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            while bloque := await upload_file.read(CHUNK_SIZE):
+                total += len(bloque)
+                # Se corta a mitad de la transferencia, sin escribir el resto
+                if total > limite:
+                    raise _archivo_demasiado_grande(upload_file.filename, limite)
+                await run_in_threadpool(_escribir_bloque, destino, sha256, bloque)
+    except BaseException:
+        delete_file_safe(temp_path)
+        raise
+    
+    return temp_path, sha256.hexdigest(), total
+
+
 async def save_upload_file(
     upload_file: UploadFile,
-    destination_dir: str,
-    filename: str = None
+    prefijo: str,
+    filename: str = None,
+    max_size: Optional[int] = None
 ) -> Tuple[str, str, str]:
     """
-    Guarda archivo subido y retorna (ruta_completa, ruta_relativa, hash)
-    """
-    ensure_dir(destination_dir)
+    Guarda archivo subido en el almacenamiento y retorna (clave, ruta_relativa, hash)
     
+    prefijo es la carpeta dentro de capturas (ej: "firmas"). Se escribe por
+    bloques en un temporal (save_upload_to_temp) que al final se entrega al
+    almacenamiento: renombrado atómico en disco local, subida por partes en S3.
+    """
     # Nombre de archivo
     if not filename:
         filename = generate_unique_filename(upload_file.filename)
+    clave = f"{prefijo.strip('/')}/{filename}"
     
-    # Leer contenido
-    content = await upload_file.read()
-    
-    # Calcular hash
-    file_hash = calculate_file_hash(content)
-    
-    # Guardar archivo
-    full_path = os.path.join(destination_dir, filename)
-    with open(full_path, "wb") as f:
-        f.write(content)
+    temp_path, file_hash, _ = await save_upload_to_temp(upload_file, max_size=max_size)
+    try:
+        await run_in_threadpool(
+            storage.guardar_archivo, clave, temp_path, get_mime_type(filename)
+        )
+    except BaseException:
+        delete_file_safe(temp_path)
+        raise
     
-    # Ruta relativa para BD (debe empezar con /capturas)
+    return clave, ruta_de_clave(clave), file_hash
+
+
+def ruta_publica(full_path: str) -> str:
+    """Ruta relativa para BD (debe empezar con /capturas)"""
     relative_path = full_path.replace("\\", "/").split("capturas/")[-1]
-    relative_path = f"/capturas/{relative_path}"
-    
-    return full_path, relative_path, file_hash
+    return f"/capturas/{relative_path}"
+
+
+def ruta_local(relative_path: str) -> str:
+    """Ruta en disco de una ruta /capturas/... guardada en BD"""
+    return os.path.join(settings.CAPTURAS_DIR, relative_path.replace("/capturas/", "", 1))
+
+
+def _archivo_demasiado_grande(filename: str, limite: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"El archivo {filename} supera el tamaño máximo de {limite // (1024 * 1024)}MB"
+    )
 
 
 def delete_file_safe(file_path: str) -> bool:
@@ -78,6 +154,7 @@ def get_mime_type(filename: str) -> str:
         ".jpeg": "image/jpeg",
         ".png": "image/png",
         ".gif": "image/gif",
-        ".webp": "image/webp"
+        ".webp": "image/webp",
+        ".pdf": "application/pdf"
     }
     return mime_types.get(extension, "application/octet-stream")
@@ -0,0 +1,93 @@
+"""Derivados de las fotos de evidencia (miniatura y versión de impresión)"""
+import logging
+import os
+import posixpath
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from PIL import Image, ImageOps
+
+from ..core.settings import settings
+
+LOG = logging.getLogger(__name__)
+
+# Tipo de derivado -> lado mayor en píxeles
+DERIVADOS = {
+    "thumb": settings.FOTO_MINIATURA_PX,
+    "print": settings.FOTO_IMPRESION_PX,
+}
+
+
+def nombre_derivado(hash_hex: str, tipo: str) -> str:
+    """Nombre del derivado: se indexa por el hash del original"""
+    return f"{hash_hex}_{tipo}.jpg"
+
+
+def ruta_derivado(ruta_original: Union[str, Path], hash_hex: str, tipo: str) -> Path:
+    """Ruta del derivado, en la misma carpeta que el original"""
+    return Path(ruta_original).parent / nombre_derivado(hash_hex, tipo)
+
+
+def clave_derivado(clave_original: str, hash_hex: str, tipo: str) -> str:
+    """Clave de almacenamiento del derivado, junto a la del original"""
+    return posixpath.join(posixpath.dirname(clave_original), nombre_derivado(hash_hex, tipo))
+
+
+def url_derivado(foto_path: str, hash_hex: Optional[str], tipo: str) -> Optional[str]:
+    """URL pública del derivado a partir de foto_path (None si la foto no tiene hash)"""
+    if not hash_hex:
+        return None
+    carpeta = foto_path.replace("\\", "/").rsplit("/", 1)[0]
+    return f"{carpeta}/{nombre_derivado(hash_hex, tipo)}"
+
+
+def generar_derivados(
+    ruta_original: Union[str, Path],
+    hash_hex: str,
+    directorio: Optional[Union[str, Path]] = None
+) -> Dict[str, Path]:
+    """
+    Genera la miniatura y la versión de impresión (JPEG)
+
+    Se escriben junto al original, o en directorio si se indica (temporales
+    que luego se suben al almacenamiento).
+
+    Es trabajo de CPU bloqueante: desde código async llamarla con
+    run_in_threadpool.
+
+    Returns:
+        dict: tipo de derivado -> ruta generada
+    """
+    rutas = {}
+    with Image.open(ruta_original) as original:
+        # En JPEG decodifica directamente a una escala reducida (mucho más rápido)
+        lado_max = max(DERIVADOS.values())
+        original.draft("RGB", (lado_max, lado_max))
+        img = ImageOps.exif_transpose(original)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        # De mayor a menor: cada derivado se reduce desde el anterior
+        for tipo, lado in sorted(DERIVADOS.items(), key=lambda item: item[1], reverse=True):
+            img.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+            if directorio is not None:
+                destino = Path(directorio) / nombre_derivado(hash_hex, tipo)
+            else:
+                destino = ruta_derivado(ruta_original, hash_hex, tipo)
+            temporal = destino.with_name(destino.name + ".tmp")
+            img.save(temporal, format="JPEG", quality=85, optimize=True)
+            # Renombrado atómico: un PDF en curso nunca lee un archivo a medias
+            os.replace(temporal, destino)
+            rutas[tipo] = destino
+    return rutas
+
+
+def eliminar_derivados(ruta_original: Union[str, Path], hash_hex: Optional[str]) -> None:
+    """Elimina los derivados de una foto si existen"""
+    if not hash_hex:
+        return
+    for tipo in DERIVADOS:
+        try:
+            ruta_derivado(ruta_original, hash_hex, tipo).unlink(missing_ok=True)
+        except OSError:
+            LOG.warning("Error al eliminar derivado %s de %s", tipo, ruta_original, exc_info=True)
@@ -0,0 +1,48 @@
+"""Utilidades para paginación por cursor (keyset)"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+
+def encode_cursor(order_by: str, valor: Any, id_registro: int) -> str:
+    """
+    Codifica la posición de la última fila de una página en un cursor opaco
+
+    El cursor guarda el campo de ordenamiento, su valor y el ID como desempate,
+    de modo que la siguiente página se obtiene con un WHERE sobre el índice
+    en lugar de un OFFSET creciente.
+    """
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    payload = json.dumps([order_by, valor, id_registro], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str) -> Tuple[Any, int]:
+    """
+    Decodifica un cursor generado por encode_cursor
+
+    Raises:
+        ValueError: Si el cursor está mal formado o fue generado para otro ordenamiento
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode((cursor + padding).encode("ascii"))
+        campo, valor, id_registro = json.loads(raw.decode("utf-8"))
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+    if campo != order_by:
+        raise ValueError("El cursor no corresponde al ordenamiento solicitado")
+
+    if order_by in ("inspeccionado_en", "creado_en"):
+        try:
+            valor = datetime.fromisoformat(valor)
+        except (TypeError, ValueError):
+            raise ValueError("Cursor inválido")
+
+    if not isinstance(id_registro, (int, str)):
+        raise ValueError("Cursor inválido")
+
+    return valor, id_registro
@@ -0,0 +1,71 @@
+"""
+Benchmark de latencia: ráfaga de logins contra un servidor en ejecución
+Mide la latencia de /api/health mientras N clientes inician sesión a la vez
+
+Uso:
+    python scripts/benchmark_login.py --url http://localhost:8000 \\
+        --correo inspector@empresa.com --password password123 --logins 50
+
+El login tiene rate limiting por IP (5/minuto): para ráfagas grandes ejecute
+el servidor con el limitador deshabilitado o desde varias IPs.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+async def medir(url: str, correo: str, password: str, logins: int):
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        # Línea base sin carga
+        base = []
+        for _ in range(20):
+            inicio = time.perf_counter()
+            await client.get("/api/health")
+            base.append(time.perf_counter() - inicio)
+
+        inicio_rafaga = time.perf_counter()
+        tareas = [
+            asyncio.create_task(client.post("/api/auth/login", json={"correo": correo, "password": password}))
+            for _ in range(logins)
+        ]
+        carga = []
+        while not all(t.done() for t in tareas):
+            inicio = time.perf_counter()
+            await client.get("/api/health")
+            carga.append(time.perf_counter() - inicio)
+            await asyncio.sleep(0.01)
+        respuestas = await asyncio.gather(*tareas)
+        duracion = time.perf_counter() - inicio_rafaga
+
+    codigos = {}
+    for r in respuestas:
+        codigos[r.status_code] = codigos.get(r.status_code, 0) + 1
+
+    print("=" * 60)
+    print(f"Ráfaga de {logins} logins en {duracion:.2f}s  (códigos: {codigos})")
+    print("=" * 60)
+    for nombre, valores in (("Sin carga", base), ("Durante la ráfaga", carga)):
+        print(
+            f"{nombre:<18} /api/health  n={len(valores):<4} "
+            f"p50={statistics.median(valores) * 1000:.1f}ms "
+            f"p95={percentil(valores, 0.95) * 1000:.1f}ms "
+            f"max={max(valores) * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--correo", default="inspector@empresa.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(medir(args.url, args.correo, args.password, args.logins))
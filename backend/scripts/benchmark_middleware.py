@@ -0,0 +1,110 @@
+"""
+Benchmark del middleware de logging: peticiones/segundo antes y después
+Compara, en proceso (sin red), la misma app con:
+
+- sin middleware
+- el LoggingMiddleware anterior (BaseHTTPMiddleware, dos logs INFO con f-strings)
+- el LoggingMiddleware ASGI actual, registrando todo y con muestreo
+
+Los logs se escriben a un archivo temporal, como en producción.
+
+Uso:
+    python scripts/benchmark_middleware.py --peticiones 3000 --concurrencia 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.middleware.logging_middleware import LoggingMiddleware  # noqa: E402
+
+logger = logging.getLogger("http")
+
+
+class LoggingMiddlewareAnterior(BaseHTTPMiddleware):
+    """Implementación previa, para comparar"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        client_ip = request.client.host if request.client else "unknown"
+        method = request.method
+        path = request.url.path
+        logger.info(f"-> {method} {path} from {client_ip} [anonymous]")
+        response: Response = await call_next(request)
+        process_time = (time.time() - start_time) * 1000
+        logger.info(f"<- {response.status_code} {method} {path} ({process_time:.2f}ms)")
+        response.headers["X-Process-Time"] = f"{process_time:.2f}ms"
+        return response
+
+
+def crear_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    @app.get("/api/export")
+    async def export():
+        return StreamingResponse((b"x" * 1024 for _ in range(64)), media_type="text/csv")
+
+    return app
+
+
+async def medir(app, ruta: str, peticiones: int, concurrencia: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        pendientes = iter(range(peticiones))
+
+        async def trabajador():
+            for _ in pendientes:
+                response = await client.get(ruta)
+                assert response.status_code == 200
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        return peticiones / (time.perf_counter() - inicio)
+
+
+def main(peticiones: int, concurrencia: int) -> None:
+    directorio = tempfile.mkdtemp()
+    handler = logging.FileHandler(os.path.join(directorio, "bench.log"), encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    variantes = (
+        ("Sin middleware", lambda app: app),
+        ("BaseHTTPMiddleware (anterior)", lambda app: LoggingMiddlewareAnterior(app)),
+        ("ASGI, registra todo", lambda app: LoggingMiddleware(app, excluir=[], muestreo=1.0)),
+        ("ASGI, muestreo 10%", lambda app: LoggingMiddleware(app, excluir=[], muestreo=0.1)),
+    )
+    print("=" * 64)
+    print(f"{peticiones} peticiones, concurrencia {concurrencia}")
+    print("=" * 64)
+    for ruta in ("/api/ping", "/api/export"):
+        for nombre, envolver in variantes:
+            app = envolver(crear_app())
+            asyncio.run(medir(app, ruta, min(200, peticiones), concurrencia))  # calentamiento
+            rps = asyncio.run(medir(app, ruta, peticiones, concurrencia))
+            print(f"{ruta:<12} {nombre:<32} {rps:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peticiones", type=int, default=3000)
+    parser.add_argument("--concurrencia", type=int, default=20)
+    args = parser.parse_args()
+    main(args.peticiones, args.concurrencia)
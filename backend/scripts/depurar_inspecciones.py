@@ -0,0 +1,41 @@
+"""
+Script de retención: elimina inspecciones antiguas y sus archivos
+Pensado para ejecutarse periódicamente (cron). Borra por lotes, con un commit
+por lote, las inspecciones realizadas hace más de --dias días.
+
+Uso:
+    python scripts/depurar_inspecciones.py --dias 1825
+"""
+import sys
+import os
+import argparse
+from datetime import datetime, timedelta
+
+# Agregar el directorio padre al path para importar app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.services import inspeccion_service
+
+
+def depurar_inspecciones(dias: int, lote: int):
+    """Elimina las inspecciones anteriores a hoy - dias"""
+    fecha_limite = datetime.now() - timedelta(days=dias)
+    db = SessionLocal()
+    try:
+        eliminadas = inspeccion_service.eliminar_anteriores_a(db, fecha_limite, lote)
+        print(f"OK Inspecciones anteriores a {fecha_limite:%d-%m-%Y} eliminadas: {eliminadas}")
+    except Exception as e:
+        db.rollback()
+        print(f"\nX ERROR: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eliminar inspecciones antiguas")
+    parser.add_argument("--dias", type=int, required=True, help="Antigüedad mínima en días")
+    parser.add_argument("--lote", type=int, default=200, help="Inspecciones por transacción")
+    args = parser.parse_args()
+    depurar_inspecciones(args.dias, args.lote)
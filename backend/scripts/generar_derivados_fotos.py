@@ -0,0 +1,57 @@
+"""
+Script para generar miniatura y versión de impresión de las fotos existentes
+Las fotos subidas antes de esta versión no tienen derivados; sin ellos el PDF
+vuelve a redimensionar el original y la API entrega una thumbnail_url inexistente
+"""
+import sys
+import os
+import shutil
+import tempfile
+
+# Agregar el directorio padre al path para importar app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.core.storage import storage, clave_de_ruta
+from app.models import FotoInspeccion
+from app.utils import generar_derivados, clave_derivado
+from app.utils.images import DERIVADOS
+
+
+def generar_derivados_fotos():
+    """Recorre las fotos con hash y genera los derivados que falten"""
+    db = SessionLocal()
+    generadas = omitidas = errores = 0
+    try:
+        fotos = (
+            db.query(FotoInspeccion.foto_path, FotoInspeccion.hash_hex)
+            .filter(FotoInspeccion.hash_hex.isnot(None))
+            .yield_per(500)
+        )
+        for foto_path, hash_hex in fotos:
+            clave = clave_de_ruta(foto_path)
+            if all(storage.existe(clave_derivado(clave, hash_hex, tipo)) for tipo in DERIVADOS):
+                omitidas += 1
+                continue
+            carpeta = tempfile.mkdtemp(dir=storage.directorio_temporal())
+            try:
+                with storage.ruta_local(clave) as ruta:
+                    derivados = generar_derivados(ruta, hash_hex, carpeta)
+                for tipo, ruta_derivado in derivados.items():
+                    storage.guardar_archivo(clave_derivado(clave, hash_hex, tipo), str(ruta_derivado), "image/jpeg")
+                generadas += 1
+            except FileNotFoundError:
+                errores += 1
+                print(f"X No existe: {clave}")
+            except Exception as e:
+                errores += 1
+                print(f"X {clave}: {e}")
+            finally:
+                shutil.rmtree(carpeta, ignore_errors=True)
+        print(f"OK Derivados generados: {generadas} | ya existían: {omitidas} | errores: {errores}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    generar_derivados_fotos()
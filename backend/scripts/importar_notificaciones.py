@@ -0,0 +1,55 @@
+"""
+Script para importar el antiguo notifications.json a la tabla notificaciones
+Se puede ejecutar varias veces: las notificaciones ya importadas se omiten
+"""
+import sys
+import os
+import json
+from datetime import datetime
+
+# Agregar el directorio padre al path para importar app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.models import Notificacion
+
+
+def importar_notificaciones(ruta: str):
+    """Copia cada notificación del JSON como una fila de la tabla"""
+    with open(ruta, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+
+    db = SessionLocal()
+    try:
+        importadas = 0
+        for n in datos:
+            if db.get(Notificacion, n["id"]):
+                continue
+            destinatario = n.get("recipient") or {}
+            creado_en = datetime.fromisoformat(n["created_at"].rstrip("Z"))
+            db.add(Notificacion(
+                id=n["id"],
+                id_usuario=destinatario.get("user_id"),
+                rol=destinatario.get("role"),
+                evento=n.get("event"),
+                titulo=n.get("title") or "",
+                mensaje=n.get("message") or "",
+                link=n.get("link"),
+                payload=n.get("payload") or {},
+                leida=bool(n.get("read")),
+                creado_en=creado_en
+            ))
+            importadas += 1
+        db.commit()
+        print(f"OK {importadas} notificaciones importadas ({len(datos) - importadas} ya existían)")
+    except Exception as e:
+        db.rollback()
+        print(f"\nX ERROR: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    ruta_por_defecto = os.path.join(os.path.dirname(__file__), '..', 'app', 'notifications.json')
+    importar_notificaciones(sys.argv[1] if len(sys.argv) > 1 else ruta_por_defecto)
@@ -0,0 +1,115 @@
+"""
+Script para trasladar las fotos existentes al almacén por contenido
+Mueve cada archivo de capturas/inspecciones/<fecha>/<id>/ a
+capturas/blobs/ab/cd/<sha256> (en el almacenamiento configurado, local o S3),
+actualiza foto_path y cuenta las referencias.
+Las fotos idénticas quedan apuntando al mismo blob.
+
+Se puede ejecutar varias veces: las fotos ya migradas se omiten. Los archivos
+originales se borran solo después del commit de cada lote.
+"""
+import sys
+import os
+import shutil
+import hashlib
+import tempfile
+
+# Agregar el directorio padre al path para importar app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.core.storage import storage, clave_de_ruta, ruta_de_clave
+from app.models import FotoInspeccion
+from app.repositories import blob_repository
+from app.services.blob_store import blob_store, PREFIJO_BLOBS, _extension
+
+TAMANO_LOTE = 200
+
+
+def calcular_hash_archivo(ruta: str) -> str:
+    """SHA-256 del archivo leído por bloques"""
+    sha256 = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        while bloque := f.read(1024 * 1024):
+            sha256.update(bloque)
+    return sha256.hexdigest()
+
+
+def migrar_lote(db, fotos) -> tuple:
+    """Migra un lote de fotos; retorna (migradas, faltantes, originales_a_borrar)"""
+    migradas = faltantes = 0
+    originales = []
+    for foto in fotos:
+        origen = clave_de_ruta(foto.foto_path)
+        try:
+            with storage.ruta_local(origen) as ruta:
+                # El hash se recalcula: es la clave del blob y verifica la evidencia
+                hash_hex = calcular_hash_archivo(ruta)
+                existente = blob_repository.get_by_hash(db, hash_hex)
+                if existente is not None:
+                    destino = clave_de_ruta(existente.ruta)
+                else:
+                    destino = blob_store.clave_blob(hash_hex, _extension(origen))
+                if not storage.existe(destino):
+                    # Se guarda una copia; el original sigue en su lugar hasta el commit
+                    fd, temporal = tempfile.mkstemp(dir=storage.directorio_temporal(), suffix=".part")
+                    os.close(fd)
+                    shutil.copy2(ruta, temporal)
+                    blob_store.almacenar(temporal, destino, hash_hex)
+        except FileNotFoundError:
+            faltantes += 1
+            print(f"X No existe: {origen}")
+            continue
+
+        if foto.hash_hex and foto.hash_hex != hash_hex:
+            print(f"! Hash distinto al registrado en foto {foto.id_foto}: se usa el del archivo")
+
+        blob_repository.incrementar(db, hash_hex, ruta_de_clave(destino), storage.tamano(destino))
+        originales.append((origen, foto.hash_hex))
+        foto.foto_path = ruta_de_clave(destino)
+        foto.hash_hex = hash_hex
+        migradas += 1
+    return migradas, faltantes, originales
+
+
+def migrar_blobs():
+    """Recorre las fotos fuera del almacén por lotes de TAMANO_LOTE"""
+    db = SessionLocal()
+    total_migradas = total_faltantes = 0
+    ultimo_id = 0
+    try:
+        while True:
+            fotos = (
+                db.query(FotoInspeccion)
+                .filter(
+                    FotoInspeccion.id_foto > ultimo_id,
+                    ~FotoInspeccion.foto_path.startswith(PREFIJO_BLOBS)
+                )
+                .order_by(FotoInspeccion.id_foto)
+                .limit(TAMANO_LOTE)
+                .all()
+            )
+            if not fotos:
+                break
+            ultimo_id = fotos[-1].id_foto
+
+            migradas, faltantes, originales = migrar_lote(db, fotos)
+            db.commit()
+            total_migradas += migradas
+            total_faltantes += faltantes
+
+            for origen, hash_anterior in originales:
+                blob_store.eliminar_archivo(db, origen, hash_anterior)
+            print(f"  ... {total_migradas} fotos migradas")
+
+        print(f"OK Fotos migradas: {total_migradas} | archivos faltantes: {total_faltantes}")
+    except Exception as e:
+        db.rollback()
+        print(f"\nX ERROR: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrar_blobs()
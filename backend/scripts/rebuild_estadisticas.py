@@ -0,0 +1,30 @@
+"""
+Script para reconstruir la tabla estadisticas_diarias desde inspecciones
+Útil tras cargas masivas o correcciones manuales hechas fuera de la API
+"""
+import sys
+import os
+
+# Agregar el directorio padre al path para importar app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.repositories import estadisticas_repository
+
+
+def reconstruir_estadisticas():
+    """Vacía y vuelve a poblar el rollup diario en una transacción"""
+    db = SessionLocal()
+    try:
+        filas = estadisticas_repository.reconstruir(db)
+        print(f"OK Rollup reconstruido: {filas} filas diarias")
+    except Exception as e:
+        db.rollback()
+        print(f"\nX ERROR: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    reconstruir_estadisticas()
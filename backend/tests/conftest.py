@@ -1,11 +1,22 @@
 """Configuración de pytest"""
+import asyncio
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+# /api/metrics está deshabilitado por defecto; los tests lo ejercitan
+os.environ.setdefault("METRICS_ENABLED", "true")
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_read_db, get_async_db
+from app.core.metrics import instrumentar_engine
+from app.core.replica import escrituras_recientes
+from app.services.principal_cache import principal_cache
 
 # Base de datos de prueba en memoria
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -14,11 +25,39 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrumentar_engine(engine, "test")
+
+# Motor async sobre la misma base (aiosqlite), para endpoints con get_async_db.
+# Sin pool: cada asyncio.run / TestClient usa su propio event loop
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test.db", poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession, bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+def run_async(funcion, *args, **kwargs):
+    """Ejecuta funcion(db_async, ...) en una sesión async y hace commit"""
+    async def ejecutar():
+        async with TestingAsyncSessionLocal() as db:
+            resultado = await funcion(db, *args, **kwargs)
+            await db.commit()
+            return resultado
+    return asyncio.run(ejecutar())
 
 
 @pytest.fixture
 def db_session():
     """Crea una sesión de BD para tests"""
+    # Cada test recrea la BD: no reutilizar usuarios cacheados de otro test
+    principal_cache.clear()
+    escrituras_recientes.clear()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
@@ -38,5 +77,7 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     yield TestClient(app)
     app.dependency_overrides.clear()
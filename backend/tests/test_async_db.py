@@ -0,0 +1,82 @@
+"""Tests para los repositorios async (AsyncSession)"""
+from datetime import datetime
+
+from app.models import Planta, Naviera, Usuario, Inspeccion, FotoInspeccion
+from app.repositories import (
+    inspeccion_repository_async,
+    foto_repository_async,
+    reporte_repository_async,
+)
+from app.utils.auth import create_access_token, get_password_hash
+from tests.conftest import run_async
+
+
+def crear_inspecciones(db):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db.add_all([
+        Planta(id_planta=1, codigo="P1", nombre="Planta Norte"),
+        Naviera(id_navieras=1, codigo="N1", nombre="Maersk"),
+        Usuario(id_usuario=1, nombre="Ana", correo="ana@example.com", rol="inspector",
+                password_hash=get_password_hash("Ana12345!")),
+    ])
+    db.commit()
+    db.add_all([
+        Inspeccion(
+            id_inspeccion=i, codigo=f"INS_{i}", numero_contenedor=f"CONT-00{i}", id_planta=1,
+            id_navieras=1, id_inspector=1, estado=estado, inspeccionado_en=datetime(2025, 5, i)
+        )
+        for i, estado in ((1, "pending"), (2, "approved"), (3, "pending"))
+    ])
+    db.add(FotoInspeccion(id_foto=1, id_inspeccion=1, foto_path="/capturas/a.jpg", orden=0))
+    db.commit()
+
+
+def test_get_by_id_carga_relaciones(db_session):
+    crear_inspecciones(db_session)
+
+    inspeccion = run_async(inspeccion_repository_async.get_by_id, 1)
+
+    # Cargadas en la query: accesibles fuera de la sesión
+    assert inspeccion.planta.nombre == "Planta Norte"
+    assert inspeccion.inspector.correo == "ana@example.com"
+    assert [f.foto_path for f in inspeccion.fotos] == ["/capturas/a.jpg"]
+
+
+def test_get_all_aplica_filtros_y_orden(db_session):
+    crear_inspecciones(db_session)
+
+    items, total = run_async(inspeccion_repository_async.get_all, estado="pending", order_dir="asc")
+
+    assert total == 2
+    assert [i.codigo for i in items] == ["INS_1", "INS_3"]
+
+
+def test_fotos_y_reportes(db_session):
+    crear_inspecciones(db_session)
+
+    fotos = run_async(foto_repository_async.create_many, [
+        {"id_foto": 2, "id_inspeccion": 2, "foto_path": "/capturas/b.jpg", "orden": 1},
+        {"id_foto": 3, "id_inspeccion": 2, "foto_path": "/capturas/c.jpg", "orden": 0},
+    ])
+    assert [f.id_foto for f in fotos] == [2, 3]
+    assert [f.id_foto for f in run_async(foto_repository_async.get_by_inspeccion, 2)] == [3, 2]
+
+    run_async(reporte_repository_async.create, {
+        "id": 1, "uuid_reporte": "r-1", "id_inspeccion": 2,
+        "pdf_ruta": "/capturas/reportes/r-1.pdf", "hash_global": "0" * 64,
+    })
+    reporte = run_async(reporte_repository_async.get_by_uuid, "r-1")
+    assert reporte.id_inspeccion == 2
+
+
+def test_login_y_me_por_sesion_async(client, db_session):
+    crear_inspecciones(db_session)
+
+    # Login fallido: la búsqueda del usuario y el conteo de intentos van por la sesión async
+    response = client.post("/api/auth/login", json={"correo": "ana@example.com", "password": "Incorrecta1!"})
+    assert response.status_code == 401
+
+    token = create_access_token({"sub": "1", "correo": "ana@example.com", "rol": "inspector", "nombre": "Ana"})
+    response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["correo"] == "ana@example.com"
@@ -0,0 +1,132 @@
+"""Tests para el almacén de evidencias por contenido"""
+import hashlib
+import logging
+import os
+from datetime import datetime
+from io import BytesIO
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.settings import settings
+from app.core.storage import storage
+from app.models import Planta, Naviera, Usuario, Inspeccion, FotoInspeccion, BlobEvidencia
+from app.services.blob_store import blob_store
+from app.services.inspecciones import inspeccion_service
+from tests.conftest import run_async
+
+CONTENIDO = b"\xff\xd8\xff" + b"imagen de prueba" * 100
+HASH = hashlib.sha256(CONTENIDO).hexdigest()
+
+
+@pytest.fixture
+def capturas(tmp_path, monkeypatch):
+    directorio = tmp_path / "capturas"
+    monkeypatch.setattr(settings, "CAPTURAS_DIR", str(directorio))
+    return directorio
+
+
+def guardar(db, nombre="foto.jpeg"):
+    archivo = UploadFile(file=BytesIO(CONTENIDO), filename=nombre)
+    resultado = run_async(blob_store.guardar, archivo)
+    db.expire_all()
+    return resultado
+
+
+def test_contenido_repetido_se_guarda_una_vez(db_session, capturas):
+    clave, relative_path, hash_hex, nuevo = guardar(db_session)
+    segundo = guardar(db_session, "reintento.jpg")
+
+    assert hash_hex == HASH
+    assert clave == f"blobs/{HASH[:2]}/{HASH[2:4]}/{HASH}.jpg"
+    assert relative_path == f"/capturas/{clave}"
+    assert nuevo is True
+    assert segundo == (clave, relative_path, HASH, False)
+    assert db_session.get(BlobEvidencia, HASH).referencias == 2
+    # Un solo archivo y ningún temporal (no es una imagen válida: sin derivados)
+    archivos = [os.path.join(raiz, f) for raiz, _, nombres in os.walk(capturas) for f in nombres]
+    assert archivos == [os.path.join(str(capturas), clave)]
+
+
+def test_eliminar_foto_borra_blob_con_la_ultima_referencia(db_session, capturas):
+    db_session.add_all([
+        Planta(id_planta=1, codigo="P1", nombre="Planta Norte"),
+        Naviera(id_navieras=1, codigo="N1", nombre="Maersk"),
+        Usuario(id_usuario=1, nombre="Ana", correo="ana@example.com", rol="inspector"),
+    ])
+    db_session.commit()
+    db_session.add(Inspeccion(
+        id_inspeccion=1, codigo="INS_1", numero_contenedor="CONT-001", id_planta=1,
+        id_navieras=1, id_inspector=1, estado="pending", inspeccionado_en=datetime(2025, 5, 1)
+    ))
+    clave, relative_path, _, _ = guardar(db_session)
+    full_path = capturas / clave
+    guardar(db_session)
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    for id_foto in (1, 2):
+        db_session.add(FotoInspeccion(
+            id_foto=id_foto, id_inspeccion=1, foto_path=relative_path, hash_hex=HASH
+        ))
+    db_session.commit()
+
+    inspeccion_service.eliminar_foto(db_session, 1, 1)
+    assert os.path.exists(full_path)
+    assert db_session.get(BlobEvidencia, HASH).referencias == 1
+
+    inspeccion_service.eliminar_foto(db_session, 1, 2)
+    assert not os.path.exists(full_path)
+    assert db_session.get(BlobEvidencia, HASH) is None
+
+
+def test_liberar_foto_anterior_al_almacen(db_session, capturas):
+    foto = FotoInspeccion(foto_path="/capturas/inspecciones/01-05-2025/1/foto.jpg", hash_hex=HASH)
+
+    clave = blob_store.liberar(db_session, foto)
+
+    assert clave == "inspecciones/01-05-2025/1/foto.jpg"
+
+
+def test_blob_recreado_se_vuelve_a_almacenar(db_session, capturas):
+    clave, _, _, _ = guardar(db_session)
+    # La última referencia se liberó y el archivo aún no se borró
+    db_session.delete(db_session.get(BlobEvidencia, HASH))
+    db_session.commit()
+    assert os.path.exists(capturas / clave)
+
+    assert guardar(db_session)[3] is True
+
+
+def test_no_se_borra_un_blob_referenciado_de_nuevo(db_session, capturas):
+    clave, _, _, _ = guardar(db_session)
+    # Otra subida referenció el contenido después de liberar la última foto
+    blob_store.eliminar_archivo(db_session, clave, HASH)
+    assert os.path.exists(capturas / clave)
+
+    db_session.delete(db_session.get(BlobEvidencia, HASH))
+    db_session.commit()
+    blob_store.eliminar_archivo(db_session, clave, HASH)
+    assert not os.path.exists(capturas / clave)
+
+
+def test_error_en_derivados_se_registra_en_el_log(db_session, capturas, caplog):
+    caplog.set_level(logging.WARNING, logger="app.services.blob_store")
+
+    clave, _, _, _ = guardar(db_session)
+
+    [registro] = [r for r in caplog.records if r.name == "app.services.blob_store"]
+    assert registro.getMessage() == f"Error al generar derivados de {clave}"
+    assert registro.exc_info is not None
+
+
+def test_error_al_eliminar_blob_se_registra_en_el_log(db_session, capturas, caplog, monkeypatch):
+    caplog.set_level(logging.WARNING, logger="app.services.blob_store")
+
+    def fallar(clave):
+        raise PermissionError(clave)
+
+    monkeypatch.setattr(storage, "eliminar", fallar)
+    blob_store.eliminar_archivo(db_session, "inspecciones/01-05-2025/1/foto.jpg", None)
+
+    [registro] = [r for r in caplog.records if r.name == "app.services.blob_store"]
+    assert registro.getMessage() == "Error al eliminar archivo inspecciones/01-05-2025/1/foto.jpg"
+    assert registro.exc_info[0] is PermissionError
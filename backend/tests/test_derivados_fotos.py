@@ -0,0 +1,70 @@
+"""Tests para los derivados de fotos (miniatura y versión de impresión)"""
+from datetime import datetime
+
+from PIL import Image as PILImage
+
+from app.core.settings import settings
+from app.models import FotoInspeccion
+from app.schemas import FotoInspeccion as FotoInspeccionSchema
+from app.services.pdf_generator import pdf_generator_service
+from app.utils import generar_derivados, eliminar_derivados
+from app.utils.images import DERIVADOS
+
+HASH = "ab" * 32
+
+
+def crear_original(carpeta, ancho=3000, alto=2000):
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = carpeta / "foto.jpg"
+    PILImage.new("RGB", (ancho, alto), (120, 30, 200)).save(ruta, format="JPEG")
+    return ruta
+
+
+def test_generar_derivados_junto_al_original(tmp_path):
+    original = crear_original(tmp_path / "inspecciones" / "01-05-2025" / "7")
+
+    rutas = generar_derivados(original, HASH)
+
+    assert set(rutas) == {"thumb", "print"}
+    for tipo, ruta in rutas.items():
+        assert ruta.parent == original.parent
+        assert ruta.name == f"{HASH}_{tipo}.jpg"
+        with PILImage.open(ruta) as img:
+            assert max(img.size) == DERIVADOS[tipo]
+            assert img.size[0] > img.size[1]  # mantiene el aspecto
+
+    eliminar_derivados(original, HASH)
+    assert not any(ruta.exists() for ruta in rutas.values())
+    assert original.exists()
+
+
+def test_schema_expone_thumbnail_url():
+    foto = FotoInspeccion(
+        id_foto=1, id_inspeccion=7, foto_path="/capturas/inspecciones/01-05-2025/7/foto.jpg",
+        mime_type="image/jpeg", hash_hex=HASH, orden=0, creado_en=datetime.now()
+    )
+    datos = FotoInspeccionSchema.model_validate(foto).model_dump()
+    assert datos["thumbnail_url"] == f"/capturas/inspecciones/01-05-2025/7/{HASH}_thumb.jpg"
+
+    foto.hash_hex = None
+    assert FotoInspeccionSchema.model_validate(foto).thumbnail_url is None
+
+
+def test_pdf_usa_version_de_impresion(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CAPTURAS_DIR", str(tmp_path))
+    original = crear_original(tmp_path / "inspecciones" / "01-05-2025" / "7")
+    generar_derivados(original, HASH)
+    foto = FotoInspeccion(
+        id_foto=1, foto_path="/capturas/inspecciones/01-05-2025/7/foto.jpg", hash_hex=HASH
+    )
+
+    # Si el PDF abriera el original para redimensionarlo, fallaría aquí
+    def no_redimensionar(*args, **kwargs):
+        raise AssertionError("no debe redimensionar el original")
+
+    monkeypatch.setattr(PILImage.Image, "resize", no_redimensionar)
+    imagen = pdf_generator_service._crear_celda_foto(foto, 180)[0]
+
+    # Se incrustó la versión de impresión, no el original de 3000x2000
+    assert (imagen.imageWidth, imagen.imageHeight) == (DERIVADOS["print"], DERIVADOS["print"] * 2 // 3)
+    assert (imagen.drawWidth, imagen.drawHeight) == (180, 120)
@@ -0,0 +1,112 @@
+"""Tests de caché HTTP (ETag, 304) y rangos en descargas de evidencias y PDFs"""
+import hashlib
+
+import pytest
+
+from app.core.settings import settings
+from app.main import app
+from app.models import Reporte, Usuario
+from app.utils.auth import get_current_user
+
+FOTO = b"\xff\xd8\xff" + b"evidencia" * 100
+HASH_FOTO = hashlib.sha256(FOTO).hexdigest()
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 40
+HASH_PDF = hashlib.sha256(PDF).hexdigest()
+
+
+@pytest.fixture
+def capturas(tmp_path, monkeypatch):
+    directorio = tmp_path / "capturas"
+    monkeypatch.setattr(settings, "CAPTURAS_DIR", str(directorio))
+    return directorio
+
+
+def escribir(capturas, clave, contenido):
+    ruta = capturas / clave
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_bytes(contenido)
+
+
+def test_blob_con_etag_de_hash_e_inmutable(client, capturas):
+    clave = f"blobs/{HASH_FOTO[:2]}/{HASH_FOTO[2:4]}/{HASH_FOTO}.jpg"
+    escribir(capturas, clave, FOTO)
+
+    response = client.get(f"/capturas/{clave}")
+    assert response.status_code == 200
+    assert response.content == FOTO
+    assert response.headers["etag"] == f'"{HASH_FOTO}"'
+    assert response.headers["content-type"] == "image/jpeg"
+    assert "immutable" in response.headers["cache-control"]
+
+    repetida = client.get(f"/capturas/{clave}", headers={"If-None-Match": f'"{HASH_FOTO}"'})
+    assert repetida.status_code == 304
+    assert repetida.content == b""
+
+
+def test_foto_anterior_al_almacen_se_revalida(client, capturas):
+    escribir(capturas, "inspecciones/01-05-2025/1/foto.jpg", FOTO)
+
+    response = client.get("/capturas/inspecciones/01-05-2025/1/foto.jpg")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    repetida = client.get(
+        "/capturas/inspecciones/01-05-2025/1/foto.jpg",
+        headers={"If-None-Match": response.headers["etag"]}
+    )
+    assert repetida.status_code == 304
+    assert client.get("/capturas/%2E%2E/secreto.txt").status_code == 404
+
+
+def test_pdf_con_etag_y_rangos(client, db_session, capturas):
+    db_session.add(Reporte(
+        id=1, uuid_reporte="uuid-1", id_inspeccion=1,
+        pdf_ruta="/capturas/reportes/reporte_INS_1.pdf", hash_global=HASH_PDF
+    ))
+    db_session.commit()
+    escribir(capturas, "reportes/reporte_INS_1.pdf", PDF)
+    app.dependency_overrides[get_current_user] = lambda: Usuario(id_usuario=1, rol="admin")
+
+    response = client.get("/api/reportes/pdf/1/descargar")
+    assert response.status_code == 200
+    assert response.content == PDF
+    assert response.headers["etag"] == f'"{HASH_PDF}"'
+    assert response.headers["accept-ranges"] == "bytes"
+
+    assert client.get(
+        "/api/reportes/pdf/1/descargar", headers={"If-None-Match": f'"{HASH_PDF}"'}
+    ).status_code == 304
+
+    parcial = client.get("/api/reportes/pdf/1/descargar", headers={"Range": "bytes=100-199"})
+    assert parcial.status_code == 206
+    assert parcial.content == PDF[100:200]
+    assert parcial.headers["content-range"] == f"bytes 100-199/{len(PDF)}"
+
+    final = client.get("/api/reportes/pdf/1/descargar", headers={"Range": "bytes=-50"})
+    assert final.content == PDF[-50:]
+
+    # If-Range con otro ETag: el archivo cambió, se envía completo
+    otro = client.get(
+        "/api/reportes/pdf/1/descargar", headers={"Range": "bytes=0-9", "If-Range": '"otro"'}
+    )
+    assert otro.status_code == 200 and otro.content == PDF
+
+    fuera = client.get("/api/reportes/pdf/1/descargar", headers={"Range": f"bytes={len(PDF)}-"})
+    assert fuera.status_code == 416
+    assert fuera.headers["content-range"] == f"bytes */{len(PDF)}"
+
+
+@pytest.mark.parametrize("url", [
+    "/capturas//etc/passwd",
+    "/capturas/%2Fetc%2Fpasswd",
+    "/capturas/..%5C..%5Cetc%5Cpasswd",
+    "/capturas/inspecciones%5Cfoto.jpg",
+])
+def test_claves_fuera_de_capturas_no_se_sirven(client, capturas, url):
+    escribir(capturas, "inspecciones/foto.jpg", FOTO)
+
+    response = client.get(url)
+
+    assert response.status_code == 404
+    assert b"root:" not in response.content
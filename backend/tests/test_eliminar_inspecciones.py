@@ -0,0 +1,95 @@
+"""Tests para la eliminación de inspecciones y sus archivos"""
+import os
+from datetime import date, datetime
+
+import pytest
+
+from app.core.settings import settings
+from app.models import Planta, Naviera, Usuario, Inspeccion, FotoInspeccion, BlobEvidencia, EstadisticaDiaria
+from app.repositories import blob_repository, estadisticas_repository
+from app.services.inspecciones import inspeccion_service
+
+HASH = "cd" * 32
+
+
+@pytest.fixture
+def capturas(db_session, tmp_path, monkeypatch):
+    directorio = tmp_path / "capturas"
+    monkeypatch.setattr(settings, "CAPTURAS_DIR", str(directorio))
+    db_session.add_all([
+        Planta(id_planta=1, codigo="P1", nombre="Planta Norte"),
+        Naviera(id_navieras=1, codigo="N1", nombre="Maersk"),
+        Usuario(id_usuario=1, nombre="Ana", correo="ana@example.com", rol="inspector"),
+    ])
+    db_session.commit()
+    return directorio
+
+
+def crear_inspeccion(db, id_inspeccion, fecha, fotos):
+    db.add(Inspeccion(
+        id_inspeccion=id_inspeccion, codigo=f"INS_{id_inspeccion}", numero_contenedor="CONT-001",
+        id_planta=1, id_navieras=1, id_inspector=1, estado="pending", inspeccionado_en=fecha
+    ))
+    for id_foto, foto_path in fotos:
+        db.add(FotoInspeccion(id_foto=id_foto, id_inspeccion=id_inspeccion, foto_path=foto_path, hash_hex=HASH))
+    db.commit()
+
+
+def crear_archivo(capturas, foto_path):
+    ruta = capturas / foto_path.replace("/capturas/", "")
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_bytes(b"x")
+    return ruta
+
+
+def test_no_recorre_carpetas_de_fechas(db_session, capturas, monkeypatch):
+    antigua = "/capturas/inspecciones/01-05-2020/1/foto.jpg"
+    archivo = crear_archivo(capturas, antigua)
+    # Carpetas de otros días que antes se revisaban una por una
+    for dia in range(1, 29):
+        (capturas / "inspecciones" / f"{dia:02d}-02-2020").mkdir(parents=True)
+    crear_inspeccion(db_session, 1, datetime(2020, 5, 1), [(1, antigua)])
+
+    def listdir_prohibido(*args):
+        raise AssertionError("no debe listar directorios")
+
+    monkeypatch.setattr(os, "listdir", listdir_prohibido)
+    inspeccion_service.eliminar_inspeccion(db_session, 1)
+
+    assert not archivo.exists()
+    assert not archivo.parent.exists()
+    assert db_session.get(Inspeccion, 1) is None
+
+
+def test_eliminar_en_lote_con_blob_compartido(db_session, capturas):
+    blob = f"/capturas/blobs/cd/cd/{HASH}.jpg"
+    archivo = crear_archivo(capturas, blob)
+    blob_repository.incrementar(db_session, HASH, blob, 1)
+    blob_repository.incrementar(db_session, HASH, blob, 1)
+    blob_repository.incrementar(db_session, HASH, blob, 1)
+    crear_inspeccion(db_session, 1, datetime(2025, 5, 1), [(1, blob)])
+    crear_inspeccion(db_session, 2, datetime(2025, 5, 1), [(2, blob)])
+    crear_inspeccion(db_session, 3, datetime(2025, 5, 2), [(3, blob)])
+    estadisticas_repository.reconstruir(db_session)
+
+    assert inspeccion_service.eliminar_inspecciones(db_session, [1, 2, 999]) == 2
+
+    assert archivo.exists()
+    assert db_session.get(BlobEvidencia, HASH).referencias == 1
+    # El rollup diario queda igual que si se reconstruyera
+    filas = db_session.query(EstadisticaDiaria.fecha, EstadisticaDiaria.total).filter(EstadisticaDiaria.total > 0).all()
+    assert filas == [(date(2025, 5, 2), 1)]
+
+
+def test_retencion_por_lotes(db_session, capturas):
+    for i in range(1, 6):
+        foto_path = f"/capturas/inspecciones/0{i}-01-2019/{i}/foto.jpg"
+        crear_archivo(capturas, foto_path)
+        crear_inspeccion(db_session, i, datetime(2019, 1, i), [(i, foto_path)])
+    crear_inspeccion(db_session, 6, datetime(2025, 1, 1), [])
+
+    eliminadas = inspeccion_service.eliminar_anteriores_a(db_session, datetime(2024, 1, 1), lote=2)
+
+    assert eliminadas == 5
+    assert [i.id_inspeccion for i in db_session.query(Inspeccion).all()] == [6]
+    assert list((capturas / "inspecciones").glob("*/*/*")) == []
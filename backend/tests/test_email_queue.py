@@ -0,0 +1,97 @@
+"""Tests para la cola de envío de emails contra un servidor SMTP local (aiosmtpd)"""
+import time
+import socket
+from email.message import EmailMessage
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+from app.services.email_queue import EmailDeliveryQueue
+
+
+class Buzon:
+    """Handler de aiosmtpd que guarda los mensajes recibidos"""
+
+    def __init__(self):
+        self.mensajes = []
+        self.conexiones = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.conexiones += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.mensajes.append(envelope.content)
+        return "250 OK"
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_local():
+    buzon = Buzon()
+    controller = Controller(buzon, hostname="127.0.0.1", port=puerto_libre())
+    controller.start()
+    yield buzon, controller.port
+    controller.stop()
+
+
+def mensaje(i):
+    msg = EmailMessage()
+    msg["Subject"] = f"Notificación {i}"
+    msg["From"] = "no-reply@example.com"
+    msg["To"] = "no-reply@example.com"
+    msg.set_content("cuerpo")
+    return msg
+
+
+def test_envio_en_lote_reutiliza_conexion(smtp_local):
+    buzon, port = smtp_local
+    cola = EmailDeliveryQueue(host="127.0.0.1", port=port, user="", password="", batch_size=10)
+
+    inicio = time.monotonic()
+    for i in range(25):
+        assert cola.enqueue(mensaje(i))
+    # Encolar no depende del servidor de correo
+    assert time.monotonic() - inicio < 0.5
+
+    assert cola.join(timeout=10)
+    cola.stop()
+
+    assert len(buzon.mensajes) == 25
+    assert buzon.conexiones == 1
+    metricas = cola.metrics()
+    assert metricas["enviados"] == 25
+    assert metricas["pendientes"] == 0
+
+
+def test_reintenta_con_backoff_cuando_el_servidor_no_responde():
+    port = puerto_libre()  # Nadie escucha en este puerto
+    cola = EmailDeliveryQueue(host="127.0.0.1", port=port, user="", password="", max_retries=2, backoff=0.01)
+
+    cola.enqueue(mensaje(1))
+    assert cola.join(timeout=10)
+    cola.stop()
+
+    metricas = cola.metrics()
+    assert metricas["reintentos"] == 2
+    assert metricas["fallidos"] == 1
+    assert metricas["enviados"] == 0
+
+
+def test_cola_llena_descarta_sin_bloquear():
+    cola = EmailDeliveryQueue(host="127.0.0.1", port=puerto_libre(), maxsize=1, max_retries=0, backoff=0)
+    # Sin worker corriendo, la cola se llena con el primer mensaje
+    cola.start = lambda: None
+
+    assert cola.enqueue(mensaje(1)) is True
+    assert cola.enqueue(mensaje(2)) is False
+    assert cola.metrics()["descartados"] == 1
+    assert cola.metrics()["pendientes"] == 1
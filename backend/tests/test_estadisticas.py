@@ -0,0 +1,189 @@
+"""Tests para el dashboard de estadísticas"""
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+from app.routers.estadisticas import get_dashboard_data
+from app.repositories import estadisticas_repository, inspeccion_repository
+from app.services.reportes import reporte_service
+from app.models import Planta, Naviera, Usuario, Inspeccion, EstadisticaDiaria
+from tests.conftest import engine, TestingSessionLocal
+
+
+def crear_datos(db):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db.add_all([
+        Planta(id_planta=1, codigo="P1", nombre="Planta Norte"),
+        Planta(id_planta=2, codigo="P2", nombre="Planta Sur"),
+        Naviera(id_navieras=1, codigo="N1", nombre="Maersk"),
+        Usuario(id_usuario=1, nombre="Admin", correo="admin@example.com", rol="admin"),
+        Usuario(id_usuario=2, nombre="Ana", correo="ana@example.com", rol="inspector"),
+        Usuario(id_usuario=3, nombre="Luis", correo="luis@example.com", rol="inspector"),
+    ])
+    db.commit()
+
+    hoy = datetime(2025, 6, 30, 12, 0)
+    estados = ['pending', 'approved', 'rejected', 'approved']
+    for i in range(1, 41):
+        db.add(Inspeccion(
+            id_inspeccion=i,
+            codigo=f"INS_{i}",
+            numero_contenedor=f"CONT-{i:03d}",
+            id_planta=1 if i % 4 else 2,
+            id_navieras=1,
+            id_inspector=2 if i % 2 else 3,
+            estado=estados[i % 4],
+            inspeccionado_en=hoy - timedelta(days=i % 10)
+        ))
+    db.commit()
+    # Las inspecciones se insertaron sin pasar por el repositorio: backfill del rollup
+    estadisticas_repository.reconstruir(db)
+
+
+def snapshot_rollup(db):
+    return {
+        (str(f.fecha), f.id_planta, f.id_navieras, f.id_inspector, f.estado): f.total
+        for f in db.query(EstadisticaDiaria).filter(EstadisticaDiaria.total != 0)
+    }
+
+
+def dashboard_con_conteo(db, usuario):
+    contador = {"n": 0}
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        contador["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        data = get_dashboard_data(
+            fecha_desde="2025-06-01",
+            fecha_hasta="2025-07-01",
+            current_user=usuario,
+            db=db
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    return data, contador["n"]
+
+
+def test_dashboard_totales(db_session):
+    crear_datos(db_session)
+    admin = db_session.get(Usuario, 1)
+
+    data, _ = dashboard_con_conteo(db_session, admin)
+
+    generales = data.estadisticas_generales
+    assert generales.total_inspecciones == 40
+    assert generales.pendientes == 10
+    assert generales.aprobadas == 20
+    assert generales.rechazadas == 10
+    assert (generales.total_usuarios, generales.total_plantas, generales.total_navieras) == (3, 2, 1)
+    assert [e.cantidad for e in data.por_estado] == [10, 20, 10]
+    assert sum(f.cantidad for f in data.por_fecha) == 40
+    assert len(data.por_fecha) == 10
+    assert data.por_planta[0].planta == "Planta Norte"
+    assert data.por_planta[0].cantidad == 30
+    assert {i.inspector: i.total for i in data.por_inspector} == {"Ana": 20, "Luis": 20}
+
+
+def test_dashboard_inspector_solo_ve_lo_propio(db_session):
+    crear_datos(db_session)
+    ana = db_session.get(Usuario, 2)
+
+    data, _ = dashboard_con_conteo(db_session, ana)
+
+    assert data.estadisticas_generales.total_inspecciones == 20
+    assert [i.inspector for i in data.por_inspector] == ["Ana"]
+
+
+def test_dashboard_cantidad_de_queries_fija(db_session):
+    crear_datos(db_session)
+    admin = db_session.get(Usuario, 1)
+
+    _, n_queries = dashboard_con_conteo(db_session, admin)
+
+    # Pasada agrupada + totales de catálogos, sin importar el volumen de datos
+    assert n_queries <= 2
+
+
+def test_rollup_se_mantiene_en_alta_cambio_y_baja(db_session):
+    crear_datos(db_session)
+
+    nueva = inspeccion_repository.create(db_session, {
+        "id_inspeccion": 100,
+        "codigo": "INS_100",
+        "numero_contenedor": "CONT-100",
+        "id_planta": 2,
+        "id_navieras": 1,
+        "id_inspector": 2,
+        "estado": "pending",
+        "inspeccionado_en": datetime(2025, 6, 15, 10, 0)
+    })
+    inspeccion_repository.update(db_session, nueva, {"estado": "approved"})
+    inspeccion_repository.update(db_session, db_session.get(Inspeccion, 1), {"estado": "rejected"})
+    inspeccion_repository.delete(db_session, db_session.get(Inspeccion, 2))
+
+    incremental = snapshot_rollup(db_session)
+    estadisticas_repository.reconstruir(db_session)
+    assert incremental == snapshot_rollup(db_session)
+
+
+def test_resumen_desde_rollup(db_session):
+    crear_datos(db_session)
+
+    resumen = reporte_service.obtener_resumen(
+        db_session, fecha_desde="2025-06-30", fecha_hasta="2025-06-30"
+    )
+    # Día completo (inclusivo): i in (10, 20, 30, 40) -> 2 pendientes y 2 rechazadas
+    assert resumen["total_inspecciones"] == 4
+    assert resumen["pendientes"] == 2
+    assert resumen["rechazadas"] == 2
+
+    resumen = reporte_service.obtener_resumen(db_session, id_inspector=3)
+    assert resumen["total_inspecciones"] == 20
+
+
+def test_resumen_con_hora_agrupa_en_sql(db_session):
+    crear_datos(db_session)
+
+    contador = {"n": 0}
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        contador["n"] += 1
+        assert "inspecciones.codigo" not in statement
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        resumen = reporte_service.obtener_resumen(
+            db_session,
+            fecha_desde="2025-06-30T00:00:00",
+            fecha_hasta="2025-06-30T23:59:59",
+            id_planta=1
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    # i in (10, 30) -> planta 1 (i % 4 != 0), ambas rechazadas
+    assert contador["n"] == 1
+    assert resumen["total_inspecciones"] == 2
+    assert resumen["rechazadas"] == 2
+    assert resumen["tasa_aprobacion"] == 0
+
+
+def test_cambios_de_estado_concurrentes_no_desfasan_el_rollup(db_session):
+    crear_datos(db_session)
+    otra = TestingSessionLocal()
+    try:
+        # Dos peticiones leen la inspección en 'approved' (i=1: 'approved')
+        en_a = db_session.get(Inspeccion, 1)
+        en_b = otra.get(Inspeccion, 1)
+        assert en_a.estado == en_b.estado == "approved"
+
+        inspeccion_repository.update(otra, en_b, {"estado": "rejected"})
+        # La primera aún tiene 'approved' en su copia de la sesión
+        inspeccion_repository.update(db_session, en_a, {"estado": "pending"})
+    finally:
+        otra.close()
+
+    incremental = snapshot_rollup(db_session)
+    estadisticas_repository.reconstruir(db_session)
+    assert incremental == snapshot_rollup(db_session)
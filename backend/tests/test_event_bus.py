@@ -0,0 +1,70 @@
+"""Tests para el bus de eventos en proceso y el stream SSE"""
+import asyncio
+import threading
+
+from app.models import Usuario
+from app.services.event_bus import EventBus
+from app.utils.auth import create_access_token
+from app.routers.notifications import formato_sse
+
+
+def test_publicar_desde_otro_hilo_llega_solo_a_destinatarios():
+    bus = EventBus()
+
+    async def escenario():
+        supervisor = bus.subscribe(1, "supervisor")
+        inspector = bus.subscribe(2, "inspector")
+        otro_inspector = bus.subscribe(3, "inspector")
+
+        # Los endpoints síncronos publican desde el threadpool
+        hilo = threading.Thread(target=bus.publish, args=(
+            "inspeccion_creada", {"id_inspeccion": 7}, [{"role": "supervisor"}, {"user_id": 2}]
+        ))
+        hilo.start()
+        hilo.join()
+
+        recibido_sup = await asyncio.wait_for(supervisor.queue.get(), timeout=1)
+        recibido_ins = await asyncio.wait_for(inspector.queue.get(), timeout=1)
+        assert recibido_sup == {"event": "inspeccion_creada", "data": {"id_inspeccion": 7}}
+        assert recibido_ins == recibido_sup
+        assert otro_inspector.queue.empty()
+
+        bus.unsubscribe(supervisor)
+        assert bus.conectados() == 2
+        assert bus.conectados("supervisor") == 0
+
+    asyncio.run(escenario())
+
+
+def test_cliente_lento_descarta_sin_bloquear():
+    bus = EventBus(maxsize=2)
+
+    async def escenario():
+        lento = bus.subscribe(1, "admin")
+        for i in range(5):
+            bus.publish("notificacion", {"i": i}, [{"role": "admin"}])
+        await asyncio.sleep(0)
+        assert lento.queue.qsize() == 2
+        assert lento.descartados == 3
+
+    asyncio.run(escenario())
+
+
+def test_formato_sse():
+    texto = formato_sse({"event": "notificacion", "data": {"title": "Inspección"}})
+    assert texto == 'event: notificacion\ndata: {"title": "Inspección"}\n\n'
+
+
+def test_stream_requiere_token(client):
+    assert client.get("/api/notifications/stream").status_code == 401
+    assert client.get("/api/notifications/stream", params={"token": "invalido"}).status_code == 401
+
+
+def test_stream_autentica_por_la_sesion_async(client, db_session):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db_session.add(Usuario(id_usuario=1, nombre="Ana", correo="ana@example.com", rol="inspector", estado="inactive"))
+    db_session.commit()
+    token = create_access_token({"sub": "1", "correo": "ana@example.com", "rol": "inspector", "nombre": "Ana"})
+
+    # Usuario encontrado por la sesión async: inactivo, sin abrir el stream
+    assert client.get("/api/notifications/stream", params={"token": token}).status_code == 403
@@ -0,0 +1,138 @@
+"""Tests para exportación de inspecciones"""
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+from app.repositories.inspecciones import inspeccion_repository
+from app.routers import inspecciones as inspecciones_router
+from app.models import Planta, Naviera, Usuario, Inspeccion, FotoInspeccion
+from tests.conftest import engine, TestingSessionLocal
+
+
+def crear_datos(db, cantidad=5):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db.add(Planta(id_planta=1, codigo="P1", nombre="Planta Norte"))
+    db.add(Naviera(id_navieras=1, codigo="N1", nombre="Maersk"))
+    db.add(Usuario(id_usuario=1, nombre="Ana Inspectora", correo="ana@example.com", rol="inspector"))
+    db.commit()
+
+    base = datetime(2025, 3, 1, 9, 30)
+    estados = ['pending', 'approved', 'rejected']
+    for i in range(1, cantidad + 1):
+        db.add(Inspeccion(
+            id_inspeccion=i,
+            codigo=f"INS_{i}",
+            numero_contenedor=f"CONT-{i:03d}",
+            id_planta=1,
+            id_navieras=1,
+            id_inspector=1,
+            estado=estados[i % 3],
+            inspeccionado_en=base + timedelta(hours=i)
+        ))
+        db.add(FotoInspeccion(id_foto=i, id_inspeccion=i, foto_path=f"/capturas/x/{i}.jpg"))
+    db.commit()
+
+
+def contar_queries():
+    contador = {"n": 0}
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        contador["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    return contador, lambda: event.remove(engine, "before_cursor_execute", before_execute)
+
+
+def test_exportacion_usa_una_sola_query(db_session):
+    crear_datos(db_session, cantidad=20)
+    db_session.expire_all()
+
+    contador, detener = contar_queries()
+    try:
+        filas = list(inspeccion_repository.iter_para_exportacion(db_session))
+    finally:
+        detener()
+
+    assert len(filas) == 20
+    assert contador["n"] == 1
+    assert filas[0].planta == "Planta Norte"
+    assert filas[0].naviera == "Maersk"
+    assert filas[0].inspector == "Ana Inspectora"
+    # Orden descendente por fecha
+    assert filas[0].id_inspeccion == 20
+
+
+def test_csv_generado_por_bloques(db_session, monkeypatch):
+    crear_datos(db_session, cantidad=5)
+    monkeypatch.setattr(inspecciones_router, "ReadSessionLocal", TestingSessionLocal)
+
+    chunks = list(inspecciones_router._generar_csv_inspecciones([["Reporte de Inspecciones"]], {}))
+    contenido = "".join(chunks)
+
+    assert len(chunks) >= 2
+    assert contenido.startswith('\ufeff"Reporte de Inspecciones"')
+    assert contenido.count("CONT-") == 5
+    assert '"Total: 5"' in contenido
+    assert '"Aprobadas: 2"' in contenido
+
+
+def test_excel_y_pdf_en_streaming(db_session):
+    import io
+    from openpyxl import load_workbook
+    from app.routers import reportes_export
+
+    crear_datos(db_session, cantidad=60)
+    conteo = reportes_export._conteo_estados(db_session, {})
+    assert conteo == {'pending': 20, 'approved': 20, 'rejected': 20}
+
+    excel = io.BytesIO()
+    reportes_export.crear_excel_inspecciones(
+        {}, conteo, inspeccion_repository.iter_para_exportacion(db_session), excel
+    )
+    excel.seek(0)
+    wb = load_workbook(excel, read_only=True)
+    assert wb.sheetnames == ["Resumen", "Detalle"]
+    assert sum(1 for _ in wb["Detalle"].iter_rows()) == 61
+
+    pdf = io.BytesIO()
+    reportes_export.crear_pdf_inspecciones(
+        db_session, {}, {}, conteo, inspeccion_repository.iter_para_exportacion(db_session), pdf
+    )
+    assert pdf.getvalue().startswith(b"%PDF")
+    # El detalle de 60 filas ocupa varias páginas (el PDF de error tiene una sola)
+    assert pdf.getvalue().count(b"/Type /Page\n") > 1
+
+
+def test_detalle_del_pdf_se_limita(db_session, monkeypatch):
+    import io
+    from app.routers import reportes_export
+
+    monkeypatch.setattr(reportes_export, "MAX_FILAS_PDF", 25)
+    crear_datos(db_session, cantidad=60)
+    conteo = reportes_export._conteo_estados(db_session, {})
+    leidas = []
+
+    def filas():
+        for fila in inspeccion_repository.iter_para_exportacion(db_session):
+            leidas.append(fila.id_inspeccion)
+            yield fila
+
+    pdf = io.BytesIO()
+    reportes_export.crear_pdf_inspecciones(db_session, {}, {}, conteo, filas(), pdf)
+
+    assert pdf.getvalue().startswith(b"%PDF")
+    assert pdf.getvalue().count(b"/Type /Page\n") > 1
+    # Solo las filas del límite pasan a ReportLab; el resumen cuenta las 60
+    assert len(leidas) == 25
+
+
+def test_hash_stream_coincide_con_hash_original(db_session):
+    from app.routers import reportes_export
+
+    crear_datos(db_session, cantidad=1)
+    inspeccion = db_session.query(Inspeccion).first()
+
+    esperado = reportes_export.calcular_hash_reporte([inspeccion], {})
+    obtenido = reportes_export.calcular_hash_reporte_stream(
+        inspeccion_repository.iter_manifiesto(db_session), {}
+    )
+    assert obtenido == esperado
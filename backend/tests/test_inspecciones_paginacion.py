@@ -0,0 +1,77 @@
+"""Tests de paginación por cursor para inspecciones a nivel de repositorio"""
+import pytest
+from datetime import datetime, timedelta
+from app.repositories.inspecciones import inspeccion_repository
+from app.models import Planta, Naviera, Usuario, Inspeccion
+
+
+def crear_inspecciones(db, cantidad=7):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db.add(Planta(id_planta=1, codigo="P1", nombre="Planta 1"))
+    db.add(Naviera(id_navieras=1, codigo="N1", nombre="Naviera 1"))
+    db.add(Usuario(id_usuario=1, nombre="Inspector 1", correo="i1@example.com", rol="inspector"))
+    db.commit()
+
+    base = datetime(2025, 1, 1, 8, 0, 0)
+    for i in range(1, cantidad + 1):
+        db.add(Inspeccion(
+            id_inspeccion=i,
+            codigo=f"INS_{i}",
+            numero_contenedor=f"CONT-{i:03d}",
+            id_planta=1,
+            id_navieras=1,
+            id_inspector=1,
+            estado='pending',
+            # Pares de inspecciones con la misma fecha para probar el desempate por ID
+            inspeccionado_en=base + timedelta(days=i // 2)
+        ))
+    db.commit()
+
+
+def recorrer(db, **kwargs):
+    ids, cursor = [], None
+    while True:
+        items, cursor, _ = inspeccion_repository.get_all_keyset(db, cursor=cursor, limit=3, **kwargs)
+        ids.extend(i.id_inspeccion for i in items)
+        if not cursor:
+            return ids
+
+
+def test_cursor_recorre_todas_sin_duplicados(db_session):
+    crear_inspecciones(db_session)
+
+    ids = recorrer(db_session, order_dir="desc")
+    esperado = [
+        i.id_inspeccion for i in db_session.query(Inspeccion)
+        .order_by(Inspeccion.inspeccionado_en.desc(), Inspeccion.id_inspeccion.desc())
+    ]
+    assert ids == esperado
+
+
+def test_cursor_ascendente_por_contenedor(db_session):
+    crear_inspecciones(db_session)
+
+    ids = recorrer(db_session, order_by="numero_contenedor", order_dir="asc")
+    assert ids == list(range(1, 8))
+
+
+def test_cursor_modo_total(db_session):
+    crear_inspecciones(db_session)
+
+    _, next_cursor, total = inspeccion_repository.get_all_keyset(db_session, limit=3)
+    assert total == 7
+    assert next_cursor is not None
+
+    _, _, total = inspeccion_repository.get_all_keyset(db_session, limit=3, modo_total="none")
+    assert total is None
+
+
+def test_cursor_invalido(db_session):
+    crear_inspecciones(db_session)
+
+    with pytest.raises(ValueError):
+        inspeccion_repository.get_all_keyset(db_session, cursor="no-es-un-cursor")
+
+    _, next_cursor, _ = inspeccion_repository.get_all_keyset(db_session, limit=3)
+    with pytest.raises(ValueError):
+        inspeccion_repository.get_all_keyset(db_session, cursor=next_cursor, order_by="estado")
@@ -0,0 +1,149 @@
+"""Tests para el logging en segundo plano (cola acotada y formato JSON)"""
+import io
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueListener
+
+from app.core.logging import ColaLogHandler, JsonFormatter, setup_logging, detener_logging
+from app.core.settings import settings
+
+
+def registro(nivel=logging.INFO, mensaje="mensaje %s", args=("uno",), **extra):
+    record = logging.LogRecord("prueba", nivel, __file__, 10, mensaje, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def mensajes(cola):
+    salida = []
+    while not cola.empty():
+        salida.append(cola.get_nowait().getMessage())
+    return salida
+
+
+class HandlerLento(logging.Handler):
+    """Simula un disco lento"""
+
+    def __init__(self):
+        super().__init__()
+        self.escritos = []
+
+    def emit(self, record):
+        time.sleep(0.05)
+        self.escritos.append(record.getMessage())
+
+
+def test_registrar_no_espera_al_escritor():
+    cola = queue.Queue(maxsize=100)
+    lento = HandlerLento()
+    listener = QueueListener(cola, lento)
+    listener.start()
+    logger = logging.getLogger("prueba.cola")
+    logger.propagate = False
+    logger.addHandler(ColaLogHandler(cola))
+    try:
+        inicio = time.perf_counter()
+        for i in range(10):
+            logger.warning("petición %d", i)
+        # 10 escrituras de 50 ms: el llamador no las espera
+        assert time.perf_counter() - inicio < 0.05
+    finally:
+        listener.stop()
+        logger.handlers.clear()
+
+    assert lento.escritos == [f"petición {i}" for i in range(10)]
+
+
+def test_cola_llena_descarta_sin_bloquear():
+    cola = queue.Queue(maxsize=2)
+    handler = ColaLogHandler(cola)
+
+    for i in range(4):
+        handler.handle(registro(mensaje="info %d", args=(i,)))
+    # Un error desplaza al registro más antiguo
+    handler.handle(registro(logging.ERROR, "error", ()))
+
+    assert handler.descartados == 3
+    assert mensajes(cola) == ["info 1", "error"]
+
+    # Con espacio, primero se informa lo perdido
+    handler.handle(registro(mensaje="info 5", args=()))
+    assert mensajes(cola) == ["Se descartaron 3 registros de log (cola llena)", "info 5"]
+
+
+def test_mensaje_se_resuelve_al_encolar():
+    cola = queue.Queue()
+    datos = {"estado": "pending"}
+    ColaLogHandler(cola).handle(registro(mensaje="inspección %s", args=(datos,)))
+    datos["estado"] = "approved"
+
+    assert mensajes(cola) == ["inspección {'estado': 'pending'}"]
+
+
+def test_formato_json_con_campos_extra_y_excepcion():
+    try:
+        raise ValueError("fallo")
+    except ValueError:
+        record = logging.LogRecord("http", logging.ERROR, __file__, 10, "X ERROR %s", ("GET",), sys.exc_info())
+    record.http_status = 500
+    record.duracion_ms = 12.5
+
+    datos = json.loads(JsonFormatter().format(record))
+
+    assert datos["level"] == "ERROR"
+    assert datos["logger"] == "http"
+    assert datos["message"] == "X ERROR GET"
+    assert (datos["http_status"], datos["duracion_ms"]) == (500, 12.5)
+    assert "ValueError: fallo" in datos["exc"]
+    assert "args" not in datos and "msg" not in datos
+
+
+def test_json_una_linea_por_registro_desde_el_hilo_escritor():
+    cola = queue.Queue(maxsize=10)
+    salida = io.StringIO()
+    handler = logging.StreamHandler(salida)
+    handler.setFormatter(JsonFormatter())
+    listener = QueueListener(cola, handler)
+    listener.start()
+    try:
+        ColaLogHandler(cola).handle(registro(mensaje="línea\nsegunda", args=(), ruta="/api/x"))
+    finally:
+        listener.stop()
+
+    [linea] = salida.getvalue().splitlines()
+    datos = json.loads(linea)
+    assert datos["message"] == "línea\nsegunda"
+    assert datos["ruta"] == "/api/x"
+
+
+def registrar_en_worker(mensaje):
+    logging.getLogger("pdf_jobs").error(mensaje)
+    return os.getpid()
+
+
+def test_logs_de_un_proceso_del_pool_llegan_al_archivo(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_JSON", False)
+    directorio = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        setup_logging()
+        logging.getLogger("pdf_jobs").error("error en el padre")
+        contexto = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+            pid = pool.submit(registrar_en_worker, "error en el worker").result(timeout=10)
+        detener_logging()
+
+        contenido = (tmp_path / "logs" / settings.LOG_FILE).read_text(encoding="utf-8")
+    finally:
+        os.chdir(directorio)
+        setup_logging()
+
+    assert pid != os.getpid()
+    assert "error en el padre" in contenido
+    assert "error en el worker" in contenido
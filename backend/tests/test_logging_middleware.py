@@ -0,0 +1,86 @@
+"""Tests para el middleware ASGI de logging de peticiones"""
+import logging
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import LoggingMiddleware
+
+
+def crear_app(**opciones):
+    app = FastAPI()
+
+    @app.get("/api/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/api/items/{id_item}")
+    def item(id_item: int):
+        if id_item == 0:
+            raise HTTPException(status_code=404, detail="No existe")
+        return {"id": id_item}
+
+    @app.get("/api/export")
+    def export():
+        return StreamingResponse((f"fila {i}\n".encode() for i in range(1000)), media_type="text/csv")
+
+    @app.get("/api/falla")
+    def falla():
+        raise RuntimeError("fallo")
+
+    return TestClient(LoggingMiddleware(app, excluir=["/api/health"], **opciones), raise_server_exceptions=False)
+
+
+@pytest.fixture
+def registros(caplog):
+    caplog.set_level(logging.INFO, logger="http")
+    return lambda: [r for r in caplog.records if r.name == "http"]
+
+
+def test_una_linea_con_campos_estructurados(registros):
+    response = crear_app().get("/api/items/7")
+
+    assert response.status_code == 200
+    assert response.headers["X-Process-Time"].endswith("ms")
+    [registro] = registros()
+    assert registro.levelno == logging.INFO
+    assert registro.getMessage().startswith("<- 200 GET /api/items/7")
+    assert (registro.http_method, registro.http_path, registro.http_status) == ("GET", "/api/items/7", 200)
+    assert registro.duracion_ms >= registro.ttfb_ms >= 0
+
+
+def test_rutas_excluidas_no_se_registran(registros):
+    response = crear_app().get("/api/health")
+
+    assert response.status_code == 200
+    assert registros() == []
+
+
+def test_muestreo_no_omite_errores(registros):
+    client = crear_app(muestreo=0.0)
+
+    client.get("/api/items/7")
+    client.get("/api/items/0")
+    client.get("/api/falla")
+
+    assert [(r.levelno, r.http_status) for r in registros()] == [
+        (logging.WARNING, 404),
+        (logging.ERROR, 500),
+    ]
+
+
+def test_peticiones_lentas_se_registran_siempre(registros):
+    crear_app(muestreo=0.0, lento_ms=0).get("/api/items/7")
+
+    [registro] = registros()
+    assert registro.levelno == logging.WARNING
+
+
+def test_streaming_pasa_completo(registros):
+    response = crear_app().get("/api/export")
+
+    assert response.text.count("\n") == 1000
+    [registro] = registros()
+    assert registro.http_status == 200
@@ -0,0 +1,69 @@
+"""Otros endpoints siguen respondiendo mientras se verifica un login (bcrypt fuera del event loop)"""
+import asyncio
+import threading
+
+import httpx
+
+from app.main import app
+from app.core.database import get_db, get_async_db
+from app.routers import auth as auth_router
+from app.utils import auth as auth_utils
+from app.models import Usuario
+from tests.conftest import override_get_async_db
+
+
+class VerificacionBloqueada:
+    """verify_password que no termina hasta que el health haya respondido.
+
+    Si corriera en el event loop, el health no podría atenderse y la espera
+    vencería: el resultado no depende de cuánto tarde cada petición.
+    """
+
+    def __init__(self):
+        self.iniciada = threading.Event()
+        self.health_servido = threading.Event()
+        self.hilos = []
+        self.health_antes_de_terminar = []
+
+    def __call__(self, plain_password, hashed_password):
+        self.hilos.append(threading.current_thread().name)
+        self.iniciada.set()
+        self.health_antes_de_terminar.append(self.health_servido.wait(timeout=5))
+        return False
+
+
+async def login_con_health(verificacion):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        login = asyncio.create_task(client.post(
+            "/api/auth/login", json={"correo": "ana@example.com", "password": "Incorrecta1!"}
+        ))
+        while not verificacion.iniciada.is_set() and not login.done():
+            await asyncio.sleep(0.01)
+        health = await client.get("/api/health")
+        verificacion.health_servido.set()
+        return health, await login
+
+
+def test_health_responde_mientras_se_verifica_un_login(db_session, monkeypatch):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db_session.add(Usuario(
+        id_usuario=1, nombre="Ana", correo="ana@example.com", rol="inspector",
+        password_hash="$2b$12$" + "x" * 53
+    ))
+    db_session.commit()
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    monkeypatch.setattr(auth_router.limiter, "enabled", False)
+    verificacion = VerificacionBloqueada()
+    monkeypatch.setattr(auth_utils, "verify_password", verificacion)
+    try:
+        health, login = asyncio.run(login_con_health(verificacion))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert health.status_code == 200
+    assert login.status_code == 401
+    # La verificación corrió en el pool de bcrypt y el health se atendió mientras tanto
+    assert len(verificacion.hilos) == 1 and verificacion.hilos[0].startswith("bcrypt")
+    assert verificacion.health_antes_de_terminar == [True]
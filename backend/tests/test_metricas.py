@@ -0,0 +1,94 @@
+"""Tests para la instrumentación y el endpoint /api/metrics"""
+import re
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.metrics import metricas, QueuePoolMedido, instrumentar_engine
+from app.core.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def limpiar_metricas():
+    metricas.clear()
+    yield
+    metricas.clear()
+
+
+def valor(texto, serie):
+    """Valor de una serie exacta (nombre{etiquetas}) en la exportación"""
+    coincidencia = re.search(rf"^{re.escape(serie)} (\S+)$", texto, re.MULTILINE)
+    return float(coincidencia.group(1)) if coincidencia else None
+
+
+def test_latencia_y_consultas_por_ruta(client):
+    assert client.get("/api/reportes/conteo-estado").status_code == 200
+    assert client.get("/api/reportes/conteo-estado").status_code == 200
+    client.get("/api/no-existe/123")
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    texto = response.text
+
+    ruta = 'route="/api/reportes/conteo-estado"'
+    assert valor(texto, f'http_request_duration_seconds_count{{method="GET",{ruta},status="200"}}') == 2
+    assert valor(texto, f'http_request_db_queries_count{{{ruta}}}') == 2
+    assert valor(texto, f'http_request_db_queries_sum{{{ruta}}}') >= 2
+    # Las rutas inexistentes no crean una serie por URL
+    assert valor(texto, 'http_request_duration_seconds_count{method="GET",route="sin_ruta",status="404"}') == 1
+    assert "/api/no-existe/123" not in texto
+    assert valor(texto, 'db_pool_checkouts_total{pool="test"}') >= 2
+
+
+def test_consultas_lentas_con_sentencia(client, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+
+    client.get("/api/reportes/conteo-estado")
+
+    texto = client.get("/api/metrics").text
+    assert valor(texto, 'db_slow_queries_total{db="test"}') >= 1
+    muestras = [l for l in texto.splitlines() if l.startswith("db_slow_query_sample_seconds{")]
+    assert any('route="/api/reportes/conteo-estado"' in m and "SELECT" in m for m in muestras)
+
+
+def test_pool_saturado(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePoolMedido, pool_logging_name="saturado",
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    instrumentar_engine(engine, "saturado")
+    try:
+        with engine.connect() as conexion:
+            conexion.execute(text("SELECT 1"))
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+            texto = metricas.exportar()
+            assert valor(texto, 'db_pool_checked_out{pool="saturado"}') == 1
+            assert valor(texto, 'db_pool_timeouts_total{pool="saturado"}') == 1
+            assert valor(texto, 'db_pool_checkout_wait_seconds_count{pool="saturado"}') == 2
+            assert valor(texto, 'db_pool_checkout_wait_seconds_sum{pool="saturado"}') >= 0.05
+    finally:
+        engine.dispose()
+
+
+def test_token_de_metricas(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "secreto")
+
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer secreto"}).status_code == 200
+
+
+@pytest.mark.parametrize("habilitado, entorno, token, esperado", [
+    (False, "development", "secreto", False),
+    (True, "development", "", True),
+    (True, "production", "", False),
+    (True, "production", "secreto", True),
+])
+def test_metricas_fuera_de_development_exigen_token(monkeypatch, habilitado, entorno, token, esperado):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", habilitado)
+    monkeypatch.setattr(settings, "ENVIRONMENT", entorno)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", token)
+
+    assert settings.metricas_habilitadas is esperado
@@ -0,0 +1,90 @@
+"""Tests para la bandeja de notificaciones"""
+import pytest
+from sqlalchemy import event
+
+from app.services.notification_manager import notification_manager
+from app.models import Usuario, Notificacion
+from tests.conftest import engine
+
+
+def crear_usuarios(db):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db.add_all([
+        Usuario(id_usuario=1, nombre="Sara", correo="sara@example.com", rol="supervisor"),
+        Usuario(id_usuario=2, nombre="Ana", correo="ana@example.com", rol="inspector"),
+    ])
+    db.commit()
+
+
+def recorrer(db, user_id, roles, limit):
+    vistos, cursor = [], None
+    while True:
+        items, cursor = notification_manager.list_for_user(db, user_id, roles, limit=limit, cursor=cursor)
+        vistos.extend(items)
+        if not cursor:
+            return vistos
+
+
+def test_listado_paginado_recientes_primero(db_session):
+    crear_usuarios(db_session)
+    for i in range(7):
+        notification_manager.create(
+            db_session, recipients=[{"role": "supervisor"}], title=f"Rol {i}", message="m"
+        )
+        notification_manager.create(
+            db_session, recipients=[{"user_id": 1}, {"user_id": 2}], title=f"Directa {i}", message="m"
+        )
+
+    items = recorrer(db_session, 1, ["supervisor"], limit=4)
+
+    assert len(items) == 14
+    assert len({n["id"] for n in items}) == 14
+    claves = [(n["created_at"], n["id"]) for n in items]
+    assert claves == sorted(claves, reverse=True)
+
+    # La inspectora solo ve las dirigidas a ella
+    assert len(recorrer(db_session, 2, ["inspector"], limit=50)) == 7
+
+
+def test_lectura_de_pagina_no_recorre_la_tabla(db_session):
+    crear_usuarios(db_session)
+    for i in range(30):
+        notification_manager.create(db_session, recipients=[{"role": "supervisor"}], title=f"N {i}", message="m")
+
+    sentencias = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        items, cursor = notification_manager.list_for_user(db_session, 1, ["supervisor"], limit=5)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    assert len(items) == 5
+    assert cursor is not None
+    assert all("LIMIT" in s for s in sentencias)
+
+
+def test_marcar_leida_por_fila(db_session):
+    crear_usuarios(db_session)
+    creadas = notification_manager.create(
+        db_session, recipients=[{"user_id": 2}, {"role": "supervisor"}], title="t", message="m"
+    )
+    propia, de_rol = creadas
+
+    # Un usuario no puede marcar notificaciones que no le corresponden
+    assert notification_manager.mark_read(db_session, propia["id"], user_id=1, roles=["supervisor"]) is False
+    assert notification_manager.mark_read(db_session, de_rol["id"], user_id=1, roles=["supervisor"]) is True
+    assert notification_manager.mark_read(db_session, "no-existe", user_id=1, roles=["supervisor"]) is False
+
+    db_session.expire_all()
+    assert db_session.get(Notificacion, de_rol["id"]).leida is True
+    assert db_session.get(Notificacion, propia["id"]).leida is False
+
+
+def test_cursor_invalido(db_session):
+    crear_usuarios(db_session)
+    with pytest.raises(ValueError):
+        notification_manager.list_for_user(db_session, 1, ["supervisor"], cursor="basura")
@@ -0,0 +1,144 @@
+"""Tests para la generación de PDFs en segundo plano"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import pdf_jobs
+from app.services.pdf_jobs import PDFJobService
+from app.models import Planta, Naviera, Usuario, Inspeccion, FotoInspeccion, Reporte, TrabajoPDF, Notificacion
+from tests.conftest import TestingSessionLocal
+
+
+def crear_datos(db):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db.add_all([
+        Planta(id_planta=1, codigo="P1", nombre="Planta Norte"),
+        Naviera(id_navieras=1, codigo="N1", nombre="Maersk"),
+        Usuario(id_usuario=1, nombre="Admin", correo="admin@example.com", rol="admin"),
+    ])
+    db.commit()
+    db.add(Inspeccion(
+        id_inspeccion=1, codigo="INS_1", numero_contenedor="CONT-001", id_planta=1,
+        id_navieras=1, id_inspector=1, estado="approved", inspeccionado_en=datetime(2025, 5, 1, 10, 0)
+    ))
+    db.add(FotoInspeccion(id_foto=1, id_inspeccion=1, foto_path="inspecciones/x/1.jpg"))
+    db.commit()
+
+
+@pytest.fixture
+def servicio(monkeypatch):
+    # Mismo proceso y BD de pruebas: un hilo reemplaza al pool de procesos
+    monkeypatch.setattr(pdf_jobs, "SessionLocal", TestingSessionLocal)
+    servicio = PDFJobService()
+    servicio._executor = ThreadPoolExecutor(max_workers=1)
+    yield servicio
+    servicio._executor.shutdown(wait=True)
+
+
+def generar_pdf_falso(db, id_inspeccion):
+    reporte = Reporte(
+        id=1, uuid_reporte="u-1", id_inspeccion=id_inspeccion,
+        pdf_ruta="/tmp/reporte.pdf", hash_global="0" * 64
+    )
+    db.add(reporte)
+    db.commit()
+    return reporte
+
+
+def esperar(servicio):
+    servicio._executor.shutdown(wait=True)
+    servicio._executor = ThreadPoolExecutor(max_workers=1)
+
+
+def test_trabajo_termina_y_notifica(db_session, servicio, monkeypatch):
+    crear_datos(db_session)
+    monkeypatch.setattr(pdf_jobs.pdf_generator_service, "generar_pdf", generar_pdf_falso)
+
+    trabajo = servicio.encolar(db_session, 1, id_usuario=1)
+    assert trabajo.estado == "queued"
+    esperar(servicio)
+
+    db_session.expire_all()
+    trabajo = db_session.get(TrabajoPDF, trabajo.id)
+    assert trabajo.estado == "done"
+    assert trabajo.id_reporte == 1
+    assert trabajo.terminado_en is not None
+    notif = db_session.query(Notificacion).one()
+    assert notif.evento == "REPORTE_PDF_LISTO"
+    assert notif.id_usuario == 1
+
+
+def test_trabajo_fallido_registra_error(db_session, servicio, monkeypatch):
+    crear_datos(db_session)
+
+    def fallar(db, id_inspeccion):
+        raise RuntimeError("sin espacio en disco")
+
+    monkeypatch.setattr(pdf_jobs.pdf_generator_service, "generar_pdf", fallar)
+
+    trabajo = servicio.encolar(db_session, 1, id_usuario=1)
+    esperar(servicio)
+
+    db_session.expire_all()
+    trabajo = db_session.get(TrabajoPDF, trabajo.id)
+    assert trabajo.estado == "failed"
+    assert "sin espacio" in trabajo.error
+    assert db_session.query(Notificacion).one().evento == "REPORTE_PDF_FALLIDO"
+
+
+def test_inspeccion_invalida_no_encola(db_session, servicio):
+    crear_datos(db_session)
+    with pytest.raises(ValueError):
+        servicio.encolar(db_session, 999)
+    assert db_session.query(TrabajoPDF).count() == 0
+
+
+def test_reanudar_pendientes_tras_reinicio(db_session, servicio, monkeypatch):
+    crear_datos(db_session)
+    monkeypatch.setattr(pdf_jobs.pdf_generator_service, "generar_pdf", generar_pdf_falso)
+    # Un trabajo quedó 'running' cuando el proceso anterior se detuvo
+    db_session.add(TrabajoPDF(
+        id="t-1", id_inspeccion=1, estado="running",
+        iniciado_en=datetime.now() - timedelta(hours=1)
+    ))
+    db_session.commit()
+
+    assert servicio.reanudar_pendientes() == 1
+    esperar(servicio)
+
+    db_session.expire_all()
+    assert db_session.get(TrabajoPDF, "t-1").estado == "done"
+
+
+def test_reanudar_no_toma_trabajos_en_ejecucion_vigentes(db_session, servicio):
+    crear_datos(db_session)
+    # Otro worker de la API lo está ejecutando
+    db_session.add(TrabajoPDF(id="t-1", id_inspeccion=1, estado="running", iniciado_en=datetime.now()))
+    db_session.commit()
+
+    assert servicio.reanudar_pendientes() == 0
+
+    db_session.expire_all()
+    assert db_session.get(TrabajoPDF, "t-1").estado == "running"
+
+
+def test_trabajo_enviado_dos_veces_se_ejecuta_una(db_session, servicio, monkeypatch):
+    crear_datos(db_session)
+    ejecuciones = []
+
+    def generar(db, id_inspeccion):
+        ejecuciones.append(id_inspeccion)
+        return generar_pdf_falso(db, id_inspeccion)
+
+    monkeypatch.setattr(pdf_jobs.pdf_generator_service, "generar_pdf", generar)
+
+    trabajo = servicio.encolar(db_session, 1, id_usuario=1)
+    # Un segundo worker de la API lo reenvía al reanudar
+    servicio._enviar(trabajo.id, 1)
+    esperar(servicio)
+
+    assert ejecuciones == [1]
+    db_session.expire_all()
+    assert db_session.get(TrabajoPDF, trabajo.id).estado == "done"
+    assert db_session.query(Notificacion).count() == 1
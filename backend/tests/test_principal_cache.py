@@ -0,0 +1,101 @@
+"""Tests para el cache de usuarios autenticados"""
+from sqlalchemy import event
+
+from app.utils.auth import authenticate_token_async, create_access_token, get_password_hash
+from app.models import Usuario
+from tests.conftest import async_engine, run_async
+
+
+def crear_usuarios(db):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db.add_all([
+        Usuario(id_usuario=1, nombre="Admin", correo="admin@example.com", rol="admin",
+                password_hash=get_password_hash("Admin123!")),
+        Usuario(id_usuario=2, nombre="Ana", correo="ana@example.com", rol="inspector",
+                password_hash=get_password_hash("Ana12345!")),
+    ])
+    db.commit()
+
+
+def headers(id_usuario, correo, rol):
+    token = create_access_token({"sub": str(id_usuario), "correo": correo, "rol": rol, "nombre": "x"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def consultas_a_usuarios(client, url, hdrs):
+    sentencias = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    # get_current_user consulta el usuario por la sesión async
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_execute)
+    try:
+        response = client.get(url, headers=hdrs)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_execute)
+    return response, [s for s in sentencias if "FROM usuarios" in s]
+
+
+def test_segundo_request_no_consulta_usuarios(client, db_session):
+    crear_usuarios(db_session)
+    ana = headers(2, "ana@example.com", "inspector")
+
+    response, consultas = consultas_a_usuarios(client, "/api/auth/me", ana)
+    assert response.status_code == 200
+    assert len(consultas) == 1
+
+    response, consultas = consultas_a_usuarios(client, "/api/auth/me", ana)
+    assert response.status_code == 200
+    assert response.json()["rol"] == "inspector"
+    assert consultas == []
+
+
+def test_cambio_de_estado_invalida_cache(client, db_session):
+    crear_usuarios(db_session)
+    admin = headers(1, "admin@example.com", "admin")
+    ana = headers(2, "ana@example.com", "inspector")
+
+    assert client.get("/api/auth/me", headers=ana).status_code == 200
+
+    response = client.patch("/api/usuarios/2/estado", json={"estado": "inactive"}, headers=admin)
+    assert response.status_code == 200
+
+    assert client.get("/api/auth/me", headers=ana).status_code == 403
+
+
+def test_usuario_cacheado_carga_columnas_no_cacheadas(db_session):
+    from app.utils.auth import authenticate_token, verify_password
+    from tests.conftest import TestingSessionLocal
+
+    crear_usuarios(db_session)
+    token = headers(2, "ana@example.com", "inspector")["Authorization"].split()[1]
+    authenticate_token(db_session, token)
+
+    # Otra sesión (otro request): el usuario sale del cache y queda asociado a la sesión
+    db = TestingSessionLocal()
+    try:
+        usuario = authenticate_token(db, token)
+        assert usuario in db
+        assert verify_password("Ana12345!", usuario.password_hash)
+        usuario.nombre = "Ana María"
+        db.commit()
+    finally:
+        db.close()
+
+    db_session.expire_all()
+    assert db_session.get(Usuario, 2).nombre == "Ana María"
+
+
+def test_consulta_async_del_usuario_libera_la_conexion(db_session):
+    crear_usuarios(db_session)
+    token = create_access_token({"sub": "2", "correo": "ana@example.com", "rol": "inspector", "nombre": "x"})
+
+    async def autenticar(async_db):
+        usuario = await authenticate_token_async(db_session, async_db, token)
+        return usuario, async_db.in_transaction()
+
+    usuario, conexion_retenida = run_async(autenticar)
+
+    assert usuario.correo == "ana@example.com"
+    assert conexion_retenida is False
@@ -0,0 +1,81 @@
+"""Tests para el enrutamiento de lecturas a la réplica"""
+import contextvars
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.replica import RoutingSession, escrituras_recientes, marcar_usuario_actual
+from app.models import Planta
+from tests.conftest import engine
+
+
+@pytest.fixture
+def sesion_lectura(db_session, tmp_path):
+    # Réplica "atrasada": mismo esquema, sin los datos del primario
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=replica)
+    yield sessionmaker(class_=RoutingSession, autoflush=False, primario=engine, replica=replica)
+    replica.dispose()
+
+
+def en_peticion(id_usuario, funcion):
+    """Ejecuta funcion en un contexto propio, como una petición de id_usuario"""
+    def ejecutar():
+        marcar_usuario_actual(id_usuario)
+        return funcion()
+    return contextvars.copy_context().run(ejecutar)
+
+
+def plantas(Session):
+    db = Session()
+    try:
+        return [p.codigo for p in db.query(Planta).order_by(Planta.codigo)]
+    finally:
+        db.close()
+
+
+def crear_planta(Session, id_planta):
+    db = Session()
+    try:
+        db.add(Planta(id_planta=id_planta, codigo=f"P{id_planta}", nombre="Planta"))
+        db.commit()
+        # Misma sesión: ya escribió, lee del primario
+        return db.query(Planta).count()
+    finally:
+        db.close()
+
+
+def test_lecturas_van_a_la_replica(db_session, sesion_lectura):
+    db_session.add(Planta(id_planta=1, codigo="P1", nombre="Planta Norte"))
+    db_session.commit()
+
+    assert en_peticion(7, lambda: plantas(sesion_lectura)) == []
+
+
+def test_escrituras_van_al_primario(db_session, sesion_lectura):
+    assert en_peticion(None, lambda: crear_planta(sesion_lectura, 1)) == 1
+
+    assert db_session.query(Planta).count() == 1
+    # Sin usuario no hay ventana: una sesión nueva vuelve a la réplica
+    assert en_peticion(None, lambda: plantas(sesion_lectura)) == []
+
+
+def test_usuario_lee_sus_propias_escrituras(db_session, sesion_lectura):
+    # Escritura del usuario 7 por la sesión normal (get_db)
+    def escribir():
+        db_session.add(Planta(id_planta=1, codigo="P1", nombre="Planta Norte"))
+        db_session.commit()
+    en_peticion(7, escribir)
+
+    assert en_peticion(7, lambda: plantas(sesion_lectura)) == ["P1"]
+    assert en_peticion(8, lambda: plantas(sesion_lectura)) == []
+
+
+def test_ventana_vencida_vuelve_a_la_replica(db_session, sesion_lectura, monkeypatch):
+    monkeypatch.setattr(escrituras_recientes, "ventana_seconds", 0.0)
+
+    en_peticion(7, lambda: crear_planta(sesion_lectura, 1))
+
+    assert en_peticion(7, lambda: plantas(sesion_lectura)) == []
@@ -0,0 +1,105 @@
+"""Tests del contrato de almacenamiento (disco local y S3)"""
+import os
+
+import boto3
+import moto
+import pytest
+
+from app.core.settings import settings
+from app.core.storage import StorageBackend, LocalStorage, S3Storage, clave_de_ruta, ruta_de_clave
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(str(tmp_path / "capturas"))
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    # Se prueba contra un bucket simulado (requirements-test.txt); con MinIO basta S3_ENDPOINT_URL
+    monkeypatch.setattr(settings, "S3_MULTIPART_THRESHOLD", 5 * 1024 * 1024)
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="capturas")
+        yield S3Storage(bucket="capturas", client=client)
+
+
+@pytest.fixture(params=["local", "s3"])
+def storage(request):
+    return request.getfixturevalue(request.param)
+
+
+def temporal(storage, contenido):
+    ruta = os.path.join(storage.directorio_temporal(), "subida.part")
+    with open(ruta, "wb") as f:
+        f.write(contenido)
+    return ruta
+
+
+def test_guardar_leer_y_eliminar(storage):
+    origen = temporal(storage, b"evidencia")
+
+    storage.guardar_archivo("blobs/ab/cd/abcd.jpg", origen, "image/jpeg")
+
+    assert not os.path.exists(origen)  # el temporal se consume
+    assert storage.existe("blobs/ab/cd/abcd.jpg")
+    assert storage.tamano("blobs/ab/cd/abcd.jpg") == 9
+    assert storage.leer_bytes("blobs/ab/cd/abcd.jpg") == b"evidencia"
+    with storage.ruta_local("blobs/ab/cd/abcd.jpg") as ruta:
+        with open(ruta, "rb") as f:
+            assert f.read() == b"evidencia"
+
+    storage.eliminar("blobs/ab/cd/abcd.jpg")
+    storage.eliminar("blobs/ab/cd/abcd.jpg")  # eliminar dos veces no falla
+    assert not storage.existe("blobs/ab/cd/abcd.jpg")
+    assert storage.tamano("blobs/ab/cd/abcd.jpg") is None
+    with pytest.raises(FileNotFoundError):
+        storage.leer_bytes("blobs/ab/cd/abcd.jpg")
+
+
+def test_guardar_bytes(storage):
+    storage.guardar_bytes("firmas/revisiones/inspeccion_1_revisor.json", b'{"nombre": "Ana"}')
+
+    assert storage.leer_bytes("firmas/revisiones/inspeccion_1_revisor.json") == b'{"nombre": "Ana"}'
+
+
+def test_url_descarga_firmada_solo_en_s3(local, s3):
+    s3.guardar_bytes("reportes/r.pdf", b"%PDF")
+
+    assert local.url_descarga("reportes/r.pdf") is None
+    url = s3.url_descarga("reportes/r.pdf", nombre="r.pdf")
+    assert "reportes/r.pdf" in url and "Signature" in url
+
+
+def test_subida_por_partes_en_s3(s3):
+    contenido = os.urandom(11 * 1024 * 1024)
+
+    s3.guardar_archivo("reportes/grande.pdf", temporal(s3, contenido))
+
+    assert s3.leer_bytes("reportes/grande.pdf") == contenido
+    # ETag de S3 para multipart: "<md5>-<partes>"
+    head = s3.client.head_object(Bucket="capturas", Key="reportes/grande.pdf")
+    assert head["ETag"].strip('"').endswith("-3")
+
+
+def test_claves_y_rutas_de_bd():
+    assert clave_de_ruta("/capturas/blobs/ab/cd/x.jpg") == "blobs/ab/cd/x.jpg"
+    assert ruta_de_clave("firmas/1.png") == "/capturas/firmas/1.png"
+
+
+def test_backend_incompleto_no_se_instancia():
+    class SinEliminar(StorageBackend):
+        def directorio_temporal(self):
+            return ""
+
+    with pytest.raises(TypeError):
+        SinEliminar()
+
+
+@pytest.mark.parametrize("clave", ["/etc/passwd", "../secreto.txt", "blobs\\..\\..\\secreto.txt", "enlace/passwd"])
+def test_ruta_local_no_sale_de_capturas(local, clave):
+    os.makedirs(local.directorio, exist_ok=True)
+    os.symlink("/etc", os.path.join(local.directorio, "enlace"))
+
+    with pytest.raises(ValueError):
+        local.ruta(clave)
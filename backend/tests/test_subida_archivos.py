@@ -0,0 +1,74 @@
+"""Tests para el guardado por bloques de archivos subidos"""
+import asyncio
+import hashlib
+import os
+from io import BytesIO
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.core.settings import settings
+from app.utils import files
+from app.utils.files import save_upload_file
+
+
+class ArchivoEspia(BytesIO):
+    """Registra el tamaño de cada lectura"""
+
+    def __init__(self, contenido):
+        super().__init__(contenido)
+        self.lecturas = []
+
+    def read(self, size=-1):
+        self.lecturas.append(size)
+        return super().read(size)
+
+
+@pytest.fixture
+def capturas(tmp_path, monkeypatch):
+    directorio = tmp_path / "capturas"
+    monkeypatch.setattr(settings, "CAPTURAS_DIR", str(directorio))
+    return directorio
+
+
+def test_guarda_por_bloques_con_hash(capturas, monkeypatch):
+    monkeypatch.setattr(files, "CHUNK_SIZE", 1024)
+    contenido = os.urandom(10 * 1024 + 17)
+    origen = ArchivoEspia(contenido)
+
+    clave, relative_path, file_hash = asyncio.run(
+        save_upload_file(UploadFile(file=origen, filename="foto.jpg"), "inspecciones/01-05-2025/7")
+    )
+
+    assert file_hash == hashlib.sha256(contenido).hexdigest()
+    assert (capturas / clave).read_bytes() == contenido
+    assert relative_path == f"/capturas/{clave}"
+    assert clave.startswith("inspecciones/01-05-2025/7/")
+    # Nunca se leyó el archivo completo de una vez
+    assert set(origen.lecturas) == {1024}
+    assert os.listdir(capturas / ".tmp") == []
+
+
+def test_rechaza_archivo_grande_a_mitad_de_transferencia(capturas, monkeypatch):
+    monkeypatch.setattr(files, "CHUNK_SIZE", 1024)
+    origen = ArchivoEspia(b"x" * 50 * 1024)
+    # Sin tamaño declarado: el límite se aplica durante la lectura
+    archivo = UploadFile(file=origen, filename="grande.jpg")
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(save_upload_file(archivo, "firmas", max_size=4 * 1024))
+
+    assert exc.value.status_code == 413
+    assert len(origen.lecturas) == 5  # se detuvo al pasar el límite
+    assert os.listdir(capturas) == [".tmp"]  # sin archivo final
+    assert os.listdir(capturas / ".tmp") == []  # ni temporales
+
+
+def test_rechaza_tamano_declarado_sin_leer(capturas):
+    origen = ArchivoEspia(b"x" * 100)
+    archivo = UploadFile(file=origen, filename="grande.jpg", size=100)
+
+    with pytest.raises(HTTPException):
+        asyncio.run(save_upload_file(archivo, "firmas", max_size=10))
+
+    assert origen.lecturas == []
@@ -0,0 +1,127 @@
+"""Tests para la subida de fotos en lote"""
+import asyncio
+import itertools
+import os
+from datetime import datetime
+from io import BytesIO
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import event
+
+from app.core.settings import settings
+from app.models import Planta, Naviera, Usuario, Inspeccion, FotoInspeccion, BlobEvidencia
+from app.schemas import FotoInspeccion as FotoInspeccionSchema
+from app.services.inspecciones import inspeccion_service
+from tests.conftest import async_engine, run_async
+
+
+class LecturasEnCurso:
+    """Cuenta las lecturas simultáneas y el máximo alcanzado"""
+
+    def __init__(self):
+        self.actuales = 0
+        self.maximo = 0
+
+
+class ArchivoLento(UploadFile):
+    """Simula una fuente que tarda en entregar el primer bloque"""
+
+    def __init__(self, *args, lecturas=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lecturas = lecturas or LecturasEnCurso()
+
+    async def read(self, size=-1):
+        self.lecturas.actuales += 1
+        self.lecturas.maximo = max(self.lecturas.maximo, self.lecturas.actuales)
+        try:
+            await asyncio.sleep(0.01)
+            return await super().read(size)
+        finally:
+            self.lecturas.actuales -= 1
+
+
+def archivos(cantidad, lecturas=None):
+    if lecturas is None:
+        return [UploadFile(file=BytesIO(f"foto {i}".encode() * 50), filename=f"{i}.jpg") for i in range(cantidad)]
+    return [
+        ArchivoLento(file=BytesIO(f"foto {i}".encode() * 50), filename=f"{i}.jpg", lecturas=lecturas)
+        for i in range(cantidad)
+    ]
+
+
+def walk(directorio):
+    return sorted(f for _, _, nombres in os.walk(directorio) for f in nombres)
+
+
+@pytest.fixture
+def inspeccion(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CAPTURAS_DIR", str(tmp_path / "capturas"))
+    db_session.add_all([
+        Planta(id_planta=1, codigo="P1", nombre="Planta Norte"),
+        Naviera(id_navieras=1, codigo="N1", nombre="Maersk"),
+        Usuario(id_usuario=1, nombre="Ana", correo="ana@example.com", rol="inspector"),
+    ])
+    db_session.commit()
+    db_session.add(Inspeccion(
+        id_inspeccion=1, codigo="INS_1", numero_contenedor="CONT-001", id_planta=1,
+        id_navieras=1, id_inspector=1, estado="pending", inspeccionado_en=datetime(2025, 5, 1)
+    ))
+    db_session.commit()
+    return tmp_path / "capturas"
+
+
+@pytest.fixture
+def ids_foto():
+    # SQLite no autoincrementa columnas BIGINT: asignar IDs al insertar
+    contador = itertools.count(1)
+
+    def asignar(mapper, connection, foto):
+        foto.id_foto = next(contador)
+
+    event.listen(FotoInspeccion, "before_insert", asignar)
+    yield
+    event.remove(FotoInspeccion, "before_insert", asignar)
+
+
+def test_subida_en_lote_una_transaccion(db_session, inspeccion, ids_foto):
+    sentencias = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", registrar)
+    try:
+        fotos = run_async(inspeccion_service.subir_fotos, 1, archivos(5))
+        respuesta = [FotoInspeccionSchema.model_validate(f) for f in fotos]
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", registrar)
+
+    assert [f.orden for f in respuesta] == [0, 1, 2, 3, 4]
+    assert len({f.id_foto for f in respuesta}) == 5
+    inserts = [i for i, s in enumerate(sentencias) if s.startswith("INSERT INTO fotos_inspeccion")]
+    assert len(inserts) == 1
+    # Sin SELECT de refresco por cada foto creada
+    assert sentencias[inserts[0] + 1:] == []
+    assert db_session.query(FotoInspeccion).count() == 5
+
+
+def test_archivos_se_escriben_concurrentemente(db_session, inspeccion, ids_foto, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_CONCURRENCY", 3)
+    lecturas = LecturasEnCurso()
+
+    run_async(inspeccion_service.subir_fotos, 1, archivos(6, lecturas))
+
+    # Varias lecturas a la vez, sin pasar del límite configurado
+    assert lecturas.maximo == 3
+    assert db_session.query(FotoInspeccion).count() == 6
+
+
+def test_fallo_en_bd_limpia_los_archivos(db_session, inspeccion):
+    # Sin IDs asignados el INSERT falla en SQLite, a mitad de la subida
+    with pytest.raises(Exception):
+        run_async(inspeccion_service.subir_fotos, 1, archivos(3))
+
+    assert walk(inspeccion) == []
+    assert db_session.query(BlobEvidencia).count() == 0
+    assert db_session.query(FotoInspeccion).count() == 0
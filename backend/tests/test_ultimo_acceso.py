@@ -0,0 +1,65 @@
+"""Tests para el registro diferido del último acceso"""
+from sqlalchemy import event
+
+from app.services.ultimo_acceso import UltimoAccesoTracker
+from app.utils.auth import create_access_token
+from app.models import Usuario
+from tests.conftest import engine, TestingSessionLocal
+
+
+def crear_usuarios(db):
+    # IDs explícitos: SQLite no autoincrementa columnas BIGINT
+    db.add_all([
+        Usuario(id_usuario=1, nombre="Ana", correo="ana@example.com", rol="inspector"),
+        Usuario(id_usuario=2, nombre="Luis", correo="luis@example.com", rol="inspector"),
+    ])
+    db.commit()
+
+
+def test_coalescencia_y_flush_en_lote(db_session):
+    crear_usuarios(db_session)
+    tracker = UltimoAccesoTracker(session_factory=TestingSessionLocal, flush_seconds=3600, ventana_seconds=60)
+    tracker.start = lambda: None  # Sin hilo: el flush se invoca a mano
+
+    assert tracker.registrar(1) is True
+    assert tracker.registrar(1) is False  # Dentro de la ventana
+    assert tracker.registrar(2) is True
+
+    sentencias = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append((statement, executemany))
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        assert tracker.flush() == 2
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    updates = [s for s in sentencias if s[0].startswith("UPDATE")]
+    assert len(updates) == 1 and updates[0][1] is True
+
+    db_session.expire_all()
+    assert db_session.get(Usuario, 1).ultimo_acceso is not None
+    assert db_session.get(Usuario, 2).ultimo_acceso is not None
+    assert tracker.flush() == 0
+
+
+def test_request_autenticado_no_escribe(client, db_session):
+    crear_usuarios(db_session)
+    token = create_access_token({"sub": "1", "correo": "ana@example.com", "rol": "inspector", "nombre": "Ana"})
+
+    sentencias = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    assert response.status_code == 200
+    assert response.json()["ultimo_acceso"] is not None
+    assert not any(s.startswith("UPDATE") for s in sentencias)
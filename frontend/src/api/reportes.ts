@@ -26,6 +26,16 @@ export interface ReporteCreated {
   mensaje: string;
 }
 
+export interface TrabajoPDF {
+  id_trabajo: string;
+  id_inspeccion: number;
+  estado: "queued" | "running" | "done" | "failed";
+  id_reporte: number | null;
+  error: string | null;
+  creado_en: string;
+  terminado_en: string | null;
+}
+
 export interface FirmarReporteResponse {
   mensaje: string;
   id_reporte?: number;
@@ -68,16 +78,58 @@ export const reportesApi = {
   // ===== PDF =====
 
   /**
-   * Generar PDF de inspección (solo ADMIN)
+   * Encolar la generación del PDF de una inspección (solo ADMIN)
    */
-  generarPdf: async (data: ReporteCreate): Promise<ReporteCreated> => {
-    const response = await axios.post<ReporteCreated>(
+  encolarPdf: async (data: ReporteCreate): Promise<TrabajoPDF> => {
+    const response = await axios.post<TrabajoPDF>(
       "/reportes/pdf/generar",
       data
     );
     return response.data;
   },
 
+  /**
+   * Consultar el estado de un trabajo de PDF
+   */
+  obtenerTrabajoPdf: async (idTrabajo: string): Promise<TrabajoPDF> => {
+    const response = await axios.get<TrabajoPDF>(
+      `/reportes/pdf/trabajos/${idTrabajo}`
+    );
+    return response.data;
+  },
+
+  /**
+   * Generar PDF de inspección (solo ADMIN): encola el trabajo y espera a que termine,
+   * como máximo esperaMaximaMs
+   */
+  generarPdf: async (
+    data: ReporteCreate,
+    intervaloMs = 1000,
+    esperaMaximaMs = 5 * 60 * 1000
+  ): Promise<ReporteCreated> => {
+    let trabajo = await reportesApi.encolarPdf(data);
+    const limite = Date.now() + esperaMaximaMs;
+    while (trabajo.estado === "queued" || trabajo.estado === "running") {
+      if (Date.now() >= limite) {
+        throw new Error(
+          "El PDF sigue generándose; recibirá una notificación cuando esté listo"
+        );
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervaloMs));
+      trabajo = await reportesApi.obtenerTrabajoPdf(trabajo.id_trabajo);
+    }
+    if (trabajo.estado === "failed" || trabajo.id_reporte == null) {
+      throw new Error(trabajo.error || "Error al generar el PDF");
+    }
+    const reporte = await reportesApi.obtenerReporte(trabajo.id_reporte);
+    return {
+      id_reporte: reporte.id_reporte,
+      uuid_reporte: reporte.uuid_reporte,
+      pdf_ruta: reporte.pdf_ruta,
+      mensaje: "PDF generado exitosamente",
+    };
+  },
+
   /**
    * Obtener información de un reporte
    */
@@ -395,8 +395,15 @@ const InspeccionModal: React.FC<InspeccionModalProps> = ({
                       className="relative aspect-square rounded-lg overflow-hidden group"
                     >
                       <img
-                        src={foto.foto_path}
+                        src={foto.thumbnail_url || foto.foto_path}
                         alt={`Foto de inspección ${inspeccion.codigo}`}
+                        loading="lazy"
+                        onError={(e) => {
+                          // Fotos antiguas sin miniatura: usar el original
+                          if (e.currentTarget.src !== new URL(foto.foto_path, window.location.href).href) {
+                            e.currentTarget.src = foto.foto_path;
+                          }
+                        }}
                         className="w-full h-full object-cover cursor-pointer transition-transform group-hover:scale-110"
                         onClick={() => setSelectedPhoto(foto.foto_path)}
                       />
@@ -12,6 +12,7 @@ type Notif = {
   created_at: string;
 };
 
+// Respaldo por polling solo si el navegador no soporta EventSource
 const POLL_INTERVAL = 30000; // 30s
 
 const NotificationsBell: React.FC = () => {
@@ -30,16 +31,23 @@ const NotificationsBell: React.FC = () => {
 
   useEffect(() => {
     load();
-    const id = setInterval(load, POLL_INTERVAL);
-    // Refresh notifications when any inspection changes state (dispatched elsewhere)
-    const handler = () => {
-      load();
-    };
-    window.addEventListener(
-      "inspeccion:estado_cambiado",
-      handler as EventListener
+    const token = localStorage.getItem("auth_token");
+    if (typeof EventSource === "undefined" || !token) {
+      const id = setInterval(load, POLL_INTERVAL);
+      return () => clearInterval(id);
+    }
+    // Notificaciones empujadas por el servidor (SSE); EventSource reconecta solo
+    const baseURL = axios.defaults.baseURL || "/api";
+    const source = new EventSource(
+      `${baseURL}/notifications/stream?token=${encodeURIComponent(token)}`
     );
-    return () => clearInterval(id);
+    source.addEventListener("notificacion", (event) => {
+      const notif = JSON.parse((event as MessageEvent).data) as Notif;
+      setNotifs((prev) =>
+        prev.some((n) => n.id === notif.id) ? prev : [notif, ...prev]
+      );
+    });
+    return () => source.close();
   }, []);
 
   useEffect(() => {
@@ -124,7 +124,7 @@ const Inspecciones: React.FC = () => {
       reportesApi.descargarPdf(resultado.id_reporte);
     } catch (error: any) {
       console.error("Error al generar PDF:", error);
-      const mensaje = error.response?.data?.detail || "Error al generar el PDF";
+      const mensaje = error.response?.data?.detail || error.message || "Error al generar el PDF";
       showError(mensaje);
     } finally {
       setGenerandoPdf(null);
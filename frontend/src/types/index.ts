@@ -88,6 +88,7 @@ export interface FotoInspeccion {
   orden: number;
   tomada_en?: string;
   creado_en: string;
+  thumbnail_url?: string | null;
 }
 
 // ===== INSPECCIONES =====